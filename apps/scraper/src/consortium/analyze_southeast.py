@@ -1,8 +1,21 @@
 """Analyze the Southeast R1/R2 dataset"""
-import json
+from researcher_stream import iter_researchers
 
-with open('data/consortium/southeast_r1r2_20260114_041911.json', encoding='utf-8') as f:
-    d = json.load(f)
+bci_keywords = ['neuro', 'brain', 'cognit', 'neural', 'bci', 'eeg', 'fmri', 'psychiatr', 'psycholog']
+
+# One streaming pass; only the top 25, the neuro/BCI subset and counts are kept
+d = {}
+top25 = []
+inst_counts = {}
+bci_researchers = []
+for r in iter_researchers('data/consortium/southeast_r1r2_20260114_041911.json', d):
+    if len(top25) < 25:
+        top25.append(r)
+    inst = r.get('institution', 'Unknown')
+    inst_counts[inst] = inst_counts.get(inst, 0) + 1
+    field = (r.get('field', '') + ' ' + r.get('subfield', '')).lower()
+    if any(kw in field for kw in bci_keywords):
+        bci_researchers.append(r)
 
 print("=" * 70)
 print("SOUTHEAST R1/R2 RESEARCH CONSORTIUM - DATA ANALYSIS")
@@ -22,7 +35,7 @@ for state, stats in sorted(d['by_state'].items(), key=lambda x: -x[1]['count']):
 print()
 print("TOP 25 RESEARCHERS BY h-INDEX:")
 print("-" * 70)
-for i, r in enumerate(d['researchers'][:25], 1):
+for i, r in enumerate(top25, 1):
     name = r.get('name', 'Unknown')[:32]
     inst = r.get('institution', '')[:18]
     h = r.get('h_index', 0)
@@ -33,7 +46,7 @@ for i, r in enumerate(d['researchers'][:25], 1):
 print()
 print("FIELDS PER RESEARCHER:")
 print("-" * 50)
-sample = d['researchers'][0]
+sample = top25[0]
 for k, v in sample.items():
     print(f"  {k}: {type(v).__name__} (e.g. {str(v)[:50]})")
 
@@ -41,11 +54,6 @@ for k, v in sample.items():
 print()
 print("TOP 15 INSTITUTIONS BY RESEARCHER COUNT:")
 print("-" * 50)
-inst_counts = {}
-for r in d['researchers']:
-    inst = r.get('institution', 'Unknown')
-    inst_counts[inst] = inst_counts.get(inst, 0) + 1
-
 for inst, count in sorted(inst_counts.items(), key=lambda x: -x[1])[:15]:
     print(f"  {inst[:40]:<40} {count:>6,}")
 
@@ -53,13 +61,6 @@ for inst, count in sorted(inst_counts.items(), key=lambda x: -x[1])[:15]:
 print()
 print("BCI/NEUROSCIENCE RESEARCHERS (by field):")
 print("-" * 50)
-bci_keywords = ['neuro', 'brain', 'cognit', 'neural', 'bci', 'eeg', 'fmri', 'psychiatr', 'psycholog']
-bci_researchers = []
-for r in d['researchers']:
-    field = (r.get('field', '') + ' ' + r.get('subfield', '')).lower()
-    if any(kw in field for kw in bci_keywords):
-        bci_researchers.append(r)
-
 print(f"Found {len(bci_researchers)} researchers in neuro/BCI/psychology fields")
 print()
 print("TOP 20 NEURO/BCI RESEARCHERS:")
@@ -0,0 +1,735 @@
+"""
+IRIS SEARCH MICRO-BENCHMARKS
+============================
+Synthetic benchmarks for the search API hot paths
+
+    python bench_search.py rerank --rows 208000 --candidates 500
+    python bench_search.py top --rows 208000 2000000
+    python bench_search.py encoder --onnx-dir data/consortium/vector_index/onnx_encoder
+    python bench_search.py serialize --rows 208000 --encode-ann-ms 6
+
+Recall and latency of a built index (encoder + FAISS + rerank):
+
+    python bench_search.py recall --index-dir data/consortium/vector_index \\
+        --queries queries.txt --sweep 8 16 32 64
+    python bench_search.py compare bench_results/search_A.json bench_results/search_B.json
+
+recall takes a query set (one query per line, or a JSON list; default the
+encoder parity set) and reports:
+    encode      per-query encoder latency percentiles
+    configs     per index file and nprobe / efSearch value: recall@k and
+                nDCG@k against exact search, search and rerank latency
+    throughput  end-to-end queries/s and latency at several concurrency levels
+
+Ground truth is an exact inner-product search over the corpus vectors
+(--vectors, the index's vector sidecar, or reconstructed from the index).
+It is cached in --ground-truth and recomputed when the queries, encoder or
+corpus change; the corpus is fingerprinted by its metadata.json "created"
+stamp and the index and vector files, not just its vector count. Results
+are saved as JSON so runs can be compared over time.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+import faiss
+from pathlib import Path
+
+from researcher_store import ResearcherStore, build_store, is_store
+from json_fragments import JsonFragments, build_fragments, dumps, summary
+from ranking import rerank
+from ranked_views import RankedViews
+from query_encoder import DEFAULT_MODEL, ENCODER_BACKENDS, load_encoder
+from index_builder import apply_search_setting, recall_at_k, search_setting
+from search_filters import search_params
+from vector_sidecar import extract_vectors, load_sidecar, sidecar_paths
+
+INDEX_FILE = 'southeast_researchers.index'
+RESULTS_DIR = Path('bench_results')
+
+INSTITUTIONS = [
+    'Georgia Institute of Technology', 'Emory University', 'Georgia State University',
+    'University of Georgia', 'Kennesaw State University', 'Mercer University',
+    'Duke University', 'Vanderbilt University', 'University of Florida', 'Clemson University',
+]
+FIELDS = ['Neuroscience', 'Oncology', 'Machine Learning', 'Materials Science',
+          'Climate Science', 'Immunology', 'Robotics', 'Economics']
+
+
+def synthetic_researchers(n: int, seed: int = 0):
+    """Yield n researcher records with a realistic long-tailed h-index."""
+    rng = random.Random(seed)
+    for i in range(n):
+        h = int(rng.expovariate(1 / 15))
+        yield {
+            'name': f'Researcher {i}',
+            'openalex_id': f'https://openalex.org/A{i}',
+            'orcid': None,
+            'institution': rng.choice(INSTITUTIONS),
+            'h_index': h,
+            'citations': int(h * h * rng.uniform(2, 8)),
+            'works_count': rng.randint(1, 500),
+            'field': rng.choice(FIELDS),
+            'subfield': rng.choice(FIELDS),
+        }
+
+
+def synthetic_store(n: int, seed: int = 0):
+    """Build a throwaway store; returns (store, records as a dict keyed by row id)."""
+    records = dict(enumerate(synthetic_researchers(n, seed)))
+    out_dir = Path(tempfile.mkdtemp(prefix='iris_bench_')) / 'researcher_store'
+    build_store((records[i] for i in range(n)), out_dir)
+    return ResearcherStore(out_dir), records
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of fn() in microseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1e6
+
+
+def legacy_rerank(lookup, I, D, limit, min_h_index, institution, h_weight, citation_weight):
+    """The per-hit Python loop search() used before ranking.rerank."""
+    max_h = max((lookup.get(int(i), {}).get('h_index', 0) for i in I), default=1) or 1
+    max_c = max((lookup.get(int(i), {}).get('citations', 0) for i in I), default=1) or 1
+    candidates = []
+    for idx, score in zip(I, D):
+        r = lookup.get(int(idx), {})
+        if not r:
+            continue
+        h = r.get('h_index', 0)
+        c = r.get('citations', 0)
+        inst = r.get('institution', '')
+        if h < min_h_index:
+            continue
+        if institution and institution.lower() not in inst.lower():
+            continue
+        semantic_weight = 1.0 - h_weight - citation_weight
+        weighted = score * semantic_weight + h / max_h * h_weight + c / max_c * citation_weight
+        candidates.append((int(idx), score, weighted))
+    candidates.sort(key=lambda x: -x[2])
+    return candidates[:limit]
+
+
+# Relative gap under which two weighted scores count as tied across precisions
+NEAR_TIE_RTOL = 1e-6
+
+
+def rerank_differences(legacy_all: list, got_ids, got_w, limit: int) -> int:
+    """Compare rerank() output with every legacy candidate; returns near-tie swaps.
+
+    With float32 FAISS scores the legacy loop's arithmetic is float32 under
+    NumPy 2 (float64 under NumPy 1), while rerank() always computes in
+    float64, so candidates within float32 rounding of each other may be
+    ordered differently. Anything beyond such a swap raises AssertionError.
+    """
+    legacy_w = {idx: float(w) for idx, _, w in legacy_all}
+    expected = [idx for idx, _, _ in legacy_all[:limit]]
+    got = got_ids.tolist()
+    assert len(got) == len(expected), 'result count differs from legacy loop'
+    assert all(idx in legacy_w for idx in got), 'rerank returned a candidate the legacy loop filtered out'
+    assert np.allclose([legacy_w[idx] for idx in got], got_w, rtol=NEAR_TIE_RTOL, atol=0), \
+        'weighted scores differ from legacy loop'
+    swaps = 0
+    for rank, (e, g) in enumerate(zip(expected, got)):
+        if e != g:
+            ew, gw = legacy_w[e], legacy_w[g]
+            assert abs(ew - gw) <= NEAR_TIE_RTOL * max(abs(ew), abs(gw)), \
+                f'rank {rank}: {g} instead of {e} is not a near-tie'
+            swaps += 1
+    return swaps
+
+
+def bench_rerank(args):
+    print(f'Building synthetic store ({args.rows:,} rows)...')
+    store, records = synthetic_store(args.rows)
+    rng = np.random.default_rng(1)
+
+    cases = [
+        {'min_h_index': 0, 'institution': None},
+        {'min_h_index': 20, 'institution': None},
+        {'min_h_index': 0, 'institution': 'georgia'},
+        {'min_h_index': 10, 'institution': 'emory'},
+    ]
+    for case in cases:
+        ids = rng.choice(args.rows, size=args.candidates, replace=False).astype(np.int64)
+        ids[-3:] = -1  # empty FAISS slots
+        scores = np.sort(rng.uniform(0.2, 0.8, size=args.candidates))[::-1]
+        # Quantize scores so the check also covers exact ties; float32, as FAISS returns D
+        D = np.round(scores, 3).astype(np.float32)
+        scores = D
+
+        institution = case['institution']
+        codes = store.match_category('institution', institution) if institution else None
+        params = dict(min_h_index=case['min_h_index'], h_weight=0.3, citation_weight=0.1)
+
+        legacy_all = legacy_rerank(records, ids, D, args.candidates, institution=institution, **params)
+        got_ids, got_sem, got_w = rerank(store, ids, scores, args.limit, institution_codes=codes, **params)
+        swaps = rerank_differences(legacy_all, got_ids, got_w, args.limit)
+
+        legacy_us = timed(lambda: legacy_rerank(records, ids, D, args.limit,
+                                                institution=institution, **params), args.repeat)
+        vector_us = timed(lambda: rerank(store, ids, scores, args.limit,
+                                         institution_codes=codes, **params), args.repeat)
+        print(f'  min_h={case["min_h_index"]:<3} institution={str(institution):<8} '
+              f'results={len(got_ids):>3} | legacy {legacy_us:8.1f} us | '
+              f'vectorized {vector_us:7.1f} us | {legacy_us / vector_us:5.1f}x  '
+              f'({f"{swaps} near-tie swaps" if swaps else "identical ranking"})')
+
+
+def legacy_top(lookup, limit, institution, field):
+    """The full-scan /top used before ranked_views."""
+    candidates = []
+    for idx, r in lookup.items():
+        if institution and institution.lower() not in r.get('institution', '').lower():
+            continue
+        if field and field.lower() not in (r.get('field', '') + ' ' + r.get('subfield', '')).lower():
+            continue
+        candidates.append(r)
+    candidates.sort(key=lambda x: -x.get('h_index', 0))
+    return candidates[:limit]
+
+
+def bench_top(args):
+    cases = [
+        {'institution': None, 'field': None},
+        {'institution': 'emory', 'field': None},
+        {'institution': None, 'field': 'neuro'},
+        {'institution': 'georgia', 'field': 'oncology'},
+    ]
+    for rows in args.rows:
+        print(f'Building synthetic store ({rows:,} rows)...')
+        store, records = synthetic_store(rows)
+        start = time.perf_counter()
+        views = RankedViews(store)
+        print(f'  RankedViews build: {(time.perf_counter() - start) * 1000:.0f} ms')
+        run_legacy = rows <= args.legacy_max_rows
+
+        for case in cases:
+            institution, field = case['institution'], case['field']
+            codes = dict(
+                institution_codes=store.match_category('institution', institution) if institution else None,
+                field_codes=store.match_category('field', field) if field else None,
+                subfield_codes=store.match_category('subfield', field) if field else None,
+            )
+            ids, total = views.top(args.limit, **codes)
+            views_us = timed(lambda: views.top(args.limit, **codes), args.repeat)
+            line = (f'  rows={rows:>9,} institution={str(institution):<8} field={str(field):<9} '
+                    f'matched={total:>9,} | views {views_us:8.1f} us')
+            if run_legacy:
+                expected = legacy_top(records, args.limit, institution, field)
+                assert [r['openalex_id'] for r in expected] == [records[int(i)]['openalex_id'] for i in ids]
+                legacy_us = timed(lambda: legacy_top(records, args.limit, institution, field), 3)
+                line += f' | legacy {legacy_us / 1000:8.1f} ms | {legacy_us / views_us:8.0f}x'
+            print(line)
+        del store, records
+
+
+def legacy_search_page(store, ids, semantic, weighted):
+    """/search results as built before json_fragments: one pydantic model per hit."""
+    from pydantic import BaseModel, TypeAdapter
+    from typing import List, Optional
+
+    class SearchResult(BaseModel):
+        rank: int
+        name: str
+        institution: str
+        field: Optional[str]
+        subfield: Optional[str]
+        h_index: int
+        citations: int
+        works_count: int
+        openalex_id: Optional[str]
+        orcid: Optional[str]
+        semantic_score: float
+        weighted_score: float
+
+    adapter = TypeAdapter(List[SearchResult])
+
+    def encode():
+        return adapter.dump_json([
+            SearchResult(rank=rank, **summary(store.get(idx)),
+                         semantic_score=float(sem), weighted_score=float(w))
+            for rank, (idx, sem, w) in enumerate(zip(ids, semantic, weighted), 1)
+        ])
+    return encode
+
+
+def bench_serialize(args):
+    print(f'Building synthetic store ({args.rows:,} rows)...')
+    store, _ = synthetic_store(args.rows)
+    start = time.perf_counter()
+    fragments_dir = store.path.with_name('json_fragments')
+    size = build_fragments(store, fragments_dir)
+    fragments = JsonFragments(fragments_dir)
+    print(f'  Fragments build: {time.perf_counter() - start:.1f} s, {size / 1e6:.1f} MB')
+
+    rng = np.random.default_rng(2)
+    candidates = rng.choice(args.rows, size=args.candidates, replace=False).astype(np.int64)
+    scores = np.sort(rng.uniform(0.2, 0.8, size=args.candidates))[::-1]
+    ids, semantic, weighted = rerank(store, candidates, scores, args.limit)
+    rerank_us = timed(lambda: rerank(store, candidates, scores, args.limit), args.repeat)
+    h_order = np.argsort(-np.asarray(store.column('h_index')), kind='stable')
+
+    legacy_search = legacy_search_page(store, ids, semantic, weighted)
+    cases = [
+        (f'/search  {args.limit} results', legacy_search,
+         lambda: fragments.search_results(ids, semantic, weighted)),
+        (f'/name    {args.limit} results', lambda: dumps([summary(store.get(i)) for i in ids]),
+         lambda: fragments.summaries(ids)),
+        (f'/top     {args.top} records', lambda: dumps(store.records(h_order[:args.top])),
+         lambda: fragments.records(h_order[:args.top])),
+    ]
+    for name, legacy, fast in cases:
+        assert legacy() == fast(), f'{name}: fragments differ from the legacy encoding'
+        legacy_us = timed(legacy, args.repeat)
+        fast_us = timed(fast, args.repeat)
+        print(f'  {name} | legacy {legacy_us:8.1f} us | fragments {fast_us:7.1f} us | '
+              f'{legacy_us / fast_us:5.1f}x  (identical bytes)')
+        if name.startswith('/search'):
+            search_us = (legacy_us, fast_us)
+
+    # Share of a /search cache miss spent serializing: rerank + serialize, plus
+    # encode + ANN when given (see iris_stage_seconds on /metrics for live values)
+    other_us = rerank_us + args.encode_ann_ms * 1000
+    print(f'  /search serialize share of {"rerank + serialize" if not args.encode_ann_ms else "request"}'
+          f' (rerank {rerank_us:.0f} us{f", encode + ANN {args.encode_ann_ms} ms" if args.encode_ann_ms else ""}):')
+    for label, us in zip(('legacy', 'fragments'), search_us):
+        print(f'    {label:<9} {us / (us + other_us) * 100:5.1f}%  ({(us + other_us) / 1000:.2f} ms total)')
+
+
+# Fixed query set for encoder parity (typical /search traffic)
+PARITY_QUERIES = [
+    'machine learning for medical imaging', 'neuroscience of memory', 'cancer immunotherapy',
+    'climate change adaptation', 'robotics and autonomous systems', 'health economics',
+    'materials science batteries', 'deep learning natural language processing',
+    'Alzheimer disease biomarkers', 'infectious disease epidemiology', 'quantum computing',
+    'renewable energy policy', 'computational biology genomics', 'cybersecurity',
+    'public health nutrition', 'brain computer interface', 'drug discovery',
+    'supply chain optimization', 'coastal ecology', 'pediatric oncology',
+    'Emory neuroscience', 'Georgia Tech robotics', 'Duke economics', 'fMRI connectivity',
+    'smart manufacturing', 'hypersonic aerodynamics', 'microbiome', 'wearable sensors',
+    'agricultural economics', 'computer vision', 'cardiology heart failure',
+    'early childhood education', 'water resources hydrology', 'polymer chemistry',
+    'social network analysis', 'vaccine development', 'urban planning transportation',
+    'stem cell therapy', 'astrophysics', 'mental health depression',
+]
+# Minimum per-query cosine and mean recall@k against the torch reference
+PARITY_THRESHOLDS = {'onnx': (0.999, 0.99), 'onnx-int8': (0.95, 0.85)}
+
+
+def bench_encoder(args):
+    from vectorize_researchers import create_search_text
+
+    encoders = {}
+    for backend in ['torch'] + args.backends:
+        start = time.perf_counter()
+        encoders[backend] = load_encoder(backend, args.model, args.onnx_dir, args.threads)
+        print(f'  {backend:<10} loaded in {time.perf_counter() - start:6.2f} s')
+
+    # Reference corpus and its nearest neighbours, all from the torch encoder
+    texts = [create_search_text(r) for r in synthetic_researchers(args.corpus)]
+    print(f'Encoding {len(texts):,} corpus texts with torch...')
+    corpus = encoders['torch'].encode(texts, batch_size=128, convert_to_numpy=True).astype('float32')
+    faiss.normalize_L2(corpus)
+    index = faiss.IndexFlatIP(corpus.shape[1])
+    index.add(corpus)
+
+    def encode(backend, queries):
+        vecs = encoders[backend].encode(queries, convert_to_numpy=True).astype('float32')
+        faiss.normalize_L2(vecs)
+        return vecs
+
+    reference = encode('torch', PARITY_QUERIES)
+    _, ref_ids = index.search(reference, args.k)
+
+    failed = False
+    print(f'\nParity vs torch ({len(PARITY_QUERIES)} queries, recall@{args.k})')
+    for backend in args.backends:
+        vecs = encode(backend, PARITY_QUERIES)
+        cosine = (vecs * reference).sum(axis=1)
+        _, ids = index.search(vecs, args.k)
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ref_ids, ids)])
+        min_cosine, min_recall = PARITY_THRESHOLDS[backend]
+        ok = cosine.min() >= min_cosine and recall >= min_recall
+        failed |= not ok
+        print(f'  {backend:<10} cosine min {cosine.min():.5f} mean {cosine.mean():.5f} | '
+              f'recall@{args.k} {recall:.4f} | {"PASS" if ok else "FAIL"} '
+              f'(needs cosine >= {min_cosine}, recall >= {min_recall})')
+
+    print('\nLatency (median)')
+    batch = PARITY_QUERIES[:args.batch]
+    for backend, encoder in encoders.items():
+        query = iter(PARITY_QUERIES * (args.repeat + 1))
+        single_us = timed(lambda: encoder.encode([next(query)], convert_to_numpy=True), args.repeat)
+        batch_us = timed(lambda: encoder.encode(batch, convert_to_numpy=True), max(args.repeat // 10, 3))
+        print(f'  {backend:<10} 1 query {single_us / 1000:7.2f} ms | '
+              f'{len(batch)} queries {batch_us / 1000:7.2f} ms '
+              f'({len(batch) / batch_us * 1e6:7.0f} queries/s)')
+    if failed:
+        raise SystemExit('Encoder parity check failed')
+
+
+def load_queries(path: Path) -> list:
+    if path is None:
+        return list(PARITY_QUERIES)
+    text = Path(path).read_text(encoding='utf-8')
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def percentiles(ms: list) -> dict:
+    ms = np.asarray(ms, dtype=np.float64)
+    return {
+        'p50': round(float(np.percentile(ms, 50)), 3),
+        'p90': round(float(np.percentile(ms, 90)), 3),
+        'p99': round(float(np.percentile(ms, 99)), 3),
+        'mean': round(float(ms.mean()), 3),
+    }
+
+
+def ndcg_at_k(found: np.ndarray, truth: np.ndarray, truth_scores: np.ndarray) -> float:
+    """Mean nDCG@k with each true neighbour's exact similarity as its gain."""
+    k = truth.shape[1]
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+    values = []
+    for f, t, s in zip(found, truth, truth_scores):
+        gains = dict(zip(t.tolist(), np.clip(s, 0, None).tolist()))
+        dcg = sum(gains.get(int(i), 0.0) * d for i, d in zip(f[:k], discounts))
+        ideal = float(np.clip(s, 0, None) @ discounts)
+        values.append(dcg / ideal if ideal else 0.0)
+    return float(np.mean(values))
+
+
+def corpus_vectors(index, index_path: Path, vectors_path: Path = None) -> np.ndarray:
+    """All indexed vectors: a saved .npy, the index's sidecar, or reconstructed."""
+    if vectors_path is not None:
+        return np.load(vectors_path, mmap_mode='r')
+    sidecar = load_sidecar(index_path)
+    if sidecar is not None:
+        return sidecar[1]
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and isinstance(faiss.downcast_index(ivf), faiss.IndexIVFPQ):
+        raise SystemExit('IVF-PQ vectors are lossy; pass the raw vectors with --vectors')
+    return extract_vectors(index)
+
+
+def corpus_fingerprint(metadata: dict, index_path: Path, vectors_path: Path = None) -> dict:
+    """What identifies the indexed corpus beyond its size: build stamp and file identities."""
+    def file_id(path):
+        path = Path(path)
+        if not path.exists():
+            return None
+        stat = path.stat()
+        return [str(path), stat.st_size, stat.st_mtime_ns]
+
+    sidecar_vectors, sidecar_ids = sidecar_paths(index_path)
+    ids_hash = None
+    if sidecar_ids.exists():
+        ids_hash = hashlib.sha256(sidecar_ids.read_bytes()).hexdigest()
+    return {
+        'created': metadata.get('created'),
+        'index': file_id(index_path),
+        'vectors': file_id(vectors_path or sidecar_vectors),
+        'sidecar_ids': ids_hash,
+    }
+
+
+def ground_truth(path: Path, index, index_path: Path, query_vecs: np.ndarray, k: int, key: str,
+                 vectors_path: Path = None):
+    """(ids, scores) of the exact top-k for each query, cached in path."""
+    if path is not None and Path(path).exists():
+        saved = np.load(path)
+        if str(saved['key']) == key and saved['ids'].shape[1] >= k:
+            return saved['ids'][:, :k], saved['scores'][:, :k]
+        print('  Saved ground truth is for other queries, encoder or corpus; recomputing')
+    print(f'  Computing exact top-{k} over {index.ntotal:,} vectors...')
+    vectors = corpus_vectors(index, index_path, vectors_path)
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    scores, ids = exact.search(query_vecs, k)
+    if path is not None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, ids=ids, scores=scores, key=key)
+    return ids, scores
+
+
+def knob_name(index):
+    if faiss.try_extract_index_ivf(index) is not None:
+        return 'nprobe'
+    if hasattr(index, 'hnsw'):
+        return 'efSearch'
+    return None
+
+
+def bench_config(index, name: str, value, query_vecs, truth, truth_scores, store, args) -> dict:
+    """Search each query alone (serving-style), then score and time the rerank."""
+    setting = {}
+    param = knob_name(index)
+    if param == 'nprobe':
+        setting = {'nprobe': value}
+    elif param == 'efSearch':
+        setting = {'ef_search': value}
+    params = search_params(index, **setting)
+
+    search_ms, rerank_ms, found = [], [], []
+    for vec in query_vecs:
+        start = time.perf_counter()
+        D, I = index.search(vec[None, :], args.fetch, params=params)
+        search_ms.append((time.perf_counter() - start) * 1000)
+        found.append(I[0, :args.k])
+        if store is not None:
+            start = time.perf_counter()
+            rerank(store, I[0], D[0], args.limit)
+            rerank_ms.append((time.perf_counter() - start) * 1000)
+    found = np.array(found)
+
+    result = {
+        'index': name,
+        'param': param,
+        'value': value,
+        f'recall@{args.k}': round(recall_at_k(found, truth), 4),
+        f'ndcg@{args.k}': round(ndcg_at_k(found, truth, truth_scores), 4),
+        'search_ms': percentiles(search_ms),
+    }
+    if rerank_ms:
+        result['rerank_ms'] = percentiles(rerank_ms)
+    return result
+
+
+def bench_throughput(encoder, index, store, queries, concurrency: int, args) -> dict:
+    """Encode + search + rerank per request on concurrency threads."""
+    params = search_params(index, **args.setting)
+
+    def request(query):
+        start = time.perf_counter()
+        vec = encoder.encode([query], convert_to_numpy=True).astype('float32')
+        faiss.normalize_L2(vec)
+        D, I = index.search(vec, args.fetch, params=params)
+        if store is not None:
+            rerank(store, I[0], D[0], args.limit)
+        return (time.perf_counter() - start) * 1000
+
+    load = [queries[i % len(queries)] for i in range(max(args.requests, concurrency))]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(request, load))
+        elapsed = time.perf_counter() - start
+    return {'concurrency': concurrency, 'requests': len(load),
+            'qps': round(len(load) / elapsed, 1), 'latency_ms': percentiles(latencies)}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def bench_recall(args):
+    index_dir = Path(args.index_dir)
+    with open(index_dir / 'metadata.json', 'r') as f:
+        metadata = json.load(f)
+    args.setting = search_setting(metadata)
+    index_paths = [index_dir / INDEX_FILE] + list(args.index or [])
+    store = ResearcherStore(index_dir / 'researcher_store') if is_store(index_dir / 'researcher_store') else None
+    queries = load_queries(args.queries)
+    print(f'{len(queries)} queries, encoder {args.encoder}, recall@{args.k}, fetch {args.fetch}')
+
+    start = time.perf_counter()
+    encoder = load_encoder(args.encoder, args.model, args.onnx_dir)
+    load_s = time.perf_counter() - start
+
+    # Encode one query at a time, as /search does on a cache miss
+    encode_ms, vecs = [], []
+    for query in queries:
+        start = time.perf_counter()
+        vecs.append(encoder.encode([query], convert_to_numpy=True)[0])
+        encode_ms.append((time.perf_counter() - start) * 1000)
+    query_vecs = np.ascontiguousarray(vecs, dtype=np.float32)
+    faiss.normalize_L2(query_vecs)
+    print(f"Encode: {percentiles(encode_ms)} ms (model load {load_s:.2f} s)")
+
+    main_index = faiss.read_index(str(index_paths[0]))
+    apply_search_setting(main_index, args.setting)
+    corpus = corpus_fingerprint(metadata, index_paths[0], args.vectors)
+    key = hashlib.sha256(json.dumps([queries, args.encoder, args.model, main_index.ntotal,
+                                     corpus]).encode()).hexdigest()
+    truth, truth_scores = ground_truth(args.ground_truth, main_index, index_paths[0], query_vecs,
+                                       args.k, key, args.vectors)
+
+    configs = []
+    for path in index_paths:
+        index = main_index if path == index_paths[0] else faiss.read_index(str(path))
+        if index.ntotal != main_index.ntotal:
+            raise SystemExit(f'{path} has {index.ntotal:,} vectors, ground truth has {main_index.ntotal:,}')
+        param = knob_name(index)
+        if param is None:
+            values = [None]
+        elif args.sweep:
+            values = args.sweep
+        elif param == 'nprobe':
+            values = [faiss.try_extract_index_ivf(index).nprobe]
+        else:
+            values = [index.hnsw.efSearch]
+        for value in values:
+            result = bench_config(index, path.name, value, query_vecs, truth, truth_scores, store, args)
+            configs.append(result)
+            print(f"  {path.name} {param or 'exact'}={value if value is not None else '-'}: "
+                  f"recall@{args.k} {result[f'recall@{args.k}']:.4f} "
+                  f"nDCG@{args.k} {result[f'ndcg@{args.k}']:.4f} | "
+                  f"search p50 {result['search_ms']['p50']:.3f} p99 {result['search_ms']['p99']:.3f} ms"
+                  + (f" | rerank p50 {result['rerank_ms']['p50']:.3f} ms" if 'rerank_ms' in result else ''))
+
+    print('Throughput (served setting):')
+    throughput = []
+    for concurrency in args.concurrency:
+        result = bench_throughput(encoder, main_index, store, queries, concurrency, args)
+        throughput.append(result)
+        print(f"  concurrency {concurrency:>3}: {result['qps']:8.1f} queries/s | "
+              f"p50 {result['latency_ms']['p50']:.2f} p99 {result['latency_ms']['p99']:.2f} ms")
+
+    results = {
+        'run': {
+            'created': datetime.now().isoformat(),
+            'commit': git_commit(),
+            'host': platform.node(),
+            'cpus': os.cpu_count(),
+            'faiss': faiss.__version__,
+            'index_dir': str(index_dir),
+            'index_metadata': {name: value for name, value in metadata.items() if name != 'search'},
+            'served_setting': args.setting,
+            'encoder': args.encoder,
+            'model': args.model,
+            'queries': len(queries),
+            'k': args.k,
+            'fetch': args.fetch,
+            'limit': args.limit,
+        },
+        'encode': {'load_s': round(load_s, 3), 'latency_ms': percentiles(encode_ms)},
+        'configs': configs,
+        'throughput': throughput,
+    }
+    out = args.out or RESULTS_DIR / f"search_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Saved {out}')
+
+
+def compare_results(args):
+    """Print metric changes from a baseline results file to a newer one."""
+    with open(args.baseline) as f:
+        old = json.load(f)
+    with open(args.current) as f:
+        new = json.load(f)
+    print(f"{args.baseline} ({old['run']['commit']}) -> {args.current} ({new['run']['commit']})")
+
+    def delta(a, b, unit=''):
+        change = f' ({(b - a) / a * 100:+.1f}%)' if a else ''
+        return f'{a}{unit} -> {b}{unit}{change}'
+
+    print(f"encode p50: {delta(old['encode']['latency_ms']['p50'], new['encode']['latency_ms']['p50'], ' ms')}")
+    old_configs = {(c['index'], c['param'], c['value']): c for c in old['configs']}
+    for c in new['configs']:
+        before = old_configs.get((c['index'], c['param'], c['value']))
+        if before is None:
+            continue
+        print(f"{c['index']} {c['param'] or 'exact'}={c['value']}:")
+        for metric in c:
+            if metric.startswith(('recall@', 'ndcg@')) and metric in before:
+                print(f'  {metric}: {delta(before[metric], c[metric])}')
+        for metric in ('search_ms', 'rerank_ms'):
+            if metric in c and metric in before:
+                print(f"  {metric} p50: {delta(before[metric]['p50'], c[metric]['p50'])}"
+                      f" | p99: {delta(before[metric]['p99'], c[metric]['p99'])}")
+    old_tp = {t['concurrency']: t for t in old['throughput']}
+    for t in new['throughput']:
+        if t['concurrency'] in old_tp:
+            print(f"throughput x{t['concurrency']}: {delta(old_tp[t['concurrency']]['qps'], t['qps'], ' q/s')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IRIS search micro-benchmarks')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('rerank', help='Vectorized rerank vs the legacy per-hit loop')
+    p.add_argument('--rows', type=int, default=208000)
+    p.add_argument('--candidates', type=int, default=500)
+    p.add_argument('--limit', type=int, default=50)
+    p.add_argument('--repeat', type=int, default=200)
+    p.set_defaults(func=bench_rerank)
+
+    p = sub.add_parser('top', help='/top ranked views vs the legacy full scan')
+    p.add_argument('--rows', type=int, nargs='+', default=[208000, 2000000])
+    p.add_argument('--limit', type=int, default=50)
+    p.add_argument('--repeat', type=int, default=200)
+    p.add_argument('--legacy-max-rows', type=int, default=500000,
+                   help='Skip the legacy scan above this size')
+    p.set_defaults(func=bench_top)
+
+    p = sub.add_parser('encoder', help='ONNX encoder parity and latency vs torch')
+    p.add_argument('--model', default=DEFAULT_MODEL)
+    p.add_argument('--onnx-dir', type=Path, required=True)
+    p.add_argument('--backends', nargs='+', default=['onnx', 'onnx-int8'])
+    p.add_argument('--corpus', type=int, default=10000, help='Synthetic researcher texts to search')
+    p.add_argument('--k', type=int, default=20)
+    p.add_argument('--batch', type=int, default=32)
+    p.add_argument('--threads', type=int, default=0)
+    p.add_argument('--repeat', type=int, default=100)
+    p.set_defaults(func=bench_encoder)
+
+    p = sub.add_parser('serialize', help='Pre-encoded JSON fragments vs per-result model encoding')
+    p.add_argument('--rows', type=int, default=208000)
+    p.add_argument('--candidates', type=int, default=500)
+    p.add_argument('--limit', type=int, default=100)
+    p.add_argument('--top', type=int, default=500)
+    p.add_argument('--encode-ann-ms', type=float, default=0.0,
+                   help='Encode + ANN time per query, to report the share of a whole request')
+    p.add_argument('--repeat', type=int, default=200)
+    p.set_defaults(func=bench_serialize)
+
+    p = sub.add_parser('recall', help='Recall and latency of an index directory, saved as JSON')
+    p.add_argument('--index-dir', type=Path, required=True,
+                   help='Directory with southeast_researchers.index, metadata.json, researcher_store')
+    p.add_argument('--index', type=Path, nargs='*', help='Extra index files over the same vectors')
+    p.add_argument('--queries', type=Path, help='Query set (lines or JSON list); default built-in set')
+    p.add_argument('--ground-truth', type=Path, help='Exact top-k cache (.npz), created if missing')
+    p.add_argument('--vectors', type=Path, help='Corpus vectors (.npy) for the exact search (default: the index sidecar)')
+    p.add_argument('--sweep', type=int, nargs='*', help='nprobe / efSearch values to evaluate')
+    p.add_argument('--encoder', choices=ENCODER_BACKENDS, default='torch')
+    p.add_argument('--model', default=DEFAULT_MODEL)
+    p.add_argument('--onnx-dir', type=Path)
+    p.add_argument('--k', type=int, default=20)
+    p.add_argument('--fetch', type=int, default=200, help='ANN candidates per query (search_api: limit * 10)')
+    p.add_argument('--limit', type=int, default=20, help='Results kept after rerank')
+    p.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    p.add_argument('--requests', type=int, default=200, help='Requests per throughput level')
+    p.add_argument('--out', type=Path, help=f'Results file (default {RESULTS_DIR}/search_<time>.json)')
+    p.set_defaults(func=bench_recall)
+
+    p = sub.add_parser('compare', help='Compare two saved result files')
+    p.add_argument('baseline', type=Path)
+    p.add_argument('current', type=Path)
+    p.set_defaults(func=compare_results)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
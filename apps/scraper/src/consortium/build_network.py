@@ -5,6 +5,7 @@ Fetches co-authorship data from OpenAlex and builds network graph
 """
 import json
 import asyncio
+import heapq
 import aiohttp
 from pathlib import Path
 from collections import defaultdict
@@ -19,6 +20,8 @@ except ImportError:
     subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'networkx', '--break-system-packages', '-q'])
     import networkx as nx
 
+from researcher_stream import iter_researchers
+
 INPUT_FILE = Path(r'C:\dev\research\project-iris\apps\scraper\src\consortium\data\consortium\southeast_r1r2_20260114_041911.json')
 OUTPUT_DIR = Path(r'C:\dev\research\project-iris\apps\scraper\src\consortium\data\consortium\network')
 
@@ -188,18 +191,20 @@ async def main():
     print('=' * 70)
     print(f'Started: {datetime.now().isoformat()}')
     
-    # Load researchers
+    # Stream researchers; only the top MAX_RESEARCHERS high-impact ones are kept
     print('\nLoading researchers...')
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    all_researchers = data.get('researchers', [])
-    print(f'Total: {len(all_researchers):,} researchers')
-    
-    # Filter to high-impact
-    high_impact = [r for r in all_researchers if r.get('h_index', 0) >= MIN_H_INDEX and r.get('openalex_id')]
-    high_impact.sort(key=lambda x: -x.get('h_index', 0))
-    high_impact = high_impact[:MAX_RESEARCHERS]
+    total = 0
+    
+    def candidates():
+        nonlocal total
+        for r in iter_researchers(INPUT_FILE):
+            total += 1
+            if r.get('h_index', 0) >= MIN_H_INDEX and r.get('openalex_id'):
+                yield r
+    
+    # Same result as a stable sort by h-index descending, then [:MAX_RESEARCHERS]
+    high_impact = heapq.nsmallest(MAX_RESEARCHERS, candidates(), key=lambda x: -x.get('h_index', 0))
+    print(f'Total: {total:,} researchers')
     
     print(f'High-impact (h>={MIN_H_INDEX}): {len(high_impact)} researchers')
     
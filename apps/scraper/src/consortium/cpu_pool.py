@@ -0,0 +1,71 @@
+"""
+IRIS CPU POOL
+=============
+Bounded thread pool for CPU-bound request work in the search API
+
+Model inference, FAISS search and column scans run here instead of on
+the event loop (torch, FAISS and numpy release the GIL for the heavy
+parts). At most max_workers jobs run at once; a job that cannot start
+within queue_timeout seconds fails with PoolBusy so the API can answer
+503 instead of piling up work.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PoolBusy(Exception):
+    """Raised when a job waited longer than the queue timeout for a worker."""
+
+
+class CPUPool:
+    def __init__(self, max_workers: int = 4, queue_timeout: float = 10.0):
+        self.max_workers = max_workers
+        self.queue_timeout = queue_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='iris-cpu')
+        self._slots = None
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool and await its result."""
+        if self._slots is None:
+            # Created lazily so it binds to the serving event loop
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise PoolBusy(f'no CPU worker free within {self.queue_timeout:g}s')
+        finally:
+            self.waiting -= 1
+        self.wait_seconds += time.perf_counter() - start
+
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._slots.release()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            'max_workers': self.max_workers,
+            'queue_timeout_s': self.queue_timeout,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'avg_wait_ms': round(self.wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+        }
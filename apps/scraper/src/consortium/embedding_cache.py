@@ -0,0 +1,183 @@
+"""
+IRIS EMBEDDING CACHE
+====================
+Persistent content-hash cache of corpus embeddings for the index builders
+
+Each vector is keyed by sha1(model key + search text), so a rebuild after
+an OpenAlex refresh encodes only researchers whose text changed (or is
+new) and reuses every other vector. The model key names the encoder and
+backend (e.g. "all-MiniLM-L6-v2:onnx-int8"); vectors from different
+backends never mix.
+
+Saved as a directory next to the index, append-only:
+    vectors.f32    raw float32 rows (dim columns), encoder output before normalization
+    keys.bin       20-byte sha1 digests, one per row, in the same order
+    meta.json      version and dimension
+
+Vectors are appended (and flushed) before their keys, so a crash mid-run
+leaves at most some unkeyed rows, which are dropped on the next open.
+Stale entries are never rewritten; compact() keeps only what a build used.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+EMBEDDING_CACHE_VERSION = 1
+KEY_BYTES = 20
+
+
+def text_key(model_key: str, text: str) -> bytes:
+    return hashlib.sha1(f'{model_key}\0{text}'.encode('utf-8')).digest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: Path, dim: int):
+        self.path = Path(path)
+        self.dim = dim
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.path / 'vectors.f32'
+        self.keys_path = self.path / 'keys.bin'
+
+        meta_path = self.path / 'meta.json'
+        if meta_path.exists():
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get('version') != EMBEDDING_CACHE_VERSION or meta.get('dim') != dim:
+                print(f'  Embedding cache {self.path} is for dim {meta.get("dim")}, starting over')
+                self._reset()
+        else:
+            self._reset()
+        with open(meta_path, 'w') as f:
+            json.dump({'version': EMBEDDING_CACHE_VERSION, 'dim': dim}, f)
+
+        self.vectors_path.touch()
+        self.keys_path.touch()
+        row_bytes = dim * 4
+        count = min(self.vectors_path.stat().st_size // row_bytes,
+                    self.keys_path.stat().st_size // KEY_BYTES)
+        # Drop a partial tail left by an interrupted append
+        os.truncate(self.vectors_path, count * row_bytes)
+        os.truncate(self.keys_path, count * KEY_BYTES)
+
+        keys = self.keys_path.read_bytes()
+        self.rows = {keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i for i in range(count)}
+        self.count = count
+        self.hits = 0
+        self.misses = 0
+
+    def _reset(self):
+        for p in (self.vectors_path, self.keys_path):
+            if p.exists():
+                p.unlink()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def lookup(self, keys: list) -> np.ndarray:
+        """Cache row per key, -1 for misses."""
+        return np.fromiter((self.rows.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+    def vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Copy of the cached rows (float32, len(rows) x dim)."""
+        if not self.count:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        mm = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(self.count, self.dim))
+        return np.array(mm[rows])
+
+    def append(self, keys: list, vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        new = [(k, i) for i, k in enumerate(keys) if k not in self.rows]
+        if not new:
+            return
+        with open(self.vectors_path, 'ab') as f:
+            f.write(vectors[[i for _, i in new]].tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.keys_path, 'ab') as f:
+            f.write(b''.join(k for k, _ in new))
+        for k, _ in new:
+            self.rows[k] = self.count
+            self.count += 1
+
+    def compact(self, keep: list):
+        """Rewrite the cache with only the keys in keep (e.g. this build's texts)."""
+        keep = list(dict.fromkeys(k for k in keep if k in self.rows))
+        rows = np.array([self.rows[k] for k in keep], dtype=np.int64)
+        vectors = self.vectors(rows)
+        tmp_dir = self.path.with_name(self.path.name + '.tmp')
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+        (tmp_dir / 'vectors.f32').write_bytes(vectors.tobytes())
+        (tmp_dir / 'keys.bin').write_bytes(b''.join(keep))
+        shutil.copy(self.path / 'meta.json', tmp_dir / 'meta.json')
+        shutil.rmtree(self.path)
+        tmp_dir.rename(self.path)
+        self.rows = {k: i for i, k in enumerate(keep)}
+        self.count = len(keep)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': self.count,
+            'mb': round(self.count * (self.dim * 4 + KEY_BYTES) / 1e6, 1),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def encode_cached(model, texts: list, model_key: str, cache: EmbeddingCache = None,
+                  batch_size: int = 512) -> np.ndarray:
+    """Encode texts (float32, input order), reusing cached vectors.
+
+    Only distinct texts missing from the cache go to model.encode; each
+    encoded batch is appended at once, so an interrupted build keeps its
+    progress. Without a cache every text is encoded.
+    """
+    dim = model.get_sentence_embedding_dimension()
+    out = np.empty((len(texts), dim), dtype=np.float32)
+    keys = None
+    duplicates = []
+    if cache is None:
+        missing = list(range(len(texts)))
+    else:
+        keys = [text_key(model_key, t) for t in texts]
+        rows = cache.lookup(keys)
+        hit = rows >= 0
+        out[hit] = cache.vectors(rows[hit])
+        # Encode each missing text once; repeats are copied afterwards
+        first = {}
+        for i in np.flatnonzero(~hit).tolist():
+            if keys[i] in first:
+                duplicates.append((i, first[keys[i]]))
+            else:
+                first[keys[i]] = i
+        missing = list(first.values())
+        cache.hits += int(hit.sum())
+        cache.misses += len(missing)
+        print(f'  Embedding cache: {int(hit.sum()):,} cached, {len(missing):,} to encode')
+
+    started = time.time()
+    total_batches = (len(missing) + batch_size - 1) // batch_size
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        embeddings = model.encode([texts[i] for i in batch], show_progress_bar=False,
+                                  convert_to_numpy=True)
+        out[batch] = embeddings
+        if cache is not None:
+            cache.append([keys[i] for i in batch], embeddings)
+        batch_num = start // batch_size + 1
+        if batch_num % 50 == 0 or batch_num == total_batches:
+            done = start + len(batch)
+            print(f'  Batch {batch_num}/{total_batches} ({done:,}/{len(missing):,}, '
+                  f'{done / max(time.time() - started, 1e-9):,.0f} texts/s)')
+
+    for i, source in duplicates:
+        out[i] = out[source]
+    return out
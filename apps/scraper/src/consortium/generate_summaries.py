@@ -3,44 +3,59 @@ GENERATE INSTITUTION SUMMARIES
 ==============================
 Create per-institution analytics from the mega scrape
 """
+import heapq
 import json
 from collections import defaultdict
 from datetime import datetime
 
-# Load mega data
-with open('data/consortium/southeast_r1r2_20260114_040556.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
+from researcher_stream import iter_researchers
 
-researchers = data['researchers']
-print(f"Total researchers: {len(researchers):,}")
+TOP_N = 20
 
-# Group by institution
-by_inst = defaultdict(list)
-for r in researchers:
-    by_inst[r['institution']].append(r)
+
+def top_by_h(researchers: list) -> list:
+    """First TOP_N of a stable sort by h_index descending."""
+    return heapq.nsmallest(TOP_N, researchers, key=lambda x: -x['h_index'])
+
+
+# Stream the mega data, aggregating per institution as records arrive
+by_inst = {}
+total_researchers = 0
+for r in iter_researchers('data/consortium/southeast_r1r2_20260114_040556.json'):
+    total_researchers += 1
+    agg = by_inst.get(r['institution'])
+    if agg is None:
+        agg = by_inst[r['institution']] = {'count': 0, 'citations': 0, 'h_sum': 0,
+                                           'fields': defaultdict(int), 'top': []}
+    agg['count'] += 1
+    agg['citations'] += r['citations']
+    agg['h_sum'] += r['h_index']
+    if r.get('field'):
+        agg['fields'][r['field']] += 1
+    agg['top'].append(r)
+    if len(agg['top']) >= 10 * TOP_N:
+        agg['top'] = top_by_h(agg['top'])
+
+print(f"Total researchers: {total_researchers:,}")
 
 # Generate summaries
 summaries = []
-for inst, members in sorted(by_inst.items(), key=lambda x: -len(x[1])):
-    if len(members) < 10:
+for inst, agg in sorted(by_inst.items(), key=lambda x: -x[1]['count']):
+    if agg['count'] < 10:
         continue
     
-    citations = sum(r['citations'] for r in members)
-    avg_h = sum(r['h_index'] for r in members) / len(members)
+    citations = agg['citations']
+    avg_h = agg['h_sum'] / agg['count']
     
     # Top 20 by h-index
-    top20 = sorted(members, key=lambda x: -x['h_index'])[:20]
+    top20 = top_by_h(agg['top'])
     
     # Top fields
-    fields = defaultdict(int)
-    for r in members:
-        if r.get('field'):
-            fields[r['field']] += 1
-    top_fields = sorted(fields.items(), key=lambda x: -x[1])[:10]
+    top_fields = sorted(agg['fields'].items(), key=lambda x: -x[1])[:10]
     
     summary = {
         'institution': inst,
-        'total_researchers': len(members),
+        'total_researchers': agg['count'],
         'total_citations': citations,
         'avg_hindex': round(avg_h, 2),
         'top_fields': [{'field': f, 'count': c} for f, c in top_fields],
@@ -51,14 +66,14 @@ for inst, members in sorted(by_inst.items(), key=lambda x: -len(x[1])):
     }
     summaries.append(summary)
     
-    print(f"{inst[:40]:<40} | {len(members):>6,} | {citations:>12,} | avg h={avg_h:.1f}")
+    print(f"{inst[:40]:<40} | {agg['count']:>6,} | {citations:>12,} | avg h={avg_h:.1f}")
 
 # Save summaries
 output = {
     'timestamp': datetime.utcnow().isoformat() + 'Z',
     'source': 'southeast_r1r2_20260114_040556.json',
     'total_institutions': len(summaries),
-    'total_researchers': len(researchers),
+    'total_researchers': total_researchers,
     'summaries': summaries
 }
 
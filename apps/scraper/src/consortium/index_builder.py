@@ -0,0 +1,193 @@
+"""
+IRIS ANN INDEX BUILDER
+======================
+Builds the FAISS researcher index and tunes its search setting
+
+Index types (all inner product over L2-normalized vectors, i.e. cosine):
+    ivfflat   IndexIVFFlat, nlist = min(1000, n // 100) by default
+    ivfpq     IndexIVFPQ, same nlist, 8-bit codes of pq_m sub-vectors
+    hnsw      IndexHNSWFlat graph
+    flat      IndexFlatIP, exact (no tuning)
+
+After building, tune() sweeps nprobe (IVF) or efSearch (HNSW) against
+exact ground truth from a flat index and keeps the cheapest value whose
+recall@k meets the target. The result goes into metadata.json under
+"search", where search_api picks it up.
+"""
+import time
+
+import numpy as np
+import faiss
+
+INDEX_TYPES = ['ivfflat', 'ivfpq', 'hnsw', 'flat']
+DEFAULT_NPROBE = 50  # for indexes built before tuning was recorded
+NPROBE_CANDIDATES = [1, 2, 4, 8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512, 768, 1024]
+EF_SEARCH_CANDIDATES = [16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512, 768, 1024]
+# Stop sweeping once PLATEAU_STEPS more candidates gained less than PLATEAU_GAIN recall
+PLATEAU_STEPS = 3
+PLATEAU_GAIN = 0.001
+
+
+def default_nlist(n: int) -> int:
+    return max(1, min(1000, n // 100))
+
+
+def default_pq_m(dim: int) -> int:
+    """Largest sub-quantizer count dividing dim with at least 8 dims per sub-vector."""
+    for m in range(dim // 8, 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def create_index(dim: int, n: int, index_type: str = 'ivfflat', nlist: int = None,
+                 pq_m: int = None, hnsw_m: int = 32, ef_construction: int = 200):
+    """An empty (untrained) index of index_type sized for n vectors."""
+    if index_type in ('ivfflat', 'ivfpq'):
+        nlist = nlist or default_nlist(n)
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == 'ivfflat':
+            return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m or default_pq_m(dim), 8,
+                                faiss.METRIC_INNER_PRODUCT)
+    if index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+        return index
+    if index_type == 'flat':
+        return faiss.IndexFlatIP(dim)
+    raise ValueError(f'Unknown index type {index_type!r} (choose from {INDEX_TYPES})')
+
+
+def train_index(index, vectors: np.ndarray):
+    """Train IVF coarse quantizers (and PQ codebooks); other types need no training."""
+    if not index.is_trained:
+        ivf = faiss.try_extract_index_ivf(index)
+        print(f'  Training with {ivf.nlist} clusters...')
+        index.train(vectors)
+
+
+def build_index(vectors: np.ndarray, index_type: str = 'ivfflat', nlist: int = None,
+                pq_m: int = None, hnsw_m: int = 32, ef_construction: int = 200):
+    """Train (if needed) and fill an index of index_type with normalized vectors."""
+    n, dim = vectors.shape
+    index = create_index(dim, n, index_type, nlist, pq_m, hnsw_m, ef_construction)
+    train_index(index, vectors)
+    print('  Adding vectors...')
+    index.add(vectors)
+    return index
+
+
+def index_params(index, index_type: str) -> dict:
+    """Build parameters worth recording in metadata.json."""
+    params = {'index_type': index_type}
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        params['nlist'] = ivf.nlist
+    if index_type == 'ivfpq':
+        params['pq_m'] = faiss.downcast_index(ivf).pq.M
+    if index_type == 'hnsw':
+        params['hnsw_m'] = index.hnsw.nb_neighbors(1)
+        params['ef_construction'] = index.hnsw.efConstruction
+    return params
+
+
+def _knob(index):
+    """(metadata name, candidate values, setter) for the index's search-time knob."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        candidates = [v for v in NPROBE_CANDIDATES if v < ivf.nlist] + [ivf.nlist]
+
+        def set_nprobe(value):
+            ivf.nprobe = value
+        return 'nprobe', candidates, set_nprobe
+    if hasattr(index, 'hnsw'):
+        def set_ef(value):
+            index.hnsw.efSearch = value
+        return 'efSearch', EF_SEARCH_CANDIDATES, set_ef
+    return None, [], None
+
+
+def sample_queries(vectors: np.ndarray, n: int, noise: float = 0.05, seed: int = 0) -> np.ndarray:
+    """Tuning queries: random corpus vectors, jittered so they don't match themselves exactly."""
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), size=min(n, len(vectors)), replace=False)
+    queries = vectors[np.sort(picks)] + rng.normal(0, noise, (len(picks), vectors.shape[1]))
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Mean fraction of each query's true top-k that the index returned."""
+    k = truth.shape[1]
+    return float(np.mean([len(set(f[f >= 0]) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def tune(index, vectors: np.ndarray, k: int = 20, target_recall: float = 0.95,
+         queries: np.ndarray = None, n_queries: int = 1000) -> dict:
+    """Sweep the index's search knob and pick the cheapest value meeting target_recall.
+
+    Returns the "search" block for metadata.json. If recall plateaus below
+    the target (PQ codes cap it), the sweep stops early, the cheapest value
+    on the plateau is chosen and "met_target" is false.
+    """
+    name, candidates, set_value = _knob(index)
+    if queries is None:
+        queries = sample_queries(vectors, n_queries)
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    result = {'param': name, 'value': None, 'k': k, 'target_recall': target_recall,
+              'queries': len(queries), 'sweep': []}
+    if name is None:
+        _, found = index.search(queries, k)
+        result.update(recall=round(recall_at_k(found, truth), 4), met_target=True)
+        return result
+
+    for value in candidates:
+        set_value(value)
+        start = time.perf_counter()
+        _, found = index.search(queries, k)
+        ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = recall_at_k(found, truth)
+        result['sweep'].append({'value': value, 'recall': round(recall, 4),
+                                'ms_per_query': round(ms, 4)})
+        print(f'  {name}={value:<5} recall@{k} {recall:.4f}  {ms:.3f} ms/query')
+        if recall >= target_recall:
+            break
+        recent = [point['recall'] for point in result['sweep'][-PLATEAU_STEPS - 1:]]
+        if len(recent) > PLATEAU_STEPS and recent[-1] - recent[0] < PLATEAU_GAIN:
+            print(f'  recall plateaued below {target_recall}')
+            break
+
+    best = max(point['recall'] for point in result['sweep'])
+    chosen = next(point for point in result['sweep']
+                  if point['recall'] >= min(target_recall, best - PLATEAU_GAIN))
+    set_value(chosen['value'])
+    result.update(value=chosen['value'], recall=chosen['recall'],
+                  met_target=chosen['recall'] >= target_recall)
+    return result
+
+
+def search_setting(metadata: dict) -> dict:
+    """search_params() keyword arguments for the tuned setting in metadata.json."""
+    search = (metadata or {}).get('search') or {}
+    if search.get('param') == 'efSearch':
+        return {'ef_search': search['value']}
+    if search.get('param') == 'nprobe':
+        return {'nprobe': search['value']}
+    if search:  # flat: exact, nothing to set
+        return {}
+    return {'nprobe': DEFAULT_NPROBE}
+
+
+def apply_search_setting(index, setting: dict):
+    """Set the tuned value on the index itself (for unparameterized index.search)."""
+    if 'nprobe' in setting:
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = setting['nprobe']
+    if 'ef_search' in setting and hasattr(index, 'hnsw'):
+        index.hnsw.efSearch = setting['ef_search']
@@ -0,0 +1,531 @@
+"""
+IRIS INDEX PIPELINE
+===================
+One resumable build of the researcher vector index, in checkpointed stages
+
+    load      stream the researcher dump into records.ndjson (a snapshot)
+    text      search text per researcher -> texts.ndjson, rows.npy (kept records)
+    embed     normalized vectors -> embeddings.npy, checkpointed every EMBED_CHUNK rows
+    train     empty index, IVF quantizer trained -> trained.index
+    add       vectors added, search setting tuned -> populated.index, index.json
+    write     index, vector sidecar and profile outputs into the output directory,
+              metadata.json last (see vector_sidecar.py)
+    verify    reload the written index, check counts and run test searches
+
+Checkpoints live in <output dir>/pipeline. pipeline.json records a key per
+finished stage: a hash of the stage's settings chained with the previous
+stage's key, so changing the input, model or index type re-runs exactly
+the stages it affects. A re-run skips finished stages and an interrupted
+embed resumes from its last chunk (on top of the embedding cache).
+
+Profiles are the two historical builders:
+    southeast   vectorize_researchers.py: store, name index, JSON fragments, lookup
+    iris        build_vector_index.py: iris_researchers.index + iris_metadata.json
+
+    python index_pipeline.py build southeast --input dump.ndjson --output-dir vector_index
+    python index_pipeline.py build southeast ... --from-stage train
+    python index_pipeline.py status southeast --output-dir vector_index
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+from embedding_cache import EmbeddingCache, encode_cached, text_key
+from index_builder import create_index, index_params, train_index, tune
+from json_fragments import build_fragments
+from name_index import build_name_index
+from parallel_encoder import ParallelEncoder
+from query_encoder import load_encoder
+from researcher_store import ResearcherStore, build_store
+from researcher_stream import ResearcherWriter, iter_researchers
+from vector_sidecar import load_sidecar, write_sidecar
+
+STAGES = ['load', 'text', 'embed', 'train', 'add', 'write', 'verify']
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+BATCH_SIZE = 512
+# torch (default), onnx or onnx-int8; see query_encoder.py
+ENCODER_BACKEND = os.getenv('ENCODER_BACKEND', 'torch')
+# ANN index: ivfflat (default), ivfpq, hnsw or flat; see index_builder.py
+INDEX_TYPE = os.getenv('INDEX_TYPE', 'ivfflat')
+TARGET_RECALL = float(os.getenv('TARGET_RECALL', '0.95'))  # recall@TUNE_K the search setting must reach
+TUNE_K = 20
+# Encoder processes for the corpus (0 = encode in this process); see parallel_encoder.py
+ENCODE_WORKERS = int(os.getenv('ENCODE_WORKERS', '0'))
+ENCODE_THREADS = int(os.getenv('ENCODE_THREADS', '1'))  # per worker; fixed so vectors don't depend on ENCODE_WORKERS
+EMBED_CHUNK = int(os.getenv('EMBED_CHUNK', '16384'))  # rows per embed checkpoint
+ADD_CHUNK = 65536
+
+TEST_QUERIES = [
+    'brain computer interface neural engineering',
+    'machine learning artificial intelligence',
+    'cancer immunotherapy treatment',
+    'materials science nanotechnology',
+    'climate change environmental science',
+]
+
+
+def southeast_text(researcher: dict) -> str:
+    """Create searchable text from researcher record"""
+    parts = []
+
+    # Name
+    if researcher.get('name'):
+        parts.append(researcher['name'])
+
+    # Institution
+    if researcher.get('institution'):
+        parts.append(researcher['institution'])
+
+    # Field/subfield
+    if researcher.get('field'):
+        parts.append(researcher['field'])
+    if researcher.get('subfield'):
+        parts.append(researcher['subfield'])
+
+    # Metrics as context
+    h = researcher.get('h_index', 0)
+    if h > 50:
+        parts.append('highly cited researcher')
+    if h > 100:
+        parts.append('world leading expert')
+
+    return ' | '.join(parts)
+
+
+def iris_text(r: dict) -> str:
+    """Create searchable text from researcher record"""
+    parts = [
+        r.get('name', ''),
+        r.get('institution', ''),
+        r.get('field', ''),
+        r.get('subfield', ''),
+    ]
+    # Add h-index context
+    h = r.get('h_index', 0)
+    if h > 100:
+        parts.append('highly cited researcher prominent expert')
+    elif h > 50:
+        parts.append('established researcher senior scientist')
+    elif h > 20:
+        parts.append('active researcher')
+
+    return ' '.join(p for p in parts if p)
+
+
+def _write_json_tmp(path: Path, content, **kwargs):
+    with open(str(path) + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(content, f, **kwargs)
+    os.replace(str(path) + '.tmp', path)
+
+
+def write_southeast(build) -> list:
+    """researcher_lookup.json, researcher_store, name_index and json_fragments."""
+    out = build.output_dir
+    # Same bytes json.dump({i: r}, ensure_ascii=False) wrote, without holding the dict
+    lookup_path = out / 'researcher_lookup.json'
+    with open(str(lookup_path) + '.tmp', 'w', encoding='utf-8') as f:
+        f.write('{')
+        for i, r in enumerate(build.kept_records()):
+            f.write(f'{", " if i else ""}"{i}": {json.dumps(r, ensure_ascii=False)}')
+        f.write('}')
+    os.replace(str(lookup_path) + '.tmp', lookup_path)
+
+    store_dir = out / 'researcher_store'
+    build_store(build.kept_records(), store_dir)
+    store = ResearcherStore(store_dir)
+    build_name_index(store, out / 'name_index')
+    build_fragments(store, out / 'json_fragments')
+    return [lookup_path, store_dir, out / 'name_index', out / 'json_fragments']
+
+
+def write_iris(build) -> list:
+    """iris_metadata.json: the fields needed to show a search hit."""
+    metadata = [{
+        'id': i,
+        'name': r.get('name', ''),
+        'institution': r.get('institution', ''),
+        'h_index': r.get('h_index', 0),
+        'citations': r.get('citations', 0),
+        'field': r.get('field', ''),
+        'openalex_id': r.get('openalex_id', ''),
+    } for i, r in enumerate(build.kept_records())]
+    metadata_file = build.output_dir / 'iris_metadata.json'
+    _write_json_tmp(metadata_file, metadata)
+    return [metadata_file]
+
+
+PROFILES = {
+    'southeast': {
+        'index_file': 'southeast_researchers.index',
+        'text': southeast_text,
+        'skip_empty_text': True,
+        'write': write_southeast,
+    },
+    'iris': {
+        'index_file': 'iris_researchers.index',
+        'text': iris_text,
+        'skip_empty_text': False,
+        'write': write_iris,
+    },
+}
+
+
+def _chain(prev_key: str, **settings) -> str:
+    payload = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha1(f'{prev_key}|{payload}'.encode()).hexdigest()[:16]
+
+
+class IndexPipeline:
+    def __init__(self, profile: str, input_file: Path, output_dir: Path,
+                 model_name: str = MODEL_NAME, encoder_backend: str = ENCODER_BACKEND,
+                 index_type: str = INDEX_TYPE):
+        if profile not in PROFILES:
+            raise ValueError(f'Unknown profile {profile!r} (choose from {list(PROFILES)})')
+        self.profile = profile
+        self.spec = PROFILES[profile]
+        self.input_file = Path(input_file)
+        self.output_dir = Path(output_dir)
+        self.work = self.output_dir / 'pipeline'
+        self.model_name = model_name
+        self.encoder_backend = encoder_backend
+        self.index_type = index_type
+        self.embedding_cache_dir = os.getenv('EMBEDDING_CACHE_DIR',
+                                             str(self.output_dir / 'embedding_cache'))
+        self.state_path = self.work / 'pipeline.json'
+        self.state = {}
+        if self.state_path.exists():
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+        self._model = None
+
+    # -- checkpoint bookkeeping --
+
+    def stage_keys(self) -> dict:
+        """Expected key per stage for the current settings and input."""
+        stat = self.input_file.stat() if self.input_file.exists() else None
+        keys = {}
+        keys['load'] = _chain('', input=self.input_file.resolve(),
+                              size=stat and stat.st_size, mtime_ns=stat and stat.st_mtime_ns)
+        keys['text'] = _chain(keys['load'], profile=self.profile)
+        keys['embed'] = _chain(keys['text'], model=self.model_name, backend=self.encoder_backend)
+        keys['train'] = _chain(keys['embed'], index_type=self.index_type)
+        keys['add'] = _chain(keys['train'], target_recall=TARGET_RECALL, k=TUNE_K)
+        keys['write'] = _chain(keys['add'], output_dir=self.output_dir.resolve(),
+                               index_file=self.spec['index_file'])
+        keys['verify'] = _chain(keys['write'])
+        return keys
+
+    def is_done(self, stage: str, key: str) -> bool:
+        return self.state.get(stage, {}).get('key') == key
+
+    def _mark_done(self, stage: str, key: str, seconds: float, **info):
+        self.state[stage] = {'key': key, 'finished': datetime.now().isoformat(),
+                             'seconds': round(seconds, 1), **info}
+        _write_json_tmp(self.state_path, self.state, indent=2)
+
+    def status(self) -> list:
+        keys = self.stage_keys()
+        rows = []
+        upstream_ok = True
+        for stage in STAGES:
+            done = upstream_ok and self.is_done(stage, keys[stage])
+            upstream_ok = done
+            rows.append((stage, 'done' if done else 'pending', self.state.get(stage, {})))
+        return rows
+
+    def run(self, from_stage: str = None):
+        """Run every stage not already done for the current settings.
+
+        from_stage forces that stage (and all after it) to re-run; the
+        stages before it must already be done.
+        """
+        self.work.mkdir(parents=True, exist_ok=True)
+        keys = self.stage_keys()
+        first = STAGES.index(from_stage) if from_stage else len(STAGES)
+        rerun = False
+        for i, stage in enumerate(STAGES):
+            done = self.is_done(stage, keys[stage])
+            if i < first and not rerun and done:
+                print(f'[{stage}] done, skipping')
+                continue
+            if i < first and from_stage:
+                raise RuntimeError(f'Cannot start at {from_stage}: {stage} is not done')
+            # Once a stage runs, everything after it must run too
+            rerun = True
+            if done:
+                # A finished stage that re-runs starts over instead of resuming
+                (self.work / f'{stage}_progress.json').unlink(missing_ok=True)
+            for later in STAGES[i:]:
+                self.state.pop(later, None)
+            _write_json_tmp(self.state_path, self.state, indent=2)
+            print(f'\n[{stage}]')
+            start = time.time()
+            info = getattr(self, f'stage_{stage}')(keys[stage]) or {}
+            self._mark_done(stage, keys[stage], time.time() - start, **info)
+            print(f'[{stage}] {time.time() - start:.1f}s')
+
+    # -- shared helpers --
+
+    def model(self):
+        if self._model is None:
+            print(f'Loading embedding model: {self.model_name} ({self.encoder_backend})')
+            self._model = load_encoder(self.encoder_backend, self.model_name,
+                                       self.output_dir / 'onnx_encoder')
+        return self._model
+
+    def rows(self) -> np.ndarray:
+        return np.load(self.work / 'rows.npy')
+
+    def kept_records(self):
+        """Records with a search text (row-id order), streamed from the snapshot."""
+        rows = self.rows()
+        pos = 0
+        for i, r in enumerate(iter_researchers(self.work / 'records.ndjson')):
+            if pos < len(rows) and rows[pos] == i:
+                pos += 1
+                yield r
+
+    def records_at(self, ids) -> dict:
+        """{row id: record} for a few row ids."""
+        wanted = set(int(i) for i in ids)
+        return {i: r for i, r in enumerate(self.kept_records()) if i in wanted}
+
+    # -- stages --
+
+    def stage_load(self, key: str) -> dict:
+        print(f'Streaming {self.input_file.name} into the pipeline snapshot...')
+        writer = ResearcherWriter(self.work / 'records.ndjson')
+        meta = {}
+        writer.write_all(iter_researchers(self.input_file, meta))
+        writer.close({k: v for k, v in meta.items() if k != 'total_researchers'})
+        print(f'Loaded {writer.count:,} researchers')
+        return {'records': writer.count}
+
+    def stage_text(self, key: str) -> dict:
+        text_fn = self.spec['text']
+        rows = []
+        with open(str(self.work / 'texts.ndjson') + '.tmp', 'w', encoding='utf-8') as f:
+            for i, r in enumerate(iter_researchers(self.work / 'records.ndjson')):
+                text = text_fn(r)
+                if self.spec['skip_empty_text'] and not text.strip():
+                    continue
+                if len(rows) < 3:
+                    print(f'  {len(rows) + 1}. {text[:80]}...')
+                f.write(json.dumps(text, ensure_ascii=False) + '\n')
+                rows.append(i)
+        os.replace(str(self.work / 'texts.ndjson') + '.tmp', self.work / 'texts.ndjson')
+        np.save(self.work / 'rows.npy', np.array(rows, dtype=np.int64))
+        print(f'Valid researchers: {len(rows):,}')
+        return {'texts': len(rows)}
+
+    def stage_embed(self, key: str) -> dict:
+        with open(self.work / 'texts.ndjson', 'r', encoding='utf-8') as f:
+            texts = [json.loads(line) for line in f]
+        dim = self.model().get_sentence_embedding_dimension()
+        out_path = self.work / 'embeddings.npy'
+        progress_path = self.work / 'embed_progress.json'
+
+        done = 0
+        if progress_path.exists() and out_path.exists():
+            with open(progress_path) as f:
+                progress = json.load(f)
+            if progress.get('key') == key:
+                done = progress['done']
+        if done:
+            print(f'Resuming at {done:,}/{len(texts):,}')
+            out = np.load(out_path, mmap_mode='r+')
+        else:
+            out = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float32,
+                                            shape=(len(texts), dim))
+
+        model_key = f'{self.model_name}:{self.encoder_backend}'
+        cache = (EmbeddingCache(self.embedding_cache_dir, dim)
+                 if self.embedding_cache_dir else None)
+        encoder, encode_batch = self.model(), BATCH_SIZE
+        if ENCODE_WORKERS and done < len(texts):
+            encoder = ParallelEncoder(self.encoder_backend, self.model_name,
+                                      self.output_dir / 'onnx_encoder', workers=ENCODE_WORKERS,
+                                      threads=ENCODE_THREADS, scratch_dir=self.work)
+            encode_batch = encoder.batch_size
+            print(f'  {encoder.workers} encoder processes x {encoder.threads} threads')
+        try:
+            for start in range(done, len(texts), EMBED_CHUNK):
+                end = min(start + EMBED_CHUNK, len(texts))
+                vectors = encode_cached(encoder, texts[start:end], model_key, cache, encode_batch)
+                # Normalize for cosine similarity
+                faiss.normalize_L2(vectors)
+                out[start:end] = vectors
+                out.flush()
+                _write_json_tmp(progress_path, {'key': key, 'done': end})
+                print(f'  Embedded {end:,}/{len(texts):,}')
+        finally:
+            if encoder is not self._model:
+                encoder.close()
+        del out
+
+        if cache is not None:
+            print(f'  Embedding cache: {cache.stats()}')
+            if len(cache) > 2 * len(texts):
+                # Mostly stale vectors from earlier pulls; keep only this build's
+                cache.compact([text_key(model_key, t) for t in texts])
+        return {'vectors': len(texts), 'dim': dim}
+
+    def embeddings(self) -> np.ndarray:
+        return np.load(self.work / 'embeddings.npy', mmap_mode='r')
+
+    def stage_train(self, key: str) -> dict:
+        vectors = self.embeddings()
+        index = create_index(vectors.shape[1], len(vectors), self.index_type)
+        train_index(index, np.ascontiguousarray(vectors))
+        faiss.write_index(index, str(self.work / 'trained.index'))
+        return {'index_type': self.index_type}
+
+    def stage_add(self, key: str) -> dict:
+        vectors = self.embeddings()
+        index = faiss.read_index(str(self.work / 'trained.index'))
+        print(f'  Adding {len(vectors):,} vectors...')
+        for start in range(0, len(vectors), ADD_CHUNK):
+            index.add(np.ascontiguousarray(vectors[start:start + ADD_CHUNK]))
+        print(f'  Index size: {index.ntotal:,} vectors')
+
+        # Pick the cheapest nprobe / efSearch that reaches the target recall
+        print(f'\nTuning search setting (recall@{TUNE_K} >= {TARGET_RECALL})...')
+        search = tune(index, np.ascontiguousarray(vectors), TUNE_K, TARGET_RECALL)
+        print(f"  Chosen: {search['param']}={search['value']} (recall {search['recall']})")
+
+        faiss.write_index(index, str(self.work / 'populated.index'))
+        _write_json_tmp(self.work / 'index.json',
+                        {'params': index_params(index, self.index_type), 'search': search},
+                        indent=2)
+        return {'ntotal': index.ntotal, 'recall': search['recall']}
+
+    def stage_write(self, key: str) -> dict:
+        # Every file is written beside its target and renamed over it, so a
+        # running search_api keeps its memory-mapped copy intact. metadata.json
+        # goes last: its change tells search_api (RELOAD_WATCH_S) the set is complete.
+        with open(self.work / 'index.json') as f:
+            built = json.load(f)
+        index_path = self.output_dir / self.spec['index_file']
+        shutil.copyfile(self.work / 'populated.index', str(index_path) + '.tmp')
+        os.replace(str(index_path) + '.tmp', index_path)
+        print(f'Saved index: {index_path}')
+
+        # Raw vectors + id map, so merges and re-indexing never reconstruct from FAISS
+        write_sidecar(index_path, self.work / 'embeddings.npy',
+                      [r.get('openalex_id') for r in self.kept_records()])
+        print(f'Saved vector sidecar next to {index_path.name}')
+
+        for path in self.spec['write'](self):
+            print(f'Saved: {path}')
+
+        vectors = self.embeddings()
+        metadata = {
+            'created': datetime.now().isoformat(),
+            'source': str(self.input_file),
+            'model': self.model_name,
+            'encoder_backend': self.encoder_backend,
+            'embedding_dim': vectors.shape[1],
+            'num_vectors': len(vectors),
+            **built['params'],
+            'search': built['search'],
+        }
+        metadata_path = self.output_dir / 'metadata.json'
+        _write_json_tmp(metadata_path, metadata, indent=2)
+        print(f'Saved metadata: {metadata_path}')
+        return {'index': str(index_path)}
+
+    def stage_verify(self, key: str) -> dict:
+        index_path = self.output_dir / self.spec['index_file']
+        index = faiss.read_index(str(index_path))
+        with open(self.output_dir / 'metadata.json') as f:
+            metadata = json.load(f)
+        vectors = self.embeddings()
+        problems = []
+        if index.ntotal != len(vectors):
+            problems.append(f'index has {index.ntotal:,} vectors, expected {len(vectors):,}')
+        if index.d != vectors.shape[1]:
+            problems.append(f'index dimension {index.d} != {vectors.shape[1]}')
+        if metadata.get('num_vectors') != index.ntotal:
+            problems.append(f"metadata.json says {metadata.get('num_vectors')} vectors")
+        sidecar = load_sidecar(index_path)
+        if sidecar is None or sidecar[1].shape != (index.ntotal, index.d):
+            problems.append('vector sidecar is missing or does not match the index')
+        if problems:
+            raise RuntimeError('Verification failed: ' + '; '.join(problems))
+
+        search = metadata['search']
+        if search.get('param') == 'nprobe':
+            faiss.extract_index_ivf(index).nprobe = search['value']
+        elif search.get('param') == 'efSearch':
+            index.hnsw.efSearch = search['value']
+
+        # Stored vectors should find themselves (duplicates may outrank them)
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(len(vectors), size=min(200, len(vectors)), replace=False))
+        _, found = index.search(np.ascontiguousarray(vectors[sample]), TUNE_K)
+        self_recall = float(np.mean([i in row for i, row in zip(sample, found)]))
+        print(f'  Self-retrieval@{TUNE_K}: {self_recall:.3f} ({len(sample)} stored vectors)')
+
+        print('\n' + '=' * 70)
+        print('TEST SEARCHES')
+        print('=' * 70)
+        model = self.model()
+        hits = []
+        for query in TEST_QUERIES:
+            query_vec = model.encode([query], convert_to_numpy=True).astype('float32')
+            faiss.normalize_L2(query_vec)
+            D, I = index.search(query_vec, 5)
+            hits.append((query, D[0], I[0]))
+        records = self.records_at(i for _, _, ids in hits for i in ids if i >= 0)
+        for query, scores, ids in hits:
+            print(f'\nQuery: "{query}"')
+            for rank, (idx, score) in enumerate(zip(ids, scores), 1):
+                r = records.get(int(idx), {})
+                print(f'  {rank}. {r.get("name", "")[:30]:<30} | h={r.get("h_index", 0):>3} | '
+                      f'{r.get("institution", "")[:20]} | score={score:.3f}')
+
+        print('\n' + '=' * 70)
+        print('INDEX BUILD COMPLETE')
+        print('=' * 70)
+        print(f'Total vectors: {index.ntotal:,}')
+        print(f'Index file: {index_path} ({index_path.stat().st_size / 1024 / 1024:.1f} MB)')
+        return {'self_recall': round(self_recall, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resumable IRIS index build')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('build', help='Run the stages that are not done yet')
+    p.add_argument('profile', choices=list(PROFILES))
+    p.add_argument('--input', type=Path, required=True)
+    p.add_argument('--output-dir', type=Path, required=True)
+    p.add_argument('--from-stage', choices=STAGES,
+                   help='Re-run this stage and everything after it')
+    p.add_argument('--model', default=MODEL_NAME)
+    p = sub.add_parser('status', help='Show which stages are done')
+    p.add_argument('profile', choices=list(PROFILES))
+    p.add_argument('--input', type=Path, required=True)
+    p.add_argument('--output-dir', type=Path, required=True)
+    p.add_argument('--model', default=MODEL_NAME)
+    args = parser.parse_args()
+
+    pipeline = IndexPipeline(args.profile, args.input, args.output_dir, model_name=args.model)
+    if args.command == 'build':
+        pipeline.run(args.from_stage)
+    else:
+        for stage, status, info in pipeline.status():
+            detail = {k: v for k, v in info.items() if k != 'key'}
+            print(f'{stage:<8} {status:<8} {json.dumps(detail) if detail else ""}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+IRIS JSON FRAGMENTS
+===================
+Pre-encoded per-researcher JSON for the search API responses
+
+Responses are assembled by joining these bytes instead of building a
+dict or pydantic model per result and encoding it on every request:
+    record     store.get(idx) as a JSON object (/top, /researcher)
+    summary    the /name fields (name, institution, field, ... orcid)
+
+A /search result is the summary's members with rank and scores around
+them, in SearchResult field order:
+    {"rank":1,"name":...,"orcid":null,"semantic_score":0.52,"weighted_score":0.61}
+
+Saved as a directory next to researcher_store, like the name index:
+    record.bytes, record.offsets.npy      concatenated UTF-8 JSON, int64 (n + 1) offsets
+    summary.bytes, summary.offsets.npy
+    meta.json                             version and the store build id
+"""
+import json
+import mmap
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from researcher_store import replace_dir
+
+FRAGMENTS_VERSION = 2
+KINDS = ['record', 'summary']
+
+
+def dumps(content) -> bytes:
+    """Compact UTF-8 JSON, as JSONResponse renders it."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode()
+
+
+def summary(r: dict) -> dict:
+    """The fields /name returns (and /search adds rank and scores to)."""
+    return {
+        'name': r['name'] or '',
+        'institution': r['institution'] or '',
+        'field': r['field'],
+        'subfield': r['subfield'],
+        'h_index': r['h_index'],
+        'citations': r['citations'],
+        'works_count': r['works_count'],
+        'openalex_id': r['openalex_id'],
+        'orcid': r['orcid'],
+    }
+
+
+def build_fragments(store, out_dir: Path) -> int:
+    """Encode every row of a ResearcherStore and save; returns total bytes."""
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(out_dir.name + '.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    blobs = {kind: bytearray() for kind in KINDS}
+    offsets = {kind: np.zeros(len(store) + 1, dtype=np.int64) for kind in KINDS}
+    for idx in range(len(store)):
+        r = store.get(idx)
+        for kind, content in (('record', r), ('summary', summary(r))):
+            blobs[kind] += dumps(content)
+            offsets[kind][idx + 1] = len(blobs[kind])
+
+    for kind in KINDS:
+        (tmp_dir / f'{kind}.bytes').write_bytes(bytes(blobs[kind]))
+        np.save(tmp_dir / f'{kind}.offsets.npy', offsets[kind])
+    with open(tmp_dir / 'meta.json', 'w') as f:
+        json.dump({'version': FRAGMENTS_VERSION, 'store_build_id': store.build_id,
+                   'count': len(store)}, f)
+
+    replace_dir(tmp_dir, out_dir)
+    return sum(len(b) for b in blobs.values())
+
+
+def is_current(path: Path, store) -> bool:
+    """True if saved fragments exist and were built from this exact store."""
+    meta_path = Path(path) / 'meta.json'
+    if not meta_path.exists():
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return (meta.get('version') == FRAGMENTS_VERSION and
+            meta.get('store_build_id') == store.build_id and
+            meta.get('count') == len(store))
+
+
+class JsonFragments:
+    """Read-only, memory-mapped fragments; every method returns bytes.
+
+    Offsets for a whole page are gathered in one numpy call and the blobs
+    are sliced as mmap objects, so a fragment costs one bytes copy.
+    """
+
+    def __init__(self, path: Path):
+        path = Path(path)
+        self.blobs = {}
+        self.offsets = {}
+        for kind in KINDS:
+            blob_path = path / f'{kind}.bytes'
+            if blob_path.stat().st_size:
+                with open(blob_path, 'rb') as f:
+                    self.blobs[kind] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.blobs[kind] = b''
+            self.offsets[kind] = np.load(path / f'{kind}.offsets.npy', mmap_mode='r')
+        self.count = len(self.offsets['record']) - 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _spans(self, kind: str, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        offsets = self.offsets[kind]
+        return zip(offsets[ids].tolist(), offsets[ids + 1].tolist())
+
+    def _array(self, kind: str, ids) -> bytes:
+        blob = self.blobs[kind]
+        return b'[' + b','.join([blob[start:end] for start, end in self._spans(kind, ids)]) + b']'
+
+    def record(self, idx: int) -> bytes:
+        offsets = self.offsets['record']
+        return self.blobs['record'][int(offsets[idx]):int(offsets[idx + 1])]
+
+    def records(self, ids) -> bytes:
+        """JSON array of full records, as store.records(ids) would encode."""
+        return self._array('record', ids)
+
+    def summaries(self, ids) -> bytes:
+        return self._array('summary', ids)
+
+    def search_results(self, ids, semantic, weighted, first_rank: int = 1) -> bytes:
+        """JSON array of SearchResult objects for ranked ids and their scores."""
+        blob = self.blobs['summary']
+        parts = [
+            # Summary members without their braces, between rank and the scores
+            b'{"rank":%d,%s,"semantic_score":%s,"weighted_score":%s}' % (
+                rank, blob[start + 1:end - 1], repr(sem).encode(), repr(w).encode())
+            for rank, (start, end), sem, w in zip(
+                range(first_rank, first_rank + len(ids)), self._spans('summary', ids),
+                np.asarray(semantic, dtype=np.float64).tolist(),
+                np.asarray(weighted, dtype=np.float64).tolist())
+        ]
+        return b'[' + b','.join(parts) + b']'
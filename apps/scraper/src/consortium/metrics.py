@@ -0,0 +1,176 @@
+"""
+IRIS METRICS
+============
+Minimal Prometheus instrumentation for search_api (no client library)
+
+    REQUESTS = registry.counter('iris_requests_total', 'Requests', ['endpoint', 'status'])
+    REQUESTS.inc('/search', '200')
+    with STAGE_SECONDS.time('encode'):
+        ...
+    registry.render()   # text exposition format for GET /metrics
+
+Counters, gauges and histograms hold their values per label-value tuple
+under one lock each. Values owned by other objects (cache, pool and
+batcher stats) are read at scrape time through registry.collect().
+"""
+import math
+from bisect import bisect_left
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans a cached query (~50 us) to a cold model call under load
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names, values, extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labelvalues) -> tuple:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {labelvalues}')
+        return tuple(str(v) for v in labelvalues)
+
+    def _header(self) -> list:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labelvalues, amount: float = 1):
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            values = dict(self._values)
+        return self._header() + [f'{self.name}{_labels(self.labelnames, k)} {_format_value(v)}'
+                                 for k, v in sorted(values.items())]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, *labelvalues, value: float):
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, *labelvalues, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, *labelvalues, value: float):
+        key = self._key(labelvalues)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, sum
+                series = self._values[key] = [[0] * len(self.buckets), 0.0]
+            # First bucket whose upper bound is >= value
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labelvalues, value=time.perf_counter() - start)
+
+    def render(self) -> list:
+        with self._lock:
+            values = {k: (list(counts), total) for k, (counts, total) in self._values.items()}
+        lines = self._header()
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def collect(self, fn):
+        """Register fn() read at scrape time.
+
+        fn yields (name, kind, help, value) or (name, kind, help, value,
+        labels dict); samples sharing a name must be yielded together.
+        """
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for fn in self._collectors:
+            last = None
+            for name, kind, help, value, *labels in fn():
+                if name != last:
+                    lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}']
+                    last = name
+                names, values = zip(*labels[0].items()) if labels and labels[0] else ((), ())
+                lines.append(f'{name}{_labels(names, values)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
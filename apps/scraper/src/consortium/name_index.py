@@ -0,0 +1,131 @@
+"""
+IRIS NAME INDEX
+===============
+Token-prefix inverted index over researcher names for /name
+
+Names are case- and accent-folded and split into alphanumeric tokens;
+every prefix of every token maps to a postings array. Folding keeps every
+Unicode letter and digit (Cyrillic, CJK, ...), drops combining marks and
+transliterates the Latin letters that do not decompose (ł, ø, đ, æ, ...),
+so "Łukasz" and "Søren" are found as "lukasz" and "soren". Postings hold
+h-index ranks (positions in store.h_order(), the order RankedViews and
+FilterIndex share), so intersecting them yields matches already sorted
+by h_index.
+
+Saved as a directory of .npy files next to researcher_lookup.json:
+    keys.npy       sorted prefixes (fixed-width UTF-8 bytes, binary searched)
+    offsets.npy    int64 (len(keys) + 1) offsets into postings
+    postings.npy   int32 h-ranks, ascending within each key
+    meta.json      version and the store build id, to detect a stale index
+"""
+import json
+import re
+import shutil
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+from researcher_store import replace_dir
+
+NAME_INDEX_VERSION = 2
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+# Casefolded letters with no NFKD decomposition, spelled as in ASCII queries
+# (ß already casefolds to ss)
+_TRANSLITERATE = str.maketrans({
+    'ł': 'l', 'ø': 'o', 'đ': 'd', 'ð': 'd', 'ħ': 'h', 'ı': 'i', 'ŀ': 'l',
+    'æ': 'ae', 'œ': 'oe', 'þ': 'th',
+})
+
+
+def tokenize(text: str) -> list:
+    """Case- and accent-folded alphanumeric tokens ("O'Brien-Łęcka" -> o, brien, lecka)."""
+    folded = unicodedata.normalize('NFKD', (text or '').casefold())
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(folded.translate(_TRANSLITERATE))
+
+
+def build_name_index(store, out_dir: Path) -> int:
+    """Build the index from a ResearcherStore and save it; returns the key count."""
+    out_dir = Path(out_dir)
+    h_order = store.h_order()
+
+    postings = {}
+    # Walk rows in h-rank order so every postings list is appended in ascending order
+    for rank, idx in enumerate(h_order):
+        for token in set(tokenize(store.string('name', int(idx)))):
+            for end in range(1, len(token) + 1):
+                ranks = postings.setdefault(token[:end], [])
+                if not ranks or ranks[-1] != rank:
+                    ranks.append(rank)
+
+    # UTF-8 byte order is code point order, so this is also the order of keys.npy
+    keys = sorted(postings)
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(postings[k]) for k in keys])
+    flat = np.fromiter((rank for k in keys for rank in postings[k]),
+                       dtype=np.int32, count=int(offsets[-1]))
+
+    tmp_dir = out_dir.with_name(out_dir.name + '.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    np.save(tmp_dir / 'keys.npy', np.array([k.encode('utf-8') for k in keys], dtype=bytes))
+    np.save(tmp_dir / 'offsets.npy', offsets)
+    np.save(tmp_dir / 'postings.npy', flat)
+    with open(tmp_dir / 'meta.json', 'w') as f:
+        json.dump({'version': NAME_INDEX_VERSION, 'store_build_id': store.build_id,
+                   'count': len(store), 'keys': len(keys)}, f)
+
+    replace_dir(tmp_dir, out_dir)
+    return len(keys)
+
+
+def is_current(path: Path, store) -> bool:
+    """True if a saved index exists and was built from this exact store."""
+    meta_path = Path(path) / 'meta.json'
+    if not meta_path.exists():
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return (meta.get('version') == NAME_INDEX_VERSION and
+            meta.get('store_build_id') == store.build_id and
+            meta.get('count') == len(store))
+
+
+class NameIndex:
+    def __init__(self, path: Path, store):
+        """Open the index saved at path for store (the one it was built from)."""
+        path = Path(path)
+        with open(path / 'meta.json') as f:
+            self.count = json.load(f)['count']
+        self.keys = np.load(path / 'keys.npy', mmap_mode='r')
+        self.offsets = np.load(path / 'offsets.npy', mmap_mode='r')
+        self.postings = np.load(path / 'postings.npy', mmap_mode='r')
+        self.h_order = store.h_order()
+
+    def _postings(self, prefix: str) -> np.ndarray:
+        key = prefix.encode('utf-8')
+        i = int(np.searchsorted(self.keys, key))
+        if i >= len(self.keys) or self.keys[i] != key:
+            return np.zeros(0, dtype=np.int32)
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def search(self, query: str, limit: int) -> np.ndarray:
+        """Row ids whose name has a token starting with every query term, by h_index desc."""
+        terms = tokenize(query)
+        if not terms:
+            return np.zeros(0, dtype=np.int64)
+
+        lists = sorted((self._postings(t) for t in set(terms)), key=len)
+        ranks = np.asarray(lists[0])
+        for other in lists[1:]:
+            if not len(ranks):
+                break
+            # Probe the smaller list into the larger sorted one
+            pos = np.searchsorted(other, ranks)
+            hit = pos < len(other)
+            hit[hit] = other[pos[hit]] == ranks[hit]
+            ranks = ranks[hit]
+        return np.asarray(self.h_order[ranks[:limit]])
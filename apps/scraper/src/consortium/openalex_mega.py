@@ -6,10 +6,11 @@ Including KSU and expanding outward
 """
 import asyncio
 import aiohttp
-import json
 import sys
 from datetime import datetime, timezone
 
+from researcher_stream import ResearcherWriter
+
 sys.stdout.reconfigure(encoding='utf-8')
 
 OPENALEX_API = 'https://api.openalex.org'
@@ -170,23 +171,23 @@ async def main():
     for i, r in enumerate(all_researchers[:50], 1):
         print(f'{i:2}. h={r["h_index"]:3} c={r["citations"]:>9,} | {r["name"][:32]:<32} | {r["institution"][:20]}')
     
-    # Save
-    output = {
+    # Save as NDJSON (one researcher per line) plus a .meta.json summary;
+    # see researcher_stream.py
+    meta = {
         'timestamp': datetime.now(timezone.utc).isoformat(),
         'source': 'OpenAlex API',
         'version': '9.0-southeast-500mi',
         'radius': '500 miles from Atlanta',
         'institutions': len(INSTITUTIONS),
-        'total_researchers': len(all_researchers),
         'total_citations': total_cites,
         'by_institution': stats,
         'by_state': by_state,
-        'researchers': all_researchers
     }
     
-    outfile = f'data/consortium/southeast_r1r2_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-    with open(outfile, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    outfile = f'data/consortium/southeast_r1r2_{datetime.now().strftime("%Y%m%d_%H%M%S")}.ndjson'
+    writer = ResearcherWriter(outfile)
+    writer.write_all(all_researchers)
+    writer.close(meta)
     
     print(f'\nSaved: {outfile}')
 
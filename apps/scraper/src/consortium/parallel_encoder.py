@@ -0,0 +1,159 @@
+"""
+IRIS PARALLEL ENCODER
+=====================
+Sharded multi-process corpus encoding for CPU-only index builds
+
+One model.encode call keeps only a few cores busy. ParallelEncoder starts
+a pool of worker processes, each loading its own encoder (any
+query_encoder backend) with a bounded thread count, and exposes the same
+encode() / get_sentence_embedding_dimension() interface, so
+encode_cached() and the builders use it in place of the model.
+
+encode() splits its input into fixed chunks of chunk_size texts. The
+chunk boundaries depend only on the input, never on the worker count, and
+each worker writes its rows straight into a shared memory-mapped .npy
+at their input positions. Each worker runs a fixed number of intra-op
+threads (default 1, never derived from the worker count), since BLAS and
+torch results depend on the thread count. The output is therefore the
+same, bit for bit, with 1 or 16 workers, and vectors are never pickled
+back through the pool.
+
+    encoder = ParallelEncoder('torch', 'all-MiniLM-L6-v2', workers=8, scratch_dir=out)
+    vectors = encoder.encode(texts)
+    encoder.close()
+
+Check that the worker count does not change the vectors:
+    python parallel_encoder.py check --workers 4
+"""
+import argparse
+import importlib.util
+import multiprocessing as mp
+import tempfile
+import os
+from pathlib import Path
+
+import numpy as np
+
+from query_encoder import export_onnx, is_exported, load_encoder
+
+_worker_model = None
+
+
+def _init_worker(backend: str, model_name: str, onnx_dir, threads: int):
+    global _worker_model
+    # Bound every thread pool before torch / onnxruntime start theirs
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+    os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+    _worker_model = load_encoder(backend, model_name, onnx_dir, threads=threads)
+
+
+def _encode_chunk(task) -> int:
+    out_path, start, texts = task
+    out = np.load(out_path, mmap_mode='r+')
+    out[start:start + len(texts)] = _worker_model.encode(texts, show_progress_bar=False,
+                                                         convert_to_numpy=True)
+    out.flush()
+    del out
+    return len(texts)
+
+
+def _dimension() -> int:
+    return _worker_model.get_sentence_embedding_dimension()
+
+
+class ParallelEncoder:
+    def __init__(self, backend: str, model_name: str, onnx_dir: Path = None, workers: int = 0,
+                 threads: int = 1, chunk_size: int = 256, scratch_dir: Path = None):
+        self.workers = workers or os.cpu_count() or 1
+        # Fixed per worker, not cores // workers: the thread count changes the vectors
+        self.threads = threads or 1
+        self.chunk_size = chunk_size
+        self.scratch_dir = Path(scratch_dir or '.')
+        self.scratch_dir.mkdir(parents=True, exist_ok=True)
+
+        # A worker whose initializer fails is respawned forever by Pool; fail here instead
+        module = 'sentence_transformers' if backend == 'torch' else 'onnxruntime'
+        if importlib.util.find_spec(module) is None:
+            raise ImportError(f'{backend} encoder backend needs {module}')
+        if backend != 'torch' and onnx_dir is not None and not is_exported(onnx_dir):
+            # Export once here rather than racing in every worker
+            export_onnx(model_name, onnx_dir)
+        # spawn, not fork: torch and onnxruntime thread pools don't survive a fork
+        self.pool = mp.get_context('spawn').Pool(
+            self.workers, initializer=_init_worker,
+            initargs=(backend, model_name, onnx_dir, self.threads))
+        self.dim = self.pool.apply(_dimension)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    @property
+    def batch_size(self) -> int:
+        """Texts per encode() call that keep every worker busy for several chunks."""
+        return self.workers * self.chunk_size * 8
+
+    def encode(self, sentences, show_progress_bar: bool = False, convert_to_numpy: bool = True,
+               out_path: Path = None) -> np.ndarray:
+        """Vectors for sentences in input order (float32).
+
+        With out_path the rows are left in that .npy and a read-only memmap
+        is returned; otherwise they are copied out of a scratch file.
+        """
+        sentences = list(sentences)
+        scratch = out_path is None
+        if scratch:
+            out_path = self.scratch_dir / f'parallel_encode_{os.getpid()}.npy'
+        out = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float32,
+                                        shape=(len(sentences), self.dim))
+        del out
+        tasks = [(str(out_path), start, sentences[start:start + self.chunk_size])
+                 for start in range(0, len(sentences), self.chunk_size)]
+        for _ in self.pool.imap_unordered(_encode_chunk, tasks):
+            pass
+        vectors = np.load(out_path, mmap_mode='r')
+        if scratch:
+            vectors = np.array(vectors)
+            os.remove(out_path)
+        return vectors
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+def check_worker_parity(backend: str, model_name: str, onnx_dir: Path = None, workers: int = 4,
+                        texts: list = None, chunk_size: int = 16) -> bool:
+    """Encode the same texts with 1 and with workers processes; True if bit-identical."""
+    if texts is None:
+        texts = [f'researcher {i} works on topic {i % 37} and method {i % 11}' for i in range(200)]
+    results = []
+    with tempfile.TemporaryDirectory(prefix='iris_parallel_') as scratch:
+        for n in (1, workers):
+            encoder = ParallelEncoder(backend, model_name, onnx_dir, workers=n,
+                                      chunk_size=chunk_size, scratch_dir=scratch)
+            try:
+                results.append(encoder.encode(texts))
+            finally:
+                encoder.close()
+    return np.array_equal(results[0], results[1])
+
+
+def main():
+    from query_encoder import DEFAULT_MODEL, ENCODER_BACKENDS
+    parser = argparse.ArgumentParser(description='Parallel corpus encoding checks')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('check', help='Vectors with 1 and N workers must be identical')
+    p.add_argument('--backend', choices=ENCODER_BACKENDS, default='torch')
+    p.add_argument('--model', default=DEFAULT_MODEL)
+    p.add_argument('--onnx-dir', type=Path)
+    p.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    if not check_worker_parity(args.backend, args.model, args.onnx_dir, args.workers):
+        raise SystemExit(f'1 and {args.workers} workers produced different vectors')
+    print(f'1 and {args.workers} workers produced identical vectors')
+
+
+if __name__ == '__main__':
+    main()
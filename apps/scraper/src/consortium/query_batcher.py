@@ -0,0 +1,176 @@
+"""
+IRIS QUERY BATCHER
+==================
+Cross-request micro-batching of query encoding and ANN search
+
+Concurrent /search requests are queued; a consumer collects them for up
+to max_wait_ms (or max_batch items), encodes all queries in one model
+call and answers the unfiltered requests with one multi-row index.search
+per k. Requests carrying filter params are searched row by row, but
+still share the batched encode. Up to max_concurrent batches run at once
+(search_api sizes this to the CPU pool); while every slot is busy,
+arrivals keep queueing and the next free slot takes them as one larger
+batch. Each request may carry a context (search_api passes the
+SearchState it was pinned to), handed through to search_fn; unfiltered
+rows are only grouped with rows of the same context and k, so a batch
+straddling an index reload searches each row on its own version, and
+every row gets exactly the candidates a lone search would.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class _Pending:
+    query: str
+    k: int
+    params: object
+    context: object
+    future: asyncio.Future
+
+
+class QueryBatcher:
+    def __init__(self, encode_fn, search_fn, max_batch: int = 32, max_wait_ms: float = 2.0,
+                 run=None, max_concurrent: int = 1):
+        """encode_fn(list[str]) -> (n, dim) float32; search_fn(vecs, k, params, context) -> (D, I).
+
+        run(fn, *args) is awaited to execute a batch off the event loop
+        (default: the loop's executor); at most max_concurrent batches are
+        in flight at once.
+        """
+        self.encode_fn = encode_fn
+        self.search_fn = search_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.run = run
+        self.max_concurrent = max(1, max_concurrent)
+        self._queue = None
+        self._task = None
+        self._slots = None
+        self._inflight = set()
+
+        self.batches = 0
+        self.queries = 0
+        self.max_seen = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        """Start the consumer task on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        tasks = [self._task, *self._inflight] if self._task else list(self._inflight)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._inflight.clear()
+
+    async def search(self, query: str, k: int, params=None, context=None):
+        """Encode query and search k neighbours; returns one (D, I) row pair."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Pending(query, k, params, context, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            # Take whatever is already queued, then wait out the window
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _execute(self, batch: list) -> list:
+        if self.run is not None:
+            return await self.run(self._process, batch)
+        return await asyncio.get_running_loop().run_in_executor(None, self._process, batch)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for a free slot before collecting, so a saturated pool
+            # turns the backlog into bigger batches rather than more of them
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = loop.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: list):
+        start = time.perf_counter()
+        try:
+            results = await self._execute(batch)
+        except asyncio.CancelledError:
+            for item in batch:
+                item.future.cancel()
+            raise
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+            self._slots.release()
+        self.batches += 1
+        self.queries += len(batch)
+        self.max_seen = max(self.max_seen, len(batch))
+        for item, result in zip(batch, results):
+            if not item.future.done():
+                item.future.set_result(result)
+
+    def _process(self, batch: list) -> list:
+        vecs = self.encode_fn([item.query for item in batch])
+        results = [None] * len(batch)
+
+        # Rows share a search only at the same k: HNSW candidates depend on it
+        plain = {}  # (id(context), k) -> rows
+        for i, item in enumerate(batch):
+            if item.params is None:
+                plain.setdefault((id(item.context), item.k), []).append(i)
+        for (_, k), rows in plain.items():
+            D, I = self.search_fn(vecs[rows], k, None, batch[rows[0]].context)
+            for row, i in enumerate(rows):
+                results[i] = (D[row], I[row])
+
+        for i, item in enumerate(batch):
+            if item.params is not None:
+                D, I = self.search_fn(np.ascontiguousarray(vecs[i:i + 1]), item.k, item.params,
+                                      item.context)
+                results[i] = (D[0], I[0])
+        return results
+
+    def stats(self) -> dict:
+        return {
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+            'max_concurrent': self.max_concurrent,
+            'in_flight': len(self._inflight),
+            'batches': self.batches,
+            'queries': self.queries,
+            'avg_batch_size': round(self.queries / self.batches, 2) if self.batches else 0.0,
+            'max_batch_seen': self.max_seen,
+            'busy_ms': round(self.busy_seconds * 1000, 1),
+        }
@@ -0,0 +1,159 @@
+"""
+IRIS QUERY EMBEDDING CACHE
+==========================
+Bounded LRU of normalized query vectors for the search API
+
+Keyed on (model name, normalized query text). Entries evicted from memory
+can optionally spill to a SQLite file so they survive restarts and can be
+promoted back on the next hit. Spills are queued and written in batches
+by a background thread every flush_interval seconds (or once flush_batch
+are pending), so the request path never waits on a commit; close() writes
+the pending spills and the whole in-memory LRU, so the hot set is on disk
+for the next start.
+"""
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_query(q: str) -> str:
+    """Cache key text: case and whitespace folded (the MiniLM tokenizer is uncased)."""
+    return ' '.join(q.lower().split())
+
+
+class QueryEmbeddingCache:
+    def __init__(self, model_name: str, max_size: int = 10000, disk_path=None,
+                 flush_interval: float = 5.0, flush_batch: int = 256):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._entries = OrderedDict()
+        self._spilled = {}  # evicted, not yet written: key -> vector
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = None
+        if disk_path:
+            self._db = sqlite3.connect(str(disk_path), check_same_thread=False, timeout=30)
+            self._db.execute('CREATE TABLE IF NOT EXISTS query_vectors '
+                             '(model TEXT, query TEXT, vector BLOB, PRIMARY KEY (model, query))')
+            self._db.commit()
+            self._writer = threading.Thread(target=self._write_loop, name='iris-query-cache',
+                                            daemon=True)
+            self._writer.start()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flushes = 0
+        self.encode_seconds = 0.0
+
+    def get(self, query: str):
+        """Cached float32 vector for query, or None."""
+        key = normalize_query(query)
+        with self._lock:
+            vec = self._entries.get(key)
+            if vec is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vec
+            vec = self._spilled.pop(key, None)
+            if vec is not None:
+                self._insert(key, vec)
+                self.disk_hits += 1
+                return vec
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute('SELECT vector FROM query_vectors WHERE model = ? AND query = ?',
+                                       (self.model_name, key)).fetchone()
+            if row is not None:
+                vec = np.frombuffer(row[0], dtype=np.float32)
+                with self._lock:
+                    self._insert(key, vec)
+                    self.disk_hits += 1
+                return vec
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, query: str, vec: np.ndarray, encode_seconds: float = 0.0):
+        """Store a freshly encoded vector; encode_seconds feeds the savings estimate."""
+        vec = np.array(vec, dtype=np.float32).reshape(-1)
+        vec.setflags(write=False)
+        with self._lock:
+            self.encode_seconds += encode_seconds
+            self._insert(normalize_query(query), vec)
+
+    def _insert(self, key: str, vec: np.ndarray):
+        self._spilled.pop(key, None)
+        self._entries[key] = vec
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            old_key, old_vec = self._entries.popitem(last=False)
+            self.evictions += 1
+            if self._db is not None:
+                self._spilled[old_key] = old_vec
+        if len(self._spilled) >= self.flush_batch:
+            self._wake.set()
+
+    def _write_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self, include_memory: bool = False):
+        """Write queued spills (and, with include_memory, the LRU itself) in one transaction."""
+        if self._db is None:
+            return
+        with self._lock:
+            rows = list(self._spilled.items())
+            self._spilled.clear()
+            if include_memory:
+                rows += list(self._entries.items())
+        if not rows:
+            return
+        with self._db_lock:
+            self._db.executemany('INSERT OR REPLACE INTO query_vectors VALUES (?, ?, ?)',
+                                 [(self.model_name, key, vec.tobytes()) for key, vec in rows])
+            self._db.commit()
+        with self._lock:
+            self.flushes += 1
+
+    def close(self):
+        """Stop the writer and persist everything still in memory."""
+        if self._db is None or self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self.flush(include_memory=True)
+        with self._db_lock:
+            self._db.close()
+        self._db = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            avg_encode_ms = self.encode_seconds / self.misses * 1000 if self.misses else 0.0
+            return {
+                'model': self.model_name,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'disk_spill': self._db is not None,
+                'spill_pending': len(self._spilled),
+                'spill_flushes': self.flushes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                'avg_encode_ms': round(avg_encode_ms, 2),
+                'encode_ms_saved': round((self.hits + self.disk_hits) * avg_encode_ms, 1),
+            }
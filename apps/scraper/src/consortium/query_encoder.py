@@ -0,0 +1,223 @@
+"""
+IRIS QUERY ENCODER
+==================
+Pluggable sentence encoder backends behind the SentenceTransformer interface
+
+    torch       sentence-transformers on PyTorch (the reference)
+    onnx        the same network exported to ONNX Runtime, fp32
+    onnx-int8   the ONNX export with dynamically quantized int8 weights
+
+Every backend exposes encode(sentences, batch_size=..., show_progress_bar=...,
+convert_to_numpy=..., normalize_embeddings=...) and
+get_sentence_embedding_dimension(), so search_api and
+vectorize_researchers.py swap backends without other changes. The ONNX
+backends need only onnxruntime and tokenizers at serve time, which skips
+the torch import on cold start; the one-time export also needs torch and
+onnx (quantize_dynamic loads the graph with it).
+
+Export once (needs torch), then serve from the directory:
+    python query_encoder.py export --out-dir data/consortium/vector_index/onnx_encoder
+
+Directory layout:
+    model.onnx          fp32 transformer (token embeddings out)
+    model.int8.onnx     dynamically quantized copy
+    tokenizer.json      fast tokenizer
+    encoder.json        model name, dimension, max sequence length, pooling
+"""
+import argparse
+import inspect
+import json
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+ENCODER_BACKENDS = ['torch', 'onnx', 'onnx-int8']
+ENCODER_META = 'encoder.json'
+ONNX_FILES = {'onnx': 'model.onnx', 'onnx-int8': 'model.int8.onnx'}
+
+
+def is_exported(onnx_dir: Path) -> bool:
+    onnx_dir = Path(onnx_dir)
+    return all((onnx_dir / name).exists()
+               for name in [ENCODER_META, 'tokenizer.json', *ONNX_FILES.values()])
+
+
+def _pooling_mode(module) -> str:
+    if hasattr(module, 'get_pooling_mode_str'):  # sentence-transformers < 6
+        return module.get_pooling_mode_str()
+    return module.get_config_dict().get('pooling_mode', '')
+
+
+def export_onnx(model_name: str, out_dir: Path, opset: int = 17) -> dict:
+    """Export a sentence-transformers model to ONNX (fp32 + int8); returns encoder.json.
+
+    Only the transformer is exported; mean pooling and normalization are
+    cheap and run in numpy, matching the sentence-transformers modules.
+    """
+    import shutil
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(out_dir.name + '.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    st = SentenceTransformer(model_name, device='cpu')
+    transformer = st[0].auto_model.eval()
+    tokenizer = st.tokenizer
+    pooling = _pooling_mode(st[1]) if len(st) > 1 else 'mean'
+    if pooling != 'mean':
+        raise ValueError(f'{model_name} uses {pooling} pooling; only mean pooling is supported')
+
+    sample = tokenizer(['export sample', 'a somewhat longer export sample sentence'],
+                       padding=True, return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids')
+                   if name in sample]
+    dynamic = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic['token_embeddings'] = {0: 'batch', 1: 'sequence'}
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    fp32_path = tmp_dir / ONNX_FILES['onnx']
+    # torch >= 2.5 grew a dynamo exporter; keep the TorchScript one where the flag exists
+    export_kwargs = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs['dynamo'] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer), tuple(sample[name] for name in input_names),
+            str(fp32_path), input_names=input_names, output_names=['token_embeddings'],
+            dynamic_axes=dynamic, opset_version=opset, **export_kwargs,
+        )
+    quantize_dynamic(str(fp32_path), str(tmp_dir / ONNX_FILES['onnx-int8']),
+                     weight_type=QuantType.QInt8)
+
+    tokenizer.backend_tokenizer.save(str(tmp_dir / 'tokenizer.json'))
+    normalize = any(type(module).__name__ == 'Normalize' for module in st)
+    meta = {
+        'model_name': model_name,
+        'dimension': st.get_sentence_embedding_dimension(),
+        'max_seq_length': st.max_seq_length,
+        'inputs': input_names,
+        'pooling': 'mean',
+        'normalize': normalize,
+    }
+    with open(tmp_dir / ENCODER_META, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    tmp_dir.rename(out_dir)
+    return meta
+
+
+class OnnxEncoder:
+    """ONNX Runtime drop-in for the SentenceTransformer calls IRIS makes."""
+
+    def __init__(self, onnx_dir: Path, quantized: bool = False, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        onnx_dir = Path(onnx_dir)
+        with open(onnx_dir / ENCODER_META) as f:
+            self.meta = json.load(f)
+        self.backend = 'onnx-int8' if quantized else 'onnx'
+
+        self.tokenizer = Tokenizer.from_file(str(onnx_dir / 'tokenizer.json'))
+        self.tokenizer.enable_truncation(self.meta['max_seq_length'])
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(onnx_dir / ONNX_FILES[self.backend]), options,
+                                            providers=['CPUExecutionProvider'])
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.meta['dimension']
+
+    def _encode_batch(self, sentences: list) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(sentences)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+            'attention_mask': mask,
+            'token_type_ids': np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        tokens = self.session.run(None, {name: feeds[name] for name in self.meta['inputs']})[0]
+        # Mean pooling over real (unpadded) tokens
+        weights = mask[:, :, None].astype(np.float32)
+        pooled = (tokens * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        if self.meta['normalize']:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False) -> np.ndarray:
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        if not sentences:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        # Sort by length so each batch pads to similar lengths, then restore order
+        order = np.argsort([-len(s) for s in sentences], kind='stable')
+        out = np.empty((len(sentences), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            chunk = order[start:start + batch_size]
+            out[chunk] = self._encode_batch([sentences[i] for i in chunk])
+        if normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out[0] if single else out
+
+
+def load_encoder(backend: str = 'torch', model_name: str = DEFAULT_MODEL,
+                 onnx_dir: Path = None, threads: int = 0):
+    """An encoder for backend; ONNX backends are exported into onnx_dir on first use."""
+    if backend == 'torch':
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name)
+    if backend not in ONNX_FILES:
+        raise ValueError(f'Unknown encoder backend {backend!r} (choose from {ENCODER_BACKENDS})')
+    if onnx_dir is None:
+        raise ValueError(f'{backend} backend needs an ONNX model directory')
+    if not is_exported(onnx_dir):
+        print(f'  Exporting {model_name} to ONNX in {onnx_dir} (one-time)...')
+        export_onnx(model_name, onnx_dir)
+    encoder = OnnxEncoder(onnx_dir, quantized=backend == 'onnx-int8', threads=threads)
+    if encoder.meta['model_name'] != model_name:
+        raise ValueError(f"{onnx_dir} holds {encoder.meta['model_name']}, not {model_name}")
+    return encoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the IRIS query encoder to ONNX')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('export', help='Export fp32 and int8 ONNX models')
+    p.add_argument('--model', default=DEFAULT_MODEL)
+    p.add_argument('--out-dir', type=Path, required=True)
+    p.add_argument('--opset', type=int, default=17)
+    args = parser.parse_args()
+
+    meta = export_onnx(args.model, args.out_dir, args.opset)
+    for backend, name in ONNX_FILES.items():
+        size = (args.out_dir / name).stat().st_size / 1e6
+        print(f'{backend:<10} {args.out_dir / name} ({size:.1f} MB)')
+    print(json.dumps(meta, indent=2))
+
+
+if __name__ == '__main__':
+    main()
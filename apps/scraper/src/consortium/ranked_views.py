@@ -0,0 +1,80 @@
+"""
+IRIS RANKED VIEWS
+=================
+Precomputed h_index-ordered permutations for /top
+
+Built once when the store is opened:
+    h_order                       store.h_order(): row ids by h_index descending (stable)
+    per institution/field/subfield  the h-ranks of that category's rows,
+                                  ascending, i.e. its researchers best first
+
+/top is then a slice of h_order or of one view; several views (a partial
+name matching more than one category, or institution + field) are
+combined through a boolean rank mask before slicing. select() returns
+the whole matching rank array, which /top cursors page through.
+"""
+import numpy as np
+
+VIEW_COLUMNS = ['institution', 'field', 'subfield']
+
+
+class RankedViews:
+    def __init__(self, store):
+        self.count = len(store)
+        self.h_order = store.h_order()
+
+        self.ranks = {}
+        self.bounds = {}
+        for col in VIEW_COLUMNS:
+            codes_by_rank = np.asarray(store.column(col))[self.h_order]
+            # Stable sort groups ranks by code and keeps them ascending within a code
+            ranks = np.argsort(codes_by_rank, kind='stable').astype(np.int32)
+            # bounds[code + 1] .. bounds[code + 2] is the slice for code (-1 = null)
+            self.bounds[col] = np.searchsorted(codes_by_rank[ranks],
+                                               np.arange(-1, len(store.vocab[col]) + 1))
+            self.ranks[col] = ranks
+
+    def view(self, col: str, code: int) -> np.ndarray:
+        """Ascending h-ranks of the rows with this category code."""
+        b = self.bounds[col]
+        return self.ranks[col][b[code + 1]:b[code + 2]]
+
+    def top(self, limit: int, institution_codes=None, field_codes=None, subfield_codes=None):
+        """(row ids best first, total matched) for the given category codes.
+
+        None means no filter; field_codes and subfield_codes are OR-ed, as a
+        field filter matches either column.
+        """
+        if institution_codes is None and field_codes is None and subfield_codes is None:
+            return self.h_order[:limit], self.count
+        selected = self.select(institution_codes, field_codes, subfield_codes)
+        return self.h_order[selected[:limit]], len(selected)
+
+    def select(self, institution_codes=None, field_codes=None, subfield_codes=None) -> np.ndarray:
+        """Ascending h-ranks of every matching row (the whole /top ordering).
+
+        Row ids of ranks a..b are h_order[selected[a:b]], so pages past the
+        first are slices of this array.
+        """
+        groups = []
+        if institution_codes is not None:
+            groups.append([self.view('institution', c) for c in institution_codes])
+        if field_codes is not None or subfield_codes is not None:
+            group = [self.view('field', c) for c in (field_codes if field_codes is not None else ())]
+            group += [self.view('subfield', c)
+                      for c in (subfield_codes if subfield_codes is not None else ())]
+            groups.append(group)
+
+        if not groups:
+            return np.arange(self.count)
+        if len(groups) == 1 and len(groups[0]) == 1:
+            # Single category: the precomputed view is the answer
+            return groups[0][0]
+        # Unions and intersections over a rank mask; cost scales with the views' sizes
+        mask = None
+        for group in groups:
+            member = np.zeros(self.count, dtype=bool)
+            for v in group:
+                member[v] = True
+            mask = member if mask is None else np.logical_and(mask, member, out=mask)
+        return np.flatnonzero(mask)
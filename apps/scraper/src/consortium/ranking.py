@@ -0,0 +1,74 @@
+"""
+IRIS RANKING
+============
+Vectorized post-ANN reranking for the search API
+
+weighted_score = semantic_score * (1 - h_weight - citation_weight)
+               + normalized_h_index * h_weight
+               + normalized_citations * citation_weight
+
+h-index and citations are normalized by their maximum over the fetched
+candidates. search_api pushes institution and min_h_index filters into
+the ANN search (search_filters.py), so those candidates are already the
+filtered set and the maxima are taken over matching researchers only;
+the filters rerank() itself applies are then a no-op safety net. A
+caller passing unfiltered hits gets maxima over all of them, as the
+original per-hit loop (bench_search.py legacy_rerank) computed them.
+
+Scores arrive as float32 (FAISS D) and are combined in float64. The
+per-hit loop's precision depended on NumPy: float64 under NumPy 1, but
+float32 under NumPy 2 (NEP 50 keeps np.float32 * float in float32). So
+on NumPy 2 candidates whose weighted scores agree to within float32
+rounding (~1e-7 relative) can swap places compared with the old loop,
+and weighted_score carries float64 rather than float32-rounded digits.
+"""
+import numpy as np
+
+
+def top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest values, ordered like a stable descending sort.
+
+    argpartition picks the k-th largest value; ties at that boundary are
+    resolved by candidate position so the result matches list.sort exactly.
+    """
+    n = len(values)
+    if n <= k:
+        return np.argsort(-values, kind='stable')
+    cut = np.argpartition(-values, k - 1)[k - 1]
+    threshold = values[cut]
+    above = np.flatnonzero(values > threshold)
+    ties = np.flatnonzero(values == threshold)[:k - len(above)]
+    top = np.sort(np.concatenate([above, ties]))
+    return top[np.argsort(-values[top], kind='stable')]
+
+
+def rerank(store, ids, scores, limit: int, min_h_index: int = 0,
+           institution_codes=None, h_weight: float = 0.3, citation_weight: float = 0.1):
+    """Filter and rerank one row of FAISS hits in a single numpy pass.
+
+    ids/scores are one row of index.search output (-1 marks an empty slot).
+    institution_codes restricts hits to those institution codes (None = any).
+    Returns (row_ids, semantic_scores, weighted_scores), best first.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+    valid = ids >= 0
+    safe_ids = np.where(valid, ids, 0)
+
+    h = np.where(valid, store.column('h_index')[safe_ids], 0)
+    c = np.where(valid, store.column('citations')[safe_ids], 0)
+    max_h = int(h.max(initial=0)) or 1
+    max_c = int(c.max(initial=0)) or 1
+
+    keep = valid & (h >= min_h_index)
+    if institution_codes is not None:
+        keep &= np.isin(store.column('institution')[safe_ids], institution_codes)
+    pos = np.flatnonzero(keep)
+
+    semantic_weight = 1.0 - h_weight - citation_weight
+    weighted = (scores[pos] * semantic_weight +
+                h[pos] / max_h * h_weight +
+                c[pos] / max_c * citation_weight)
+
+    order = top_k(weighted, limit)
+    return ids[pos[order]], scores[pos[order]], weighted[order]
@@ -0,0 +1,250 @@
+"""
+IRIS RESEARCHER STORE
+=====================
+Columnar, memory-mapped researcher table for the search API
+Numeric metrics are numpy arrays, institution/field/subfield are
+dictionary-encoded, free-text strings live in offset-indexed UTF-8 blobs.
+
+Layout of a store directory:
+    columns.json              schema, row count, category vocabularies
+    <numeric>.npy             one array per metric column
+    <category>.codes.npy      int32 codes into the vocabulary (-1 = null)
+    <string>.bytes            concatenated UTF-8 values
+    <string>.offsets.npy      int64 offsets (n + 1) into the blob
+    <string>.null.npy         bool mask of null values
+    stats.json                /stats aggregates (see stats_aggregate.py)
+"""
+import json
+import shutil
+import uuid
+import numpy as np
+from pathlib import Path
+
+from stats_aggregate import STATS_FILE, StatsAggregate
+
+STORE_VERSION = 1
+
+NUMERIC_COLUMNS = {
+    'h_index': np.int32,
+    'i10_index': np.int32,
+    'citations': np.int64,
+    'works_count': np.int32,
+}
+CATEGORY_COLUMNS = ['institution', 'field', 'subfield']
+STRING_COLUMNS = ['name', 'openalex_id', 'orcid']
+
+# Column order used when a row is materialized as a dict. This is the
+# /top and /researcher/{idx} record: only these columns are kept from the
+# source dump (e.g. no topics or raw OpenAlex payload), plus the legacy
+# 'works' key, which openalex_mega dumps used for works_count.
+RECORD_FIELDS = ['name', 'openalex_id', 'orcid', 'institution', 'h_index',
+                 'i10_index', 'citations', 'works_count', 'field', 'subfield']
+LEGACY_ALIASES = {'works': 'works_count'}
+
+
+def _numeric_value(r: dict, col: str) -> int:
+    if col == 'works_count':
+        # openalex_mega writes 'works', older dumps write 'works_count'
+        value = r.get('works_count', r.get('works'))
+    else:
+        value = r.get(col)
+    return int(value or 0)
+
+
+def build_store(researchers, out_dir: Path) -> int:
+    """Write researchers (any iterable of dicts, in row-id order) as a columnar store.
+
+    The store is written to a sibling temp directory and moved into place,
+    so a reader never sees a half-written store. Returns the row count.
+    """
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(out_dir.name + '.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    numeric = {col: [] for col in NUMERIC_COLUMNS}
+    vocab = {col: {} for col in CATEGORY_COLUMNS}
+    codes = {col: [] for col in CATEGORY_COLUMNS}
+    blobs = {col: bytearray() for col in STRING_COLUMNS}
+    offsets = {col: [0] for col in STRING_COLUMNS}
+    nulls = {col: [] for col in STRING_COLUMNS}
+    stats = StatsAggregate()
+
+    count = 0
+    for r in researchers:
+        stats.add(r)
+        for col in NUMERIC_COLUMNS:
+            numeric[col].append(_numeric_value(r, col))
+        for col in CATEGORY_COLUMNS:
+            value = r.get(col)
+            if value is None:
+                codes[col].append(-1)
+            else:
+                codes[col].append(vocab[col].setdefault(value, len(vocab[col])))
+        for col in STRING_COLUMNS:
+            value = r.get(col)
+            nulls[col].append(value is None)
+            if value:
+                blobs[col].extend(str(value).encode('utf-8'))
+            offsets[col].append(len(blobs[col]))
+        count += 1
+
+    for col, dtype in NUMERIC_COLUMNS.items():
+        np.save(tmp_dir / f'{col}.npy', np.asarray(numeric[col], dtype=dtype))
+    for col in CATEGORY_COLUMNS:
+        np.save(tmp_dir / f'{col}.codes.npy', np.asarray(codes[col], dtype=np.int32))
+    for col in STRING_COLUMNS:
+        (tmp_dir / f'{col}.bytes').write_bytes(bytes(blobs[col]))
+        np.save(tmp_dir / f'{col}.offsets.npy', np.asarray(offsets[col], dtype=np.int64))
+        np.save(tmp_dir / f'{col}.null.npy', np.asarray(nulls[col], dtype=bool))
+
+    build_id = uuid.uuid4().hex
+    stats.save(tmp_dir / STATS_FILE, build_id)
+
+    schema = {
+        'version': STORE_VERSION,
+        'build_id': build_id,
+        'count': count,
+        'numeric': list(NUMERIC_COLUMNS),
+        'category': {col: list(vocab[col]) for col in CATEGORY_COLUMNS},
+        'string': STRING_COLUMNS,
+    }
+    with open(tmp_dir / 'columns.json', 'w', encoding='utf-8') as f:
+        json.dump(schema, f, ensure_ascii=False)
+
+    replace_dir(tmp_dir, out_dir)
+    return count
+
+
+def replace_dir(tmp_dir: Path, out_dir: Path):
+    """Move a finished tmp_dir to out_dir, replacing any previous build.
+
+    The old directory is renamed aside before the new one takes its
+    place and deleted only afterwards, so a crash never leaves neither:
+    out_dir is the old or the new build, or the old one is in <name>.old.
+    """
+    tmp_dir, out_dir = Path(tmp_dir), Path(out_dir)
+    old_dir = out_dir.with_name(out_dir.name + '.old')
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+    if out_dir.exists():
+        out_dir.rename(old_dir)
+    tmp_dir.rename(out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def build_store_from_lookup(lookup_path: Path, out_dir: Path) -> int:
+    """One-time conversion of a legacy researcher_lookup.json into a store."""
+    with open(lookup_path, 'r', encoding='utf-8') as f:
+        lookup = json.load(f)
+    rows = (lookup[k] for k in sorted(lookup, key=int))
+    return build_store(rows, out_dir)
+
+
+def is_store(path: Path) -> bool:
+    return (Path(path) / 'columns.json').exists()
+
+
+class ResearcherStore:
+    """Read-only view over a store directory; all arrays are memory-mapped."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path / 'columns.json', 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+        if schema.get('version') != STORE_VERSION:
+            raise RuntimeError(f"Unsupported store version {schema.get('version')} in {self.path}")
+
+        self.count = schema['count']
+        # Unique per build; lets derived indexes detect that the store changed
+        self.build_id = schema.get('build_id', '')
+        self.vocab = schema['category']
+        self.numeric = {
+            col: np.load(self.path / f'{col}.npy', mmap_mode='r')
+            for col in schema['numeric']
+        }
+        self.codes = {
+            col: np.load(self.path / f'{col}.codes.npy', mmap_mode='r')
+            for col in self.vocab
+        }
+        self.blobs = {}
+        self.offsets = {}
+        self.nulls = {}
+        for col in schema['string']:
+            blob_path = self.path / f'{col}.bytes'
+            if blob_path.stat().st_size:
+                self.blobs[col] = np.memmap(blob_path, dtype=np.uint8, mode='r')
+            else:
+                self.blobs[col] = np.zeros(0, dtype=np.uint8)
+            self.offsets[col] = np.load(self.path / f'{col}.offsets.npy', mmap_mode='r')
+            self.nulls[col] = np.load(self.path / f'{col}.null.npy', mmap_mode='r')
+        self._h_order = None
+
+    def h_order(self) -> np.ndarray:
+        """Row ids by h_index descending (stable); computed once, shared by every derived index."""
+        if self._h_order is None:
+            self._h_order = np.argsort(-np.asarray(self.column('h_index')), kind='stable')
+        return self._h_order
+
+    def load_stats(self) -> StatsAggregate:
+        """Saved /stats aggregate, computed from the columns (and saved) if missing or stale."""
+        stats = StatsAggregate.load(self.path / STATS_FILE, self.build_id)
+        if stats is None:
+            stats = StatsAggregate.from_store(self)
+            try:
+                stats.save(self.path / STATS_FILE, self.build_id)
+            except OSError:
+                pass  # read-only store directory; keep the in-memory aggregate
+        return stats
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, idx) -> bool:
+        return 0 <= int(idx) < self.count
+
+    def column(self, col: str) -> np.ndarray:
+        """Numeric column, or the code array of a category column."""
+        if col in self.numeric:
+            return self.numeric[col]
+        return self.codes[col]
+
+    def string(self, col: str, idx: int):
+        if self.nulls[col][idx]:
+            return None
+        start, end = self.offsets[col][idx], self.offsets[col][idx + 1]
+        return self.blobs[col][start:end].tobytes().decode('utf-8')
+
+    def strings(self, col: str):
+        """Iterate (row id, value) over a string column without building a list."""
+        for idx in range(self.count):
+            yield idx, self.string(col, idx)
+
+    def category(self, col: str, idx: int):
+        code = int(self.codes[col][idx])
+        return None if code < 0 else self.vocab[col][code]
+
+    def match_category(self, col: str, text: str) -> np.ndarray:
+        """Codes whose value contains text (case-insensitive)."""
+        text = text.lower()
+        return np.array([code for code, value in enumerate(self.vocab[col])
+                         if text in value.lower()], dtype=np.int32)
+
+    def value(self, col: str, idx: int):
+        if col in self.numeric:
+            return int(self.numeric[col][idx])
+        if col in self.codes:
+            return self.category(col, idx)
+        return self.string(col, idx)
+
+    def get(self, idx: int) -> dict:
+        """Materialize a single row as a dict."""
+        idx = int(idx)
+        record = {col: self.value(col, idx) for col in RECORD_FIELDS}
+        for alias, col in LEGACY_ALIASES.items():
+            record[alias] = record[col]
+        return record
+
+    def records(self, ids) -> list:
+        return [self.get(idx) for idx in ids]
@@ -0,0 +1,235 @@
+"""
+IRIS RESEARCHER STREAM
+======================
+Bounded-memory reading and writing of the southeast_r1r2 researcher dump
+
+New dumps from openalex_mega.py are NDJSON, one researcher per line, with
+the run summary (timestamp, totals, by_institution, by_state) in a
+sidecar written when the file is complete:
+    southeast_r1r2_<stamp>.ndjson
+    southeast_r1r2_<stamp>.meta.json
+
+Legacy southeast_r1r2_*.json files (one object with a "researchers"
+array) are parsed incrementally: the array is decoded one record at a
+time from a sliding text buffer, so neither format is ever held in
+memory whole and consumers start on the first record right away.
+
+    for r in iter_researchers(path): ...
+    for chunk in iter_chunks(path, 10000): ...
+    meta = read_meta(path)          # everything except the researchers
+
+Convert a legacy dump:
+    python researcher_stream.py convert southeast_r1r2_20260114_041911.json
+"""
+import argparse
+import json
+import os
+import re
+from itertools import islice
+from pathlib import Path
+
+READ_SIZE = 1 << 20
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+
+
+def is_ndjson(path: Path) -> bool:
+    return Path(path).suffix.lower() in NDJSON_SUFFIXES
+
+
+def meta_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.stem + '.meta.json')
+
+
+class _LegacyParser:
+    """Incremental decoder for {"key": value, ..., "researchers": [{...}, ...], ...}."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        data = self.f.read(READ_SIZE)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Next non-whitespace character (not consumed), '' at end of file."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, chars: str) -> str:
+        c = self._peek()
+        if not c or c not in chars:
+            raise ValueError(f'expected one of {chars!r}, found {c or "end of file"!r}')
+        self.pos += 1
+        return c
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number at the end of the buffer may continue in the next read
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def items(self, meta: dict = None):
+        """Yield each researcher; other top-level members are stored in meta."""
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == 'researchers':
+                self._expect('[')
+                if self._peek() == ']':
+                    self.pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._expect(',]') == ']':
+                            break
+            else:
+                value = self._value()
+                if meta is not None:
+                    meta[key] = value
+            if self._expect(',}') == '}':
+                return
+
+
+def iter_researchers(path: Path, meta: dict = None):
+    """Yield researcher dicts from an NDJSON or legacy dump in file order.
+
+    If meta is given it is filled with the dump's summary fields (for a
+    legacy file, members after the array only once iteration finishes).
+    """
+    path = Path(path)
+    if is_ndjson(path):
+        if meta is not None:
+            meta.update(read_meta(path))
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from _LegacyParser(f).items(meta)
+
+
+def iter_chunks(path: Path, size: int = 10000):
+    """Lists of up to size researchers, in file order."""
+    records = iter_researchers(path)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_meta(path: Path) -> dict:
+    """The dump's summary fields without its researchers."""
+    path = Path(path)
+    if is_ndjson(path):
+        sidecar = meta_path(path)
+        if not sidecar.exists():
+            return {}
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    meta = {}
+    for _ in iter_researchers(path, meta):
+        pass
+    return meta
+
+
+class ResearcherWriter:
+    """Append researchers to an NDJSON dump; the file appears on close().
+
+    Writes to <path>.tmp and renames on close, so a reader never sees a
+    half-written dump; the meta sidecar (with total_researchers) follows.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self.f = open(self.tmp_path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, researcher: dict):
+        self.f.write(json.dumps(researcher, ensure_ascii=False))
+        self.f.write('\n')
+        self.count += 1
+
+    def write_all(self, researchers):
+        for r in researchers:
+            self.write(r)
+
+    def close(self, meta: dict = None):
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+        meta = {**(meta or {}), 'total_researchers': self.count}
+        with open(meta_path(self.path), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.f.close()
+            self.tmp_path.unlink()
+
+
+def convert(legacy_path: Path, out_path: Path = None) -> Path:
+    """Rewrite a legacy JSON dump as NDJSON plus meta sidecar."""
+    legacy_path = Path(legacy_path)
+    out_path = Path(out_path or legacy_path.with_suffix('.ndjson'))
+    meta = {}
+    writer = ResearcherWriter(out_path)
+    writer.write_all(iter_researchers(legacy_path, meta))
+    writer.close(meta)
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Researcher dump streaming tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('convert', help='Convert a legacy JSON dump to NDJSON')
+    p.add_argument('input', type=Path)
+    p.add_argument('--out', type=Path)
+    p = sub.add_parser('count', help='Count researchers in a dump without loading it')
+    p.add_argument('input', type=Path)
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        out = convert(args.input, args.out)
+        print(f'Wrote {out} ({read_meta(out)["total_researchers"]:,} researchers)')
+    elif args.command == 'count':
+        print(sum(1 for _ in iter_researchers(args.input)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+IRIS RESPONSE CACHE
+===================
+TTL + size bounded cache of serialized responses for /search, /top and /name
+
+Keys are (endpoint, index version, normalized parameters); values are the
+serialized JSON bytes (or a JSON fragment the endpoint wraps with
+per-request fields such as the echoed query). Entries expire after
+ttl seconds; the least recently used are evicted past max_entries or
+max_bytes. Including the index version in the key means a reload can never
+serve stale results; clear() also frees the old version's memory.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_key(endpoint: str, version: str, **params) -> tuple:
+    """Hashable key; params are sorted and None values dropped so defaults match."""
+    return (endpoint, version) + tuple(sorted((k, v) for k, v in params.items() if v is not None))
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 5000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0 and self.ttl > 0
+
+    def get(self, key: tuple):
+        """Cached bytes for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self._remove(key)
+                self.expired += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, body: bytes):
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: tuple):
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def clear(self):
+        """Drop everything (a new index or store version was loaded)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_s': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
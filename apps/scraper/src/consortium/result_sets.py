@@ -0,0 +1,114 @@
+"""
+IRIS RESULT SETS
+================
+Short-lived server-side result sets behind /search and /top cursors
+
+The first page of a search ranks the whole candidate pool; the ranked
+ids (and scores) are kept here so following pages are a slice instead of
+a fresh encode, ANN search and rerank. Keys are (endpoint, index version,
+normalized parameters), as for the response cache.
+
+Cursors are opaque to clients but self-describing: base64url JSON of the
+endpoint, index version, parameters and offset. A worker that doesn't
+hold the set (another uvicorn worker, or evicted) recomputes it from the
+cursor, which yields the same ranking as long as the version matches.
+Each get() extends a set's expiry, so a long export keeps its set alive.
+"""
+import base64
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+def encode_cursor(payload: bytes) -> str:
+    return base64.urlsafe_b64encode(payload).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str) -> bytes:
+    """Raises ValueError if cursor isn't base64url."""
+    try:
+        return base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'malformed cursor: {e}') from None
+
+
+@dataclass
+class ResultSet:
+    version: str
+    ids: np.ndarray                      # /search: row ids, best first; /top: h-ranks
+    semantic: Optional[np.ndarray] = None
+    weighted: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.ids, self.semantic, self.weighted) if a is not None)
+
+
+class ResultSets:
+    def __init__(self, max_sets: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: float = 600.0):
+        self.max_sets = max_sets
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sets = OrderedDict()  # key -> (expires_at, ResultSet)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> Optional[ResultSet]:
+        with self._lock:
+            entry = self._sets.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._sets[key] = (time.monotonic() + self.ttl, entry[1])
+                self._sets.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, result_set: ResultSet):
+        if self.max_sets <= 0 or result_set.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._sets:
+                self._remove(key)
+            self._sets[key] = (time.monotonic() + self.ttl, result_set)
+            self._bytes += result_set.nbytes
+            while len(self._sets) > self.max_sets or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._sets)))
+                self.evictions += 1
+
+    def _remove(self, key: tuple):
+        _, result_set = self._sets.pop(key)
+        self._bytes -= result_set.nbytes
+
+    def clear(self):
+        """Drop everything (a new index version was loaded)."""
+        with self._lock:
+            self._sets.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'sets': len(self._sets),
+                'bytes': self._bytes,
+                'max_sets': self.max_sets,
+                'max_bytes': self.max_bytes,
+                'ttl_s': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -73,16 +73,21 @@ def download_file(file_path: Path, url: str, name: str) -> bool:
         import shutil
         if shutil.which('curl'):
             print(f"  Using curl for download...")
-            cmd = ['curl', '-L', '-o', str(file_path), '--progress-bar']
+            # Download beside the target and rename over it, so a file that is
+            # memory-mapped by the running version is replaced, never rewritten
+            part_path = file_path.with_name(file_path.name + '.part')
+            cmd = ['curl', '-L', '-o', str(part_path), '--progress-bar']
             if github_token:
                 cmd.extend(['-H', f'Authorization: token {github_token}'])
             cmd.extend(['-H', 'Accept: application/octet-stream', url])
             result = subprocess.run(cmd, capture_output=False)
-            if result.returncode == 0 and file_path.exists() and file_path.stat().st_size > 100:
+            if result.returncode == 0 and part_path.exists() and part_path.stat().st_size > 100:
+                os.replace(part_path, file_path)
                 print(f"  Download complete: {file_path.stat().st_size / 1e6:.2f} MB")
                 return True
             else:
                 print(f"  curl download failed")
+                part_path.unlink(missing_ok=True)
                 return False
 
         print(f"  ERROR: curl not available")
@@ -94,11 +99,30 @@ def download_file(file_path: Path, url: str, name: str) -> bool:
         traceback.print_exc()
         return False
 
-from fastapi import FastAPI, Query
+from fastapi import Depends, FastAPI, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ConfigDict, Field
 import faiss
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from researcher_store import ResearcherStore, build_store_from_lookup, is_store
+from ranking import rerank
+from search_filters import search_params
+from search_state import SearchState, files_version
+import name_index
+import json_fragments
+from json_fragments import dumps
+from query_encoder import export_onnx, is_exported, load_encoder
+from query_cache import QueryEmbeddingCache, normalize_query
+from response_cache import ResponseCache, make_key
+from result_sets import ResultSet, ResultSets, decode_cursor, encode_cursor
+from query_batcher import QueryBatcher
+from cpu_pool import CPUPool, PoolBusy
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry
 
 # Paths - support both local and deployed environments
 import os
@@ -107,14 +131,90 @@ INDEX_DIR = BASE_DIR / 'data' / 'consortium' / 'vector_index'
 INDEX_PATH = INDEX_DIR / 'southeast_researchers.index'
 LOOKUP_PATH = INDEX_DIR / 'researcher_lookup.json'
 METADATA_PATH = INDEX_DIR / 'metadata.json'
+STORE_DIR = INDEX_DIR / 'researcher_store'
+NAME_INDEX_DIR = INDEX_DIR / 'name_index'
+FRAGMENTS_DIR = INDEX_DIR / 'json_fragments'
+MODEL_NAME = 'all-MiniLM-L6-v2'
+# Query encoder: torch (sentence-transformers), onnx or onnx-int8 (ONNX Runtime)
+ENCODER_BACKEND = os.getenv('ENCODER_BACKEND', 'torch')
+ONNX_ENCODER_DIR = Path(os.getenv('ONNX_ENCODER_DIR', str(INDEX_DIR / 'onnx_encoder')))
+
+# Query embedding cache (QUERY_CACHE_PATH enables spill-to-disk)
+QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '10000'))
+QUERY_CACHE_PATH = os.getenv('QUERY_CACHE_PATH')
+
+# Cross-request micro-batching of encode + search
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '32'))
+BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', '2'))
+
+# Worker threads for CPU-bound request work (encode, FAISS, column scans)
+CPU_WORKERS = int(os.getenv('CPU_WORKERS', str(os.cpu_count() or 4)))
+CPU_QUEUE_TIMEOUT_S = float(os.getenv('CPU_QUEUE_TIMEOUT_S', '10'))
+
+# Serialized /search, /top and /name responses (0 disables)
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '5000'))
+RESPONSE_CACHE_MB = float(os.getenv('RESPONSE_CACHE_MB', '64'))
+RESPONSE_CACHE_TTL_S = float(os.getenv('RESPONSE_CACHE_TTL_S', '300'))
+
+# Cursor pagination: ranked result sets kept for following pages (sliding TTL)
+RESULT_SET_MAX = int(os.getenv('RESULT_SET_MAX', '1000'))
+RESULT_SET_MB = float(os.getenv('RESULT_SET_MB', '64'))
+RESULT_SET_TTL_S = float(os.getenv('RESULT_SET_TTL_S', '600'))
+# Largest candidate pool /search?depth= may rank for paging
+SEARCH_DEPTH_MAX = int(os.getenv('SEARCH_DEPTH_MAX', '2000'))
+
+# Maximum queries accepted by POST /search/batch
+SEARCH_BATCH_MAX = int(os.getenv('SEARCH_BATCH_MAX', '100'))
+
+# Open the FAISS index memory-mapped and read-only, so uvicorn workers
+# (--workers / WEB_CONCURRENCY) share its pages instead of each holding a copy
+INDEX_MMAP = os.getenv('INDEX_MMAP', '1') == '1'
+# Intra-op threads per worker for the encoder and FAISS (unset = library default);
+# keep workers * threads <= cores when running several workers
+INTRA_OP_THREADS = os.getenv('INTRA_OP_THREADS')
+
+# Hot reload: POST /admin/reload needs X-Admin-Token (endpoint disabled if unset).
+# RELOAD_WATCH_S > 0 also polls metadata.json and reloads when it changes; copy
+# or build the other files first and replace metadata.json last (rename, not rewrite)
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+RELOAD_WATCH_S = float(os.getenv('RELOAD_WATCH_S', '0'))
 
 # Global state
 model = None
-index = None
-lookup = None
-metadata = None
+# Index, store and everything derived from them; replaced as a whole on reload
+state: Optional[SearchState] = None
+query_cache = None
+batcher = None
+cpu_pool = CPUPool(CPU_WORKERS, CPU_QUEUE_TIMEOUT_S)
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, int(RESPONSE_CACHE_MB * 1024 * 1024),
+                               RESPONSE_CACHE_TTL_S)
+result_sets = ResultSets(RESULT_SET_MAX, int(RESULT_SET_MB * 1024 * 1024), RESULT_SET_TTL_S)
+
+# Startup progress: /health reports it, /ready flips once everything is warm
+startup_state = 'loading'  # loading | ready | failed
+startup_error = None
+startup_timings = {}  # phase -> seconds
+
+# Last hot reload, reported by GET /admin/reload
+reload_status = {'status': 'idle'}  # idle | running | succeeded | failed
+reload_lock = threading.Lock()  # one reload at a time
+loaded_fingerprint = None  # source_fingerprint() of the serving state
+
 
+# Prometheus metrics (GET /metrics)
+REQUESTS = registry.counter('iris_requests_total', 'HTTP requests by endpoint and status',
+                            ['method', 'endpoint', 'status'])
+REQUEST_SECONDS = registry.histogram('iris_request_duration_seconds', 'HTTP request latency',
+                                     ['method', 'endpoint'])
+IN_FLIGHT = registry.gauge('iris_requests_in_flight', 'HTTP requests being served')
+STAGE_SECONDS = registry.histogram('iris_stage_seconds',
+                                   'Search pipeline stage latency (filter, encode, ann, rerank, serialize)',
+                                   ['stage'])
 
+
+# Response schemas for the OpenAPI docs. /search, /search/batch, /name, /top
+# and /researcher write the same JSON directly from json_fragments (same
+# field order).
 class SearchResult(BaseModel):
     rank: int
     name: str
@@ -137,42 +237,391 @@ class SearchResponse(BaseModel):
     search_time_ms: float
 
 
+class SearchPage(BaseModel):
+    query: str
+    total_indexed: int
+    results: List[SearchResult]
+    next_cursor: Optional[str]  # pass as ?cursor= for the next page; null on the last
+    search_time_ms: float
+
+
+class ResearcherRecord(BaseModel):
+    """A /top or /researcher/{idx} record: the researcher_store columns.
+
+    Earlier versions returned the raw researcher_lookup.json entry, so
+    dump-specific keys beyond these are no longer included. 'works'
+    repeats works_count under the name openalex_mega dumps used.
+    """
+    name: Optional[str]
+    openalex_id: Optional[str]
+    orcid: Optional[str]
+    institution: Optional[str]
+    h_index: int
+    i10_index: int
+    citations: int
+    works_count: int
+    field: Optional[str]
+    subfield: Optional[str]
+    works: int
+
+
+class TopPage(BaseModel):
+    total_matched: int
+    researchers: List[ResearcherRecord]
+    next_cursor: Optional[str]  # pass as ?cursor= for the next page; null on the last
+
+
+class SearchCursor(BaseModel):
+    """A /search cursor: the first page's parameters, index version and next offset."""
+    model_config = ConfigDict(extra='forbid')
+    v: str
+    offset: int = Field(ge=0)
+    q: str
+    fetch: int = Field(ge=1, le=max(SEARCH_DEPTH_MAX, 500))
+    min_h_index: int = Field(ge=0)
+    institution: Optional[str]
+    h_weight: float = Field(ge=0, le=1)
+    citation_weight: float = Field(ge=0, le=1)
+
+
+class TopCursor(BaseModel):
+    """A /top cursor: filters, index version and next offset."""
+    model_config = ConfigDict(extra='forbid')
+    v: str
+    offset: int = Field(ge=0)
+    institution: Optional[str]
+    field: Optional[str]
+
+
+class BatchQuery(BaseModel):
+    q: str
+    limit: int = Field(20, ge=1, le=100)
+    min_h_index: int = Field(0, ge=0)
+    institution: Optional[str] = None
+    h_weight: float = Field(0.3, ge=0, le=1)
+    citation_weight: float = Field(0.1, ge=0, le=1)
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchQuery] = Field(..., min_length=1, max_length=SEARCH_BATCH_MAX)
+
+
+class BatchSearchResponse(BaseModel):
+    total_indexed: int
+    responses: List[SearchResponse]
+    search_time_ms: float
+
+
+@contextmanager
+def build_lock(name: str):
+    """Serialize downloads and one-time builds across worker processes.
+
+    Every worker runs load_resources(); the first to take a lock downloads
+    or builds, the rest wait and then just open the finished files. Each
+    resource has its own lock so independent downloads still overlap.
+    """
+    try:
+        import fcntl
+    except ImportError:  # Windows: single-process dev server
+        yield
+        return
+    INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    with open(INDEX_DIR / f'.{name}.lock', 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@contextmanager
+def phase(name: str, timings: dict = None):
+    """Time a startup (or reload) phase into startup_timings (or timings)."""
+    timings = startup_timings if timings is None else timings
+    start = time.perf_counter()
+    yield
+    timings[name] = round(time.perf_counter() - start, 3)
+    print(f'  [{name}] {timings[name]:.2f}s')
+
+
+def read_index(path: Path):
+    """Read the FAISS index, memory-mapped when INDEX_MMAP is set.
+
+    Flat indexes can map their vectors in place (IO_FLAG_MMAP_IFC); IVF
+    indexes map their inverted lists (IO_FLAG_MMAP). Either way the pages
+    live in the OS page cache and are shared by every worker process. Falls
+    back to a private in-memory copy if this FAISS build can't map the file.
+    """
+    if INDEX_MMAP:
+        flag_sets = []
+        if hasattr(faiss, 'IO_FLAG_MMAP_IFC'):
+            flag_sets.append(faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+        flag_sets.append(faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        for flags in flag_sets:
+            try:
+                return faiss.read_index(str(path), flags)
+            except RuntimeError:
+                continue
+        print('  FAISS index cannot be memory-mapped, loading a private copy')
+    return faiss.read_index(str(path))
+
+
+def load_model():
+    global model, query_cache
+    with phase('model'):
+        if ENCODER_BACKEND != 'torch':
+            with build_lock('encoder'):  # first worker exports, the rest wait
+                if not is_exported(ONNX_ENCODER_DIR):
+                    print(f'  Exporting {MODEL_NAME} to ONNX (one-time)...')
+                    export_onnx(MODEL_NAME, ONNX_ENCODER_DIR)
+        model = load_encoder(ENCODER_BACKEND, MODEL_NAME, ONNX_ENCODER_DIR,
+                             int(INTRA_OP_THREADS or 0))
+        # Backends differ slightly, so their cached vectors are kept apart
+        cache_key = MODEL_NAME if ENCODER_BACKEND == 'torch' else f'{MODEL_NAME}:{ENCODER_BACKEND}'
+        query_cache = QueryEmbeddingCache(cache_key, QUERY_CACHE_SIZE, QUERY_CACHE_PATH)
+
+
+def load_index(timings: dict):
+    with phase('index_download', timings), build_lock('index'):
+        if not ensure_file_downloaded(INDEX_PATH, FAISS_INDEX_URL, "FAISS index"):
+            raise RuntimeError("Failed to load or download FAISS index")
+    with phase('index_read', timings):
+        return read_index(INDEX_PATH)
+
+
+def store_is_stale() -> bool:
+    """True if the store is missing or older than a (real) lookup beside it."""
+    if not is_store(STORE_DIR):
+        return True
+    if is_lfs_pointer(LOOKUP_PATH):
+        return False
+    return LOOKUP_PATH.stat().st_mtime_ns > (STORE_DIR / 'columns.json').stat().st_mtime_ns
+
+
+def load_data(timings: dict):
+    """(store, names, fragments, metadata), building the store and derived indexes if stale."""
+    with phase('data_download', timings), build_lock('data'):
+        if not is_store(STORE_DIR):
+            if not ensure_file_downloaded(LOOKUP_PATH, LOOKUP_URL, "researcher lookup"):
+                raise RuntimeError("Failed to load or download researcher lookup")
+        if not ensure_file_downloaded(METADATA_PATH, METADATA_URL, "metadata"):
+            raise RuntimeError("Failed to load or download metadata")
+        with open(METADATA_PATH, 'r') as f:
+            metadata = json.load(f)
+
+    with phase('store', timings), build_lock('data'):
+        # Columnar researcher store (rebuilt from the lookup when that is newer)
+        if store_is_stale():
+            print('  Building researcher store from lookup...')
+            build_store_from_lookup(LOOKUP_PATH, STORE_DIR)
+        store = ResearcherStore(STORE_DIR)
+
+    with phase('name_index', timings), build_lock('data'):
+        # Rebuilt if missing or built from another store
+        if not name_index.is_current(NAME_INDEX_DIR, store):
+            print('  Building name index...')
+            name_index.build_name_index(store, NAME_INDEX_DIR)
+        names = name_index.NameIndex(NAME_INDEX_DIR, store)
+
+    with phase('json_fragments', timings), build_lock('data'):
+        # Pre-encoded per-researcher JSON, rebuilt like the name index
+        if not json_fragments.is_current(FRAGMENTS_DIR, store):
+            print('  Building JSON fragments...')
+            json_fragments.build_fragments(store, FRAGMENTS_DIR)
+        fragments = json_fragments.JsonFragments(FRAGMENTS_DIR)
+    return store, names, fragments, metadata
+
+
+def download_release(timings: dict):
+    """Fetch index, lookup and metadata from GitHub Releases, metadata last."""
+    with phase('download', timings), build_lock('index'), build_lock('data'):
+        for path, url, name in ((INDEX_PATH, FAISS_INDEX_URL, "FAISS index"),
+                                (LOOKUP_PATH, LOOKUP_URL, "researcher lookup"),
+                                (METADATA_PATH, METADATA_URL, "metadata")):
+            if not download_file(path, url, name):
+                raise RuntimeError(f"Failed to download {name}")
+
+
+def source_fingerprint():
+    """(size, mtime) of metadata.json, which builders and downloads write last."""
+    stat = METADATA_PATH.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def load_state(timings: dict) -> SearchState:
+    """Load the index and researcher data (in parallel) into a new SearchState."""
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        index_future = pool.submit(load_index, timings)
+        data_future = pool.submit(load_data, timings)
+        index = index_future.result()  # re-raise the first failure
+        store, names, fragments, metadata = data_future.result()
+    # Store columns, name index and fragments are mmapped; only the derived views are per-worker
+    with phase('views', timings):
+        return SearchState(index, store, names, fragments, metadata,
+                           files_version([INDEX_PATH, METADATA_PATH], store))
+
+
 def load_resources():
-    global model, index, lookup, metadata
+    """Load model, FAISS index and researcher data in parallel.
 
+    The three are independent (the model load is mostly library import and
+    weights, the index is a download plus mmap, the data is downloads and
+    one-time builds), so startup takes about as long as the slowest.
+    """
+    global state, loaded_fingerprint
     print('Loading resources...')
+    if INTRA_OP_THREADS:
+        faiss.omp_set_num_threads(int(INTRA_OP_THREADS))
+
+    with phase('load'), ThreadPoolExecutor(max_workers=2) as pool:
+        model_future = pool.submit(load_model)
+        new_state = load_state(startup_timings)
+        model_future.result()
+    new_state.validate(model.get_sentence_embedding_dimension())
+    print(f'  Search setting: {new_state.tuning or "exact"}')
+
+    print(f'  Loaded {len(new_state.store):,} researchers')
+    print(f'  Index has {new_state.index.ntotal:,} vectors')
+    print(f'  Index version {new_state.version}')
+    state = new_state
+    loaded_fingerprint = source_fingerprint()
+
+
+def reload_resources(download: bool, timings: dict):
+    """Build, validate and warm a new SearchState, then swap it in.
+
+    Runs in a background thread while the current state keeps serving.
+    Requests pin the state they started with (VersionMiddleware), so the
+    swap is a single reference assignment: in-flight requests finish on the
+    old version, new ones see the new one. Any failure leaves the current
+    state in place and is reported by GET /admin/reload.
+    """
+    global state, loaded_fingerprint
+    print(f"Reloading resources ({reload_status['reason']})...")
+    try:
+        with phase('reload', timings):
+            if download:
+                download_release(timings)
+            new_state = load_state(timings)
+            new_state.validate(model.get_sentence_embedding_dimension())
+            warm_up(new_state, timings)
+        previous = state
+        state = new_state
+        loaded_fingerprint = source_fingerprint()
+        response_cache.clear()  # old version's entries can never hit again
+        result_sets.clear()
+        reload_status.update(status='succeeded', previous_version=previous.version if previous else None)
+        print(f'  Index version {previous.version if previous else None} -> {new_state.version}')
+    except Exception as e:
+        reload_status.update(status='failed', error=f'{type(e).__name__}: {e}')
+        import traceback
+        traceback.print_exc()
+    finally:
+        reload_status['finished'] = datetime.now().isoformat()
+        reload_lock.release()
+
+
+def start_reload(download: bool = False, reason: str = 'admin') -> bool:
+    """Start a background reload; False if one is already running."""
+    if not reload_lock.acquire(blocking=False):
+        return False
+    timings = {}
+    reload_status.clear()
+    reload_status.update(status='running', reason=reason, download=download,
+                         started=datetime.now().isoformat(), finished=None,
+                         error=None, previous_version=None, timings=timings)
+    threading.Thread(target=reload_resources, args=(download, timings),
+                     name='iris-reload', daemon=True).start()
+    return True
+
+
+def watch_files():
+    """Reload when metadata.json changes (a builder finished, or another worker downloaded).
+
+    The change must be seen unchanged on two consecutive polls, and a
+    version whose reload failed is not retried until the file changes again.
+    """
+    pending = attempted = None
+    while True:
+        time.sleep(RELOAD_WATCH_S)
+        if startup_state != 'ready' or reload_lock.locked():
+            continue
+        try:
+            current = source_fingerprint()
+        except OSError:  # between a builder's unlink and rename
+            continue
+        if current in (loaded_fingerprint, attempted):
+            pending = None
+        elif current != pending:
+            pending = current
+        elif start_reload(reason='file change'):
+            attempted = current
+            pending = None
+
+
+def warm_up(s: SearchState, timings: dict = None):
+    """Run one query end to end so the first real request isn't the slow one.
+
+    Covers the model's first forward pass, FAISS's first search over the
+    mapped lists, and rerank over the store columns. Bypasses the query
+    cache so its counters only reflect real traffic.
+    """
+    with phase('warm_up', timings):
+        vec = model.encode(['machine learning for medical imaging'], convert_to_numpy=True)
+        vec = np.ascontiguousarray(vec, dtype=np.float32)
+        faiss.normalize_L2(vec)
+        D, I = ann_search(vec, fetch_limit_for(20), None, s)
+        rank_candidates(s, I[0], D[0], 20, 0, None, 0.3, 0.1)
+
+
+def start_up():
+    """Load and warm everything; runs in a thread while the server already answers /health."""
+    global startup_state, startup_error
+    try:
+        load_resources()
+        warm_up(state)
+        startup_state = 'ready'
+        print(f'Ready in {sum(startup_timings[p] for p in ("load", "warm_up")):.2f}s')
+    except Exception as e:
+        startup_state = 'failed'
+        startup_error = f'{type(e).__name__}: {e}'
+        import traceback
+        traceback.print_exc()
+
+
+def encode_queries(queries: List[str]) -> np.ndarray:
+    """Normalized float32 query vectors (n x dim); cache misses share one model call."""
+    with STAGE_SECONDS.time('encode'):
+        vecs = [query_cache.get(q) for q in queries]
+        # Repeats of one query within a batch are encoded once
+        missing = {}  # normalized text -> rows
+        for i, vec in enumerate(vecs):
+            if vec is None:
+                missing.setdefault(normalize_query(queries[i]), []).append(i)
+        if missing:
+            rows = list(missing.values())
+            start = time.perf_counter()
+            encoded = model.encode([queries[r[0]] for r in rows], convert_to_numpy=True).astype('float32')
+            faiss.normalize_L2(encoded)
+            per_query = (time.perf_counter() - start) / len(rows)
+            for r, vec in zip(rows, encoded):
+                query_cache.put(queries[r[0]], vec, per_query)
+                for i in r:
+                    vecs[i] = vec
+        return np.vstack(vecs)
 
-    # Load model
-    print('  Loading embedding model...')
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-
-    # Ensure all LFS files are downloaded
-    print('  Checking data files...')
-    if not ensure_file_downloaded(INDEX_PATH, FAISS_INDEX_URL, "FAISS index"):
-        raise RuntimeError("Failed to load or download FAISS index")
-    if not ensure_file_downloaded(LOOKUP_PATH, LOOKUP_URL, "researcher lookup"):
-        raise RuntimeError("Failed to load or download researcher lookup")
-    if not ensure_file_downloaded(METADATA_PATH, METADATA_URL, "metadata"):
-        raise RuntimeError("Failed to load or download metadata")
-
-    # Load FAISS index
-    print('  Loading FAISS index...')
-    index = faiss.read_index(str(INDEX_PATH))
-    index.nprobe = 50  # Search more clusters for better recall
-
-    # Load lookup
-    print('  Loading researcher lookup...')
-    with open(LOOKUP_PATH, 'r', encoding='utf-8') as f:
-        lookup = json.load(f)
-    # Convert string keys to int
-    lookup = {int(k): v for k, v in lookup.items()}
-
-    # Load metadata
-    with open(METADATA_PATH, 'r') as f:
-        metadata = json.load(f)
-    
-    print(f'  Loaded {len(lookup):,} researchers')
-    print('Resources ready!')
+
+def fetch_limit_for(limit: int) -> int:
+    """ANN candidates fetched for reranking a page of limit results."""
+    return min(limit * 10, 500)
+
+
+def ann_search(query_vecs: np.ndarray, k: int, params, s: SearchState):
+    """s.index.search over one or more query rows (params=None: unfiltered)."""
+    if params is None:
+        params = search_params(s.index, **s.tuning)
+    with STAGE_SECONDS.time('ann'):
+        return s.index.search(query_vecs, k, params=params)
 
 
 # Create FastAPI app
@@ -191,9 +640,157 @@ app.add_middleware(
 )
 
 
+class MetricsMiddleware:
+    """Per-endpoint request counts and latency, plus the in-flight gauge.
+
+    Plain ASGI rather than BaseHTTPMiddleware to keep per-request overhead
+    low. Endpoints are labelled by route template ("/researcher/{idx}"),
+    so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            IN_FLIGHT.dec()
+            route = scope.get('route')
+            endpoint = getattr(route, 'path', 'unmatched')
+            REQUEST_SECONDS.observe(scope['method'], endpoint, value=time.perf_counter() - start)
+            REQUESTS.inc(scope['method'], endpoint, status)
+
+
+app.add_middleware(MetricsMiddleware)
+
+
+class VersionMiddleware:
+    """Pin each request to the serving SearchState and report its version.
+
+    The state is read once when the request arrives and stored in the
+    scope; endpoints get it through Depends(pinned_state), so a reload
+    swapping the global mid-request can't mix two versions in one response.
+    Every response (including errors) carries X-Index-Version.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        pinned = state
+        if scope['type'] != 'http' or pinned is None:
+            return await self.app(scope, receive, send)
+        scope['iris.state'] = pinned
+        header = (b'x-index-version', pinned.version.encode())
+
+        async def send_version(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = list(message.get('headers', [])) + [header]
+            await send(message)
+
+        await self.app(scope, receive, send_version)
+
+
+app.add_middleware(VersionMiddleware)
+
+
+@registry.collect
+def component_metrics():
+    """Cache, pool, batcher and startup state, read from their stats() at scrape time."""
+    yield 'iris_ready', 'gauge', 'Startup finished and warmed up', int(startup_state == 'ready')
+    if state is not None:
+        yield 'iris_index_info', 'gauge', 'Serving index version', 1, {'version': state.version}
+        yield 'iris_indexed_researchers', 'gauge', 'Researchers in the serving index', len(state.store)
+    yield 'iris_reload_running', 'gauge', 'A hot reload is in progress', int(reload_lock.locked())
+    for phase_name, seconds in list(startup_timings.items()):
+        yield 'iris_startup_phase_seconds', 'gauge', 'Startup time per phase', seconds, {'phase': phase_name}
+    if query_cache is not None:
+        c = query_cache.stats()
+        yield 'iris_query_cache_hits_total', 'counter', 'Query embedding cache memory hits', c['hits']
+        yield 'iris_query_cache_disk_hits_total', 'counter', 'Query embedding cache disk hits', c['disk_hits']
+        yield 'iris_query_cache_misses_total', 'counter', 'Query embedding cache misses', c['misses']
+        yield 'iris_query_cache_evictions_total', 'counter', 'Query embedding cache evictions', c['evictions']
+        yield 'iris_query_cache_hit_ratio', 'gauge', 'Query embedding cache hit ratio', c['hit_ratio']
+        yield 'iris_query_cache_size', 'gauge', 'Query embeddings held in memory', c['size']
+    r = response_cache.stats()
+    yield 'iris_response_cache_hits_total', 'counter', 'Response cache hits', r['hits']
+    yield 'iris_response_cache_misses_total', 'counter', 'Response cache misses', r['misses']
+    yield 'iris_response_cache_hit_ratio', 'gauge', 'Response cache hit ratio', r['hit_ratio']
+    yield 'iris_response_cache_bytes', 'gauge', 'Bytes of cached responses', r['bytes']
+    rs = result_sets.stats()
+    yield 'iris_result_sets', 'gauge', 'Cursor result sets held', rs['sets']
+    yield 'iris_result_sets_bytes', 'gauge', 'Bytes of cursor result sets', rs['bytes']
+    yield 'iris_result_set_misses_total', 'counter', 'Cursor pages that had to re-rank', rs['misses']
+    p = cpu_pool.stats()
+    yield 'iris_cpu_pool_in_flight', 'gauge', 'CPU pool tasks running', p['in_flight']
+    yield 'iris_cpu_pool_waiting', 'gauge', 'CPU pool tasks waiting for a worker', p['waiting']
+    yield 'iris_cpu_pool_completed_total', 'counter', 'CPU pool tasks completed', p['completed']
+    yield 'iris_cpu_pool_rejected_total', 'counter', 'CPU pool tasks rejected (503)', p['rejected']
+    if batcher is not None:
+        b = batcher.stats()
+        yield 'iris_batcher_batches_total', 'counter', 'Encode+search micro-batches run', b['batches']
+        yield 'iris_batcher_queries_total', 'counter', 'Queries served through the batcher', b['queries']
+
+
+class NotReady(Exception):
+    """A data endpoint was called before startup finished."""
+
+
+def ensure_ready():
+    if startup_state != 'ready':
+        raise NotReady(startup_error or 'Search index is still loading')
+
+
+async def pinned_state(request: Request) -> SearchState:
+    """The SearchState this request was pinned to on arrival (503 until ready)."""
+    ensure_ready()
+    return request.scope.get('iris.state') or state
+
+
 @app.on_event("startup")
 async def startup():
-    load_resources()
+    global batcher
+    batcher = QueryBatcher(encode_queries, ann_search, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS,
+                           run=cpu_pool.run, max_concurrent=cpu_pool.max_workers)
+    batcher.start()
+    # Load in the background so /health answers during the (slow) first start
+    threading.Thread(target=start_up, name='iris-startup', daemon=True).start()
+    if RELOAD_WATCH_S > 0:
+        threading.Thread(target=watch_files, name='iris-watch', daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if batcher:
+        await batcher.stop()
+    cpu_pool.shutdown()
+    if query_cache is not None:
+        query_cache.close()  # persist the hot set for the next start
+
+
+@app.exception_handler(PoolBusy)
+async def pool_busy(request: Request, exc: PoolBusy):
+    """All CPU workers stayed busy past the queue timeout."""
+    return JSONResponse(status_code=503, content={"error": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(NotReady)
+async def not_ready(request: Request, exc: NotReady):
+    return JSONResponse(status_code=503, content={"error": str(exc), "status": startup_state},
+                        headers={"Retry-After": "5"})
 
 
 @app.get("/")
@@ -201,25 +798,97 @@ async def root():
     return {
         "service": "IRIS Research Search API",
         "version": "1.0.0",
-        "total_researchers": len(lookup) if lookup else 0,
-        "status": "ready" if index else "loading"
+        "total_researchers": len(state.store) if state else 0,
+        "index_version": state.version if state else None,
+        "status": startup_state
     }
 
 
 @app.get("/health")
 async def health():
-    """Health check endpoint for Railway."""
-    return {"status": "healthy", "index_loaded": index is not None}
+    """Liveness: the process is up. 503 only if startup failed and it should be restarted."""
+    body = {
+        "status": {"loading": "starting", "ready": "healthy", "failed": "unhealthy"}[startup_state],
+        "ready": startup_state == 'ready',
+        "index_loaded": state is not None,
+        "index_version": state.version if state else None,
+        "startup_timings": startup_timings,
+    }
+    if startup_state == 'failed':
+        body["error"] = startup_error
+        return JSONResponse(status_code=503, content=body)
+    return body
 
 
-@app.get("/search", response_model=SearchResponse)
+@app.get("/ready")
+async def ready():
+    """Readiness for Railway's healthcheck: 200 only once loaded and warmed up."""
+    body = {"status": startup_state, "startup_timings": startup_timings}
+    if startup_state != 'ready':
+        if startup_error:
+            body["error"] = startup_error
+        return JSONResponse(status_code=503, content=body, headers={"Retry-After": "5"})
+    return body
+
+
+class ReloadRequest(BaseModel):
+    # Re-fetch the index, lookup and metadata from GitHub Releases first;
+    # otherwise reload whatever is now on disk (e.g. written by a builder)
+    download: bool = False
+
+
+def admin_denied(token: Optional[str]) -> Optional[JSONResponse]:
+    if not ADMIN_TOKEN:
+        return JSONResponse(status_code=403, content={"error": "Admin endpoints are disabled (ADMIN_TOKEN unset)"})
+    import hmac
+    if not hmac.compare_digest((token or '').encode(), ADMIN_TOKEN.encode()):
+        return JSONResponse(status_code=401, content={"error": "Invalid X-Admin-Token"})
+    return None
+
+
+@app.post("/admin/reload", status_code=202)
+async def admin_reload(request: Optional[ReloadRequest] = None,
+                       x_admin_token: Optional[str] = Header(None)):
+    """
+    Reload the index, lookup and metadata without downtime.
+
+    The new version is built, validated and warmed in the background while
+    the current one keeps serving, then swapped in. Poll GET /admin/reload
+    for the outcome; a failed reload leaves the current version serving.
+    """
+    denied = admin_denied(x_admin_token)
+    if denied:
+        return denied
+    if startup_state != 'ready':
+        return JSONResponse(status_code=409, content={"error": "Startup has not finished",
+                                                      "status": startup_state})
+    if not start_reload((request or ReloadRequest()).download, reason='admin'):
+        return JSONResponse(status_code=409, content={"error": "A reload is already running",
+                                                      **reload_status})
+    return {**reload_status, "serving": state.summary()}
+
+
+@app.get("/admin/reload")
+async def admin_reload_status(x_admin_token: Optional[str] = Header(None)):
+    """Progress or outcome of the last reload, and the version being served"""
+    denied = admin_denied(x_admin_token)
+    if denied:
+        return denied
+    return {**reload_status, "serving": state.summary() if state else None}
+
+
+@app.get("/search", response_model=SearchPage)
 async def search(
-    q: str = Query(..., description="Search query"),
-    limit: int = Query(20, ge=1, le=100, description="Max results"),
+    q: Optional[str] = Query(None, description="Search query (omit when passing cursor)"),
+    limit: int = Query(20, ge=1, le=100, description="Max results (per page)"),
     min_h_index: int = Query(0, ge=0, description="Minimum h-index filter"),
     institution: Optional[str] = Query(None, description="Filter by institution (partial match)"),
     h_weight: float = Query(0.3, ge=0, le=1, description="Weight for h-index in ranking"),
-    citation_weight: float = Query(0.1, ge=0, le=1, description="Weight for citations in ranking")
+    citation_weight: float = Query(0.1, ge=0, le=1, description="Weight for citations in ranking"),
+    depth: Optional[int] = Query(None, ge=1, le=SEARCH_DEPTH_MAX,
+                                 description="Results ranked for paging (default limit * 10, at most 500)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    s: SearchState = Depends(pinned_state)
 ):
     """
     Semantic search for researchers with weighted ranking.
@@ -228,193 +897,337 @@ async def search(
     weighted_score = semantic_score * (1 - h_weight - citation_weight) 
                    + normalized_h_index * h_weight
                    + normalized_citations * citation_weight
+
+    The first page ranks the whole candidate pool (depth); next_cursor
+    pages through it, `limit` results at a time, without searching again.
+    """
+    start = time.time()
+    if cursor is not None:
+        return await search_page(s, cursor, limit, start)
+    if q is None:
+        return JSONResponse(status_code=422, content={"error": "q is required (or pass a cursor)"})
+
+    # Cached "total_indexed", "results" and "next_cursor" for these normalized parameters
+    key = make_key('/search', s.version, q=normalize_query(q), limit=limit, depth=depth,
+                   min_h_index=min_h_index, institution=institution.lower() if institution else None,
+                   h_weight=h_weight, citation_weight=citation_weight)
+    fragment = response_cache.get(key)
+    cache_status = 'HIT' if fragment is not None else 'MISS'
+    if fragment is None:
+        c = SearchCursor(v=s.version, offset=0, q=q, fetch=max(depth, limit) if depth else fetch_limit_for(limit),
+                         min_h_index=min_h_index, institution=institution,
+                         h_weight=h_weight, citation_weight=citation_weight)
+        ranked = await rank_search(s, c)
+        next_cursor = cursor_after(c, limit, len(ranked))
+        if next_cursor:
+            result_sets.put(search_set_key(c), ranked)
+        results = await cpu_pool.run(render_page, s, ranked, 0, limit)
+        fragment = b'"total_indexed":%d,"results":%s,"next_cursor":%s' % (
+            len(s.store), results, dumps(next_cursor))
+        response_cache.put(key, fragment)
+
+    elapsed = (time.time() - start) * 1000
+    # Same field order as SearchPage
+    body = b'{"query":%s,%s,"search_time_ms":%s}' % (
+        json.dumps(q, ensure_ascii=False).encode(), fragment, repr(round(elapsed, 2)).encode())
+    return Response(body, media_type='application/json', headers={'X-Cache': cache_status})
+
+
+async def search_page(s: SearchState, cursor: str, limit: int, start: float) -> Response:
+    """A following page: a slice of the first page's result set."""
+    c = read_cursor(SearchCursor, cursor)
+    if c is None:
+        return JSONResponse(status_code=400, content={"error": "Invalid cursor"})
+    if c.v != s.version:
+        return cursor_gone(c.v, s)
+
+    ranked = result_sets.get(search_set_key(c))
+    cache_status = 'HIT' if ranked is not None else 'MISS'
+    if ranked is None:
+        # Evicted, or issued by another worker: the same version ranks the same way
+        ranked = await rank_search(s, c)
+        result_sets.put(search_set_key(c), ranked)
+    results = await cpu_pool.run(render_page, s, ranked, c.offset, limit)
+
+    elapsed = (time.time() - start) * 1000
+    body = b'{"query":%s,"total_indexed":%d,"results":%s,"next_cursor":%s,"search_time_ms":%s}' % (
+        json.dumps(c.q, ensure_ascii=False).encode(), len(s.store), results,
+        dumps(cursor_after(c, c.offset + limit, len(ranked))), repr(round(elapsed, 2)).encode())
+    return Response(body, media_type='application/json', headers={'X-Cache': cache_status})
+
+
+def read_cursor(model, cursor: str):
+    """Decode an opaque cursor into model (SearchCursor / TopCursor), None if invalid."""
+    try:
+        return model.model_validate_json(decode_cursor(cursor))
+    except ValueError:  # includes pydantic's ValidationError
+        return None
+
+
+def cursor_after(c, offset: int, total: int) -> Optional[str]:
+    """Cursor for the page starting at offset, None past the end."""
+    if offset >= total:
+        return None
+    return encode_cursor(c.model_copy(update={'offset': offset}).model_dump_json().encode())
+
+
+def cursor_gone(version: str, s: SearchState) -> JSONResponse:
+    return JSONResponse(status_code=410, content={
+        "error": "The index was reloaded since this cursor was issued; repeat the request",
+        "cursor_version": version, "index_version": s.version})
+
+
+def search_set_key(c: SearchCursor) -> tuple:
+    return make_key('/search', c.v, q=normalize_query(c.q), fetch=c.fetch, min_h_index=c.min_h_index,
+                    institution=c.institution.lower() if c.institution else None,
+                    h_weight=c.h_weight, citation_weight=c.citation_weight)
+
+
+async def rank_search(s: SearchState, c: SearchCursor) -> ResultSet:
+    """Encode, ANN search and rerank c's whole candidate pool (c.fetch hits)."""
+    # Push filters into the ANN search as an id bitmap
+    institution_codes = s.store.match_category('institution', c.institution) if c.institution else None
+    selection = await cpu_pool.run(select_filters, s, institution_codes, c.min_h_index)
+
+    # Encode and search (batched with concurrent requests)
+    if selection is None:
+        D, I = await batcher.search(c.q, c.fetch, context=s)
+    elif selection[1]:
+        D, I = await batcher.search(c.q, c.fetch, search_params(s.index, *selection, **s.tuning),
+                                    context=s)
+    else:
+        D, I = np.zeros(0, dtype='float32'), np.zeros(0, dtype='int64')
+
+    return await cpu_pool.run(
+        rerank_candidates, s, I, D, c.fetch, c.min_h_index, institution_codes,
+        c.h_weight, c.citation_weight)
+
+
+def select_filters(s: SearchState, institution_codes, min_h_index: int):
+    with STAGE_SECONDS.time('filter'):
+        return s.filters.select(institution_codes, min_h_index)
+
+
+def rerank_candidates(s: SearchState, I, D, limit, min_h_index, institution_codes, h_weight,
+                      citation_weight) -> ResultSet:
+    """Rerank one row of FAISS hits; the best limit as a ResultSet."""
+    with STAGE_SECONDS.time('rerank'):
+        ids, semantic, weighted = rerank(
+            s.store, I, D, limit,
+            min_h_index=min_h_index,
+            institution_codes=institution_codes,
+            h_weight=h_weight,
+            citation_weight=citation_weight,
+        )
+        return ResultSet(s.version, ids, semantic, weighted)
+
+
+def render_page(s: SearchState, ranked: ResultSet, offset: int, limit: int) -> bytes:
+    """JSON array of SearchResults for ranked[offset:offset + limit].
+
+    Joined from the pre-encoded fragments: the results come from our own
+    store, so no per-result model is built or validated.
+    """
+    end = offset + limit
+    with STAGE_SECONDS.time('serialize'):
+        return s.fragments.search_results(ranked.ids[offset:end], ranked.semantic[offset:end],
+                                          ranked.weighted[offset:end], offset + 1)
+
+
+def rank_candidates(s: SearchState, I, D, limit, min_h_index, institution_codes, h_weight,
+                    citation_weight) -> bytes:
+    """Rerank one row of FAISS hits; the JSON array of its SearchResults."""
+    ranked = rerank_candidates(s, I, D, limit, min_h_index, institution_codes, h_weight,
+                               citation_weight)
+    return render_page(s, ranked, 0, limit)
+
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch(request: BatchSearchRequest, s: SearchState = Depends(pinned_state)):
+    """
+    Run many searches in one call (grant matching, offline evaluation).
+
+    All queries are encoded in one model call; queries sharing the same
+    filters and limit share one multi-row FAISS search at the k /search
+    would use, so each row sees the candidates /search returns for it
+    (for IVF, HNSW and flat alike); each row is reranked with its own
+    weights. Every response reports the whole batch's time.
     """
-    import time
     start = time.time()
     
-    # Get more candidates for filtering/reranking
-    fetch_limit = min(limit * 10, 500)
-    
-    # Encode query
-    query_vec = model.encode([q], convert_to_numpy=True).astype('float32')
-    faiss.normalize_L2(query_vec)
-    
-    # Search
-    D, I = index.search(query_vec, fetch_limit)
+    results = await cpu_pool.run(run_batch_search, s, request.queries)
     
-    # Build results with filtering and weighted ranking
-    candidates = []
+    elapsed = repr(round((time.time() - start) * 1000, 2)).encode()
+    # Same field order as BatchSearchResponse / SearchResponse
+    with STAGE_SECONDS.time('serialize'):
+        responses = b','.join(
+            b'{"query":%s,"total_indexed":%d,"results":%s,"search_time_ms":%s}' % (
+                dumps(bq.q), len(s.store), r, elapsed)
+            for bq, r in zip(request.queries, results))
+        body = b'{"total_indexed":%d,"responses":[%s],"search_time_ms":%s}' % (
+            len(s.store), responses, elapsed)
+    return Response(body, media_type='application/json')
+
+
+def run_batch_search(s: SearchState, queries: List[BatchQuery]) -> List[bytes]:
+    """JSON array of SearchResults per query."""
+    vecs = encode_queries([bq.q for bq in queries])
     
-    # Get max values for normalization
-    max_h = max((lookup.get(int(i), {}).get('h_index', 0) for i in I[0]), default=1) or 1
-    max_c = max((lookup.get(int(i), {}).get('citations', 0) for i in I[0]), default=1) or 1
+    # Group rows by filter and fetch depth so each group is one index.search
+    # call at the k /search would use (HNSW candidates depend on k)
+    groups = {}
+    for i, bq in enumerate(queries):
+        codes = s.store.match_category('institution', bq.institution) if bq.institution else None
+        key = (None if codes is None else tuple(codes.tolist()), bq.min_h_index,
+               fetch_limit_for(bq.limit))
+        groups.setdefault(key, []).append(i)
     
-    for idx, score in zip(I[0], D[0]):
-        r = lookup.get(int(idx), {})
-        if not r:
+    results = [b'[]' for _ in queries]
+    for (codes, min_h_index, fetch_limit), rows in groups.items():
+        institution_codes = None if codes is None else np.asarray(codes, dtype=np.int32)
+        selection = select_filters(s, institution_codes, min_h_index)
+        if selection is not None and not selection[1]:
             continue
+        params = search_params(s.index, *selection, **s.tuning) if selection is not None else None
         
-        h = r.get('h_index', 0)
-        c = r.get('citations', 0)
-        inst = r.get('institution', '')
-        
-        # Apply filters
-        if h < min_h_index:
-            continue
-        if institution and institution.lower() not in inst.lower():
-            continue
-        
-        # Calculate weighted score
-        semantic_weight = 1.0 - h_weight - citation_weight
-        normalized_h = h / max_h
-        normalized_c = c / max_c
-        
-        weighted = (score * semantic_weight + 
-                   normalized_h * h_weight + 
-                   normalized_c * citation_weight)
-        
-        candidates.append({
-            'idx': idx,
-            'semantic_score': float(score),
-            'weighted_score': float(weighted),
-            'researcher': r
-        })
-    
-    # Sort by weighted score
-    candidates.sort(key=lambda x: -x['weighted_score'])
-    
-    # Build response
-    results = []
-    for rank, c in enumerate(candidates[:limit], 1):
-        r = c['researcher']
-        results.append(SearchResult(
-            rank=rank,
-            name=r.get('name', ''),
-            institution=r.get('institution', ''),
-            field=r.get('field'),
-            subfield=r.get('subfield'),
-            h_index=r.get('h_index', 0),
-            citations=r.get('citations', 0),
-            works_count=r.get('works_count', 0),
-            openalex_id=r.get('openalex_id'),
-            orcid=r.get('orcid'),
-            semantic_score=c['semantic_score'],
-            weighted_score=c['weighted_score']
-        ))
-    
-    elapsed = (time.time() - start) * 1000
-    
-    return SearchResponse(
-        query=q,
-        total_indexed=len(lookup),
-        results=results,
-        search_time_ms=round(elapsed, 2)
-    )
+        D, I = ann_search(np.ascontiguousarray(vecs[rows]), fetch_limit, params, s)
+        for row, i in enumerate(rows):
+            bq = queries[i]
+            results[i] = rank_candidates(
+                s, I[row], D[row], bq.limit, bq.min_h_index,
+                institution_codes, bq.h_weight, bq.citation_weight)
+    return results
 
 
 @app.get("/stats")
-async def stats():
+async def stats(s: SearchState = Depends(pinned_state)):
     """Get index statistics"""
-    if not lookup:
+    # Precomputed aggregate: a constant-time read
+    return {**s.stats.summary(), "index_metadata": s.metadata, "index_version": s.version}
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Query embedding and response cache hit/miss counters"""
+    if not query_cache:
         return {"error": "Index not loaded"}
-    
-    researchers = list(lookup.values())
-    
-    # Institution counts
-    inst_counts = {}
-    for r in researchers:
-        inst = r.get('institution', 'Unknown')
-        inst_counts[inst] = inst_counts.get(inst, 0) + 1
-    
-    # Top institutions
-    top_inst = sorted(inst_counts.items(), key=lambda x: -x[1])[:15]
-    
-    # h-index distribution
-    h_indices = [r.get('h_index', 0) for r in researchers]
-    
-    return {
-        "total_researchers": len(researchers),
-        "total_citations": sum(r.get('citations', 0) for r in researchers),
-        "avg_h_index": round(np.mean(h_indices), 2),
-        "max_h_index": max(h_indices),
-        "h_index_percentiles": {
-            "50th": int(np.percentile(h_indices, 50)),
-            "75th": int(np.percentile(h_indices, 75)),
-            "90th": int(np.percentile(h_indices, 90)),
-            "99th": int(np.percentile(h_indices, 99)),
-        },
-        "top_institutions": dict(top_inst),
-        "index_metadata": metadata
-    }
+    return {**query_cache.stats(), "responses": response_cache.stats(),
+            "result_sets": result_sets.stats()}
+
+
+@app.get("/batcher/stats")
+async def batcher_stats():
+    """Query micro-batching counters"""
+    return batcher.stats() if batcher else {"error": "Index not loaded"}
 
 
-@app.get("/researcher/{idx}")
-async def get_researcher(idx: int):
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of request, stage and component metrics"""
+    return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/pool/stats")
+async def pool_stats():
+    """CPU worker pool gauges and counters"""
+    return cpu_pool.stats()
+
+
+@app.get("/researcher/{idx}", responses={200: {"model": ResearcherRecord}})
+async def get_researcher(idx: int, s: SearchState = Depends(pinned_state)):
     """Get researcher by index"""
-    if idx not in lookup:
+    if idx not in s.store:
         return {"error": "Researcher not found"}
-    return lookup[idx]
+    return Response(s.fragments.record(idx), media_type='application/json')
 
 
 @app.get("/name")
 async def search_by_name(
     q: str = Query(..., description="Name to search for"),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    s: SearchState = Depends(pinned_state)
 ):
-    """Search researchers by name (handles first + last, partial matches)"""
-    terms = q.lower().split()
-    matches = []
+    """Search researchers by name (first + last, token prefixes, accent-insensitive)"""
+    # Names are matched on folded tokens, so the key uses them too
+    key = make_key('/name', s.version, q=' '.join(name_index.tokenize(q)), limit=limit)
+    fragment = response_cache.get(key)
+    cache_status = 'HIT' if fragment is not None else 'MISS'
+    if fragment is None:
+        fragment = await cpu_pool.run(find_by_name, s, q, limit)
+        response_cache.put(key, fragment)
     
-    for idx, r in lookup.items():
-        name = r.get('name', '').lower()
-        
-        # Check if ALL search terms appear in name
-        if all(term in name for term in terms):
-            matches.append({
-                'name': r.get('name', ''),
-                'institution': r.get('institution', ''),
-                'field': r.get('field'),
-                'subfield': r.get('subfield'),
-                'h_index': r.get('h_index', 0),
-                'citations': r.get('citations', 0),
-                'works_count': r.get('works_count', 0),
-                'openalex_id': r.get('openalex_id'),
-                'orcid': r.get('orcid'),
-            })
-    
-    # Sort by h-index descending
-    matches.sort(key=lambda x: -x['h_index'])
-    
-    return {
-        'query': q,
-        'count': len(matches[:limit]),
-        'results': matches[:limit]
-    }
+    body = b'{"query":%s,%s}' % (json.dumps(q, ensure_ascii=False).encode(), fragment)
+    return Response(body, media_type='application/json', headers={'X-Cache': cache_status})
+
 
+def find_by_name(s: SearchState, q: str, limit: int) -> bytes:
+    """The "count" and "results" members of a /name response."""
+    # Every query term must prefix a name token ("calhoun v" -> Vince Calhoun)
+    ids = s.names.search(q, limit)
+    with STAGE_SECONDS.time('serialize'):
+        return b'"count":%d,"results":%s' % (len(ids), s.fragments.summaries(ids))
 
-@app.get("/top")
+
+@app.get("/top", responses={200: {"model": TopPage}})
 async def top_researchers(
-    limit: int = Query(50, ge=1, le=500),
+    limit: int = Query(50, ge=1, le=500, description="Max researchers (per page)"),
     institution: Optional[str] = Query(None),
-    field: Optional[str] = Query(None)
+    field: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    s: SearchState = Depends(pinned_state)
 ):
     """Get top researchers by h-index"""
-    candidates = []
-    
-    for idx, r in lookup.items():
-        if institution and institution.lower() not in r.get('institution', '').lower():
-            continue
-        if field and field.lower() not in (r.get('field', '') + ' ' + r.get('subfield', '')).lower():
-            continue
-        candidates.append(r)
+    if cursor is not None:
+        c = read_cursor(TopCursor, cursor)
+        if c is None:
+            return JSONResponse(status_code=400, content={"error": "Invalid cursor"})
+        if c.v != s.version:
+            return cursor_gone(c.v, s)
+        return Response(await cpu_pool.run(top_by_h_index, s, c, limit),
+                        media_type='application/json')
     
-    # Sort by h-index
-    candidates.sort(key=lambda x: -x.get('h_index', 0))
+    key = make_key('/top', s.version, limit=limit,
+                   institution=institution.lower() if institution else None,
+                   field=field.lower() if field else None)
+    body = response_cache.get(key)
+    cache_status = 'HIT' if body is not None else 'MISS'
+    if body is None:
+        c = TopCursor(v=s.version, offset=0, institution=institution, field=field)
+        body = await cpu_pool.run(top_by_h_index, s, c, limit)
+        response_cache.put(key, body)
+    return Response(body, media_type='application/json', headers={'X-Cache': cache_status})
+
+
+def top_by_h_index(s: SearchState, c: TopCursor, limit: int) -> bytes:
+    if c.offset == 0:
+        ids, total = top_selection(s, c, limit)
+    else:
+        ranked = result_sets.get(top_set_key(c))
+        if ranked is None:
+            ranked = ResultSet(s.version, top_selection(s, c))
+            result_sets.put(top_set_key(c), ranked)
+        ids, total = s.views.h_order[ranked.ids[c.offset:c.offset + limit]], len(ranked)
     
-    return {
-        "total_matched": len(candidates),
-        "researchers": candidates[:limit]
-    }
+    with STAGE_SECONDS.time('serialize'):
+        return b'{"total_matched":%d,"researchers":%s,"next_cursor":%s}' % (
+            total, s.fragments.records(ids), dumps(cursor_after(c, c.offset + limit, total)))
+
+
+def top_selection(s: SearchState, c: TopCursor, limit: int = None):
+    """RankedViews.top() for c's filters, or with no limit the whole rank selection."""
+    codes = dict(
+        institution_codes=s.store.match_category('institution', c.institution) if c.institution else None,
+        field_codes=s.store.match_category('field', c.field) if c.field else None,
+        subfield_codes=s.store.match_category('subfield', c.field) if c.field else None,
+    )
+    if limit is None:
+        return s.views.select(**codes)
+    return s.views.top(limit, **codes)
+
+
+def top_set_key(c: TopCursor) -> tuple:
+    return make_key('/top', c.v, institution=c.institution.lower() if c.institution else None,
+                    field=c.field.lower() if c.field else None)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,97 @@
+"""
+IRIS SEARCH FILTERS
+===================
+Filter pushdown for the FAISS search in search_api
+
+Filters are turned into a packed id bitmap and handed to FAISS as an
+IDSelector, so the ANN search only returns researchers that pass them:
+    - one bitmap per institution, OR-ed for partial-name matches
+    - researcher ids sorted by h_index; min_h_index is a prefix of that order
+"""
+import math
+from functools import lru_cache
+
+import numpy as np
+import faiss
+
+# Cap on filter-scaled HNSW efSearch; the graph walk grows with it
+MAX_EF_SEARCH = 2048
+
+
+class FilterIndex:
+    """Precomputed id bitmaps over a ResearcherStore."""
+
+    def __init__(self, store):
+        self.count = len(store)
+        h = np.asarray(store.column('h_index'))
+        # Row ids by h_index descending; h_sorted is the matching h values
+        self.h_order = store.h_order()
+        self.h_sorted = h[self.h_order]
+
+        codes = np.asarray(store.column('institution'))
+        self.institution_bitmaps = [
+            np.packbits(codes == code, bitorder='little')
+            for code in range(len(store.vocab['institution']))
+        ]
+        self.institution_counts = np.bincount(codes[codes >= 0],
+                                              minlength=len(self.institution_bitmaps))
+        self.h_bitmap = lru_cache(maxsize=128)(self._h_bitmap)
+
+    def h_count(self, min_h_index: int) -> int:
+        """Number of researchers with h_index >= min_h_index."""
+        return int(np.searchsorted(-self.h_sorted, -min_h_index, side='right'))
+
+    def _h_bitmap(self, min_h_index: int) -> np.ndarray:
+        mask = np.zeros(self.count, dtype=bool)
+        mask[self.h_order[:self.h_count(min_h_index)]] = True
+        return np.packbits(mask, bitorder='little')
+
+    def select(self, institution_codes=None, min_h_index: int = 0):
+        """Bitmap and match count for the filters, or None if nothing is filtered."""
+        bitmap = None
+        count = self.count
+        if institution_codes is not None:
+            if len(institution_codes) == 0:
+                return np.zeros((self.count + 7) // 8, dtype=np.uint8), 0
+            bitmap = np.bitwise_or.reduce([self.institution_bitmaps[c] for c in institution_codes])
+            count = int(self.institution_counts[institution_codes].sum())
+        if min_h_index > 0:
+            h_bitmap = self.h_bitmap(min_h_index)
+            if bitmap is None:
+                bitmap = h_bitmap
+                count = self.h_count(min_h_index)
+            else:
+                bitmap = bitmap & h_bitmap
+                count = int(np.unpackbits(bitmap, count=self.count, bitorder='little').sum())
+        if bitmap is None:
+            return None
+        return bitmap, count
+
+
+def search_params(index, bitmap=None, count: int = 0, nprobe: int = 50, ef_search: int = None):
+    """SearchParameters for index.search, restricted to bitmap if given.
+
+    For IVF indexes nprobe (and for HNSW efSearch) is scaled up by the
+    filter's selectivity so a selective filter still reaches enough
+    matching vectors to fill a page; non-matching ids are skipped before
+    any distance is computed.
+    """
+    selector = None
+    if bitmap is not None:
+        # n is the bitmap's length in bytes; ids past it are rejected
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+    scale = index.ntotal / count if selector is not None and count else 1
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        params = faiss.SearchParametersIVF(nprobe=min(math.ceil(nprobe * scale), ivf.nlist))
+    elif hasattr(index, 'hnsw'):
+        ef = ef_search or index.hnsw.efSearch
+        params = faiss.SearchParametersHNSW(efSearch=min(math.ceil(ef * scale), max(ef, MAX_EF_SEARCH)))
+    else:
+        params = faiss.SearchParameters()
+    if selector is not None:
+        params.sel = selector
+    # The selector wraps the bitmap buffer and params wraps the selector
+    params._keepalive = (selector, bitmap)
+    return params
@@ -0,0 +1,83 @@
+"""
+IRIS SEARCH STATE
+=================
+One loaded version of the searchable data, swapped atomically on reload
+
+A SearchState bundles everything derived from one set of data files: the
+FAISS index, researcher store, name index, JSON fragments, filter bitmaps,
+ranked views, /stats aggregate, metadata and tuned search setting. search_api holds the
+current state in a single global; each request pins the state it started
+with, so a reload that replaces the global never changes data under an
+in-flight request. The old state is freed once its last request finishes
+(its memory maps stay valid even after the files are replaced).
+"""
+import hashlib
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+from index_builder import apply_search_setting, search_setting
+from ranked_views import RankedViews
+from search_filters import FilterIndex, search_params
+
+
+def files_version(paths, store) -> str:
+    """Short fingerprint of the data files (size + mtime) and the store build."""
+    parts = []
+    for path in paths:
+        stat = Path(path).stat()
+        parts.append(f'{Path(path).name}:{stat.st_size}:{stat.st_mtime_ns}')
+    parts.append(store.build_id)
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:12]
+
+
+class SearchState:
+    def __init__(self, index, store, names, fragments, metadata: dict, version: str):
+        self.index = index
+        self.store = store
+        self.names = names
+        self.fragments = fragments
+        self.metadata = metadata
+        self.version = version
+        self.loaded_at = datetime.now().isoformat()
+
+        self.filters = FilterIndex(store)
+        self.views = RankedViews(store)
+        self.stats = store.load_stats()
+        # Tuned by the index builder; older indexes fall back to nprobe=50
+        self.tuning = search_setting(metadata)
+        apply_search_setting(index, self.tuning)
+
+    def validate(self, dim: int):
+        """Raise ValueError unless index, store and name index agree and a search works."""
+        if self.index.d != dim:
+            raise ValueError(f'index dimension {self.index.d} != encoder dimension {dim}')
+        if self.index.ntotal != len(self.store):
+            raise ValueError(f'index has {self.index.ntotal:,} vectors but store has '
+                             f'{len(self.store):,} researchers')
+        if self.names.count != len(self.store):
+            raise ValueError('name index was built from a different store')
+        if len(self.fragments) != len(self.store):
+            raise ValueError('JSON fragments were built from a different store')
+        if len(self.store) and self.metadata.get('num_vectors') not in (None, len(self.store)):
+            raise ValueError(f"metadata says {self.metadata['num_vectors']:,} vectors, "
+                             f'store has {len(self.store):,}')
+
+        probe = np.random.default_rng(0).normal(size=(1, dim)).astype('float32')
+        faiss.normalize_L2(probe)
+        D, I = self.index.search(probe, min(10, self.index.ntotal),
+                                 params=search_params(self.index, **self.tuning))
+        hits = I[0][I[0] >= 0]
+        if len(self.store) and (not len(hits) or hits.max() >= len(self.store)):
+            raise ValueError('probe search returned no hits or ids outside the store')
+
+    def summary(self) -> dict:
+        return {
+            'version': self.version,
+            'loaded_at': self.loaded_at,
+            'researchers': len(self.store),
+            'vectors': self.index.ntotal,
+            'search_setting': self.tuning,
+        }
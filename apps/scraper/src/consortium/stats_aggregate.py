@@ -0,0 +1,148 @@
+"""
+IRIS STATS AGGREGATE
+====================
+Precomputed aggregates behind /stats
+
+Institution counts, citation and h-index sums and an h-index histogram
+are enough to answer /stats in constant time, including the
+percentiles (the histogram reproduces np.percentile's linear
+interpolation exactly). The aggregate is built record by record alongside
+the researcher store (or from its columns for older stores) and saved as
+stats.json in the store directory. Stores are immutable, so it is only
+rebuilt with the store, never updated in place. Missing and empty
+institutions are both counted as 'Unknown'.
+"""
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+STATS_VERSION = 2
+STATS_FILE = 'stats.json'
+
+
+def _h(r: dict) -> int:
+    return int(r.get('h_index') or 0)
+
+
+def _citations(r: dict) -> int:
+    return int(r.get('citations') or 0)
+
+
+def _institution_name(name) -> str:
+    return name or 'Unknown'
+
+
+def _institution(r: dict) -> str:
+    return _institution_name(r.get('institution'))
+
+
+class StatsAggregate:
+    def __init__(self):
+        self.total = 0
+        self.total_citations = 0
+        self.h_sum = 0
+        self.h_hist = []
+        self.institution_counts = {}
+        self._summary = None
+
+    # -- record-by-record construction ----------------------------------------
+
+    def add(self, r: dict):
+        h = _h(r)
+        if h >= len(self.h_hist):
+            self.h_hist.extend([0] * (h + 1 - len(self.h_hist)))
+        self.h_hist[h] += 1
+        self.h_sum += h
+        self.total += 1
+        self.total_citations += _citations(r)
+        inst = _institution(r)
+        self.institution_counts[inst] = self.institution_counts.get(inst, 0) + 1
+        self._summary = None
+
+    # -- bulk construction and persistence -----------------------------------
+
+    @classmethod
+    def from_store(cls, store) -> 'StatsAggregate':
+        """Compute the aggregate from a ResearcherStore's columns in one pass."""
+        agg = cls()
+        h = np.asarray(store.column('h_index'))
+        codes = np.asarray(store.column('institution'))
+        agg.total = len(store)
+        agg.total_citations = int(np.asarray(store.column('citations')).sum())
+        agg.h_sum = int(h.sum())
+        agg.h_hist = np.bincount(h).tolist() if len(h) else []
+        counts = np.bincount(codes + 1, minlength=len(store.vocab['institution']) + 1)
+        for code, count in enumerate(counts):
+            if count:
+                # Same folding as add(): a null code and '' both count as 'Unknown'
+                name = _institution_name(store.vocab['institution'][code - 1] if code else None)
+                agg.institution_counts[name] = agg.institution_counts.get(name, 0) + int(count)
+        return agg
+
+    def save(self, path: Path, build_id: str = ''):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': STATS_VERSION,
+                'store_build_id': build_id,
+                'total': self.total,
+                'total_citations': self.total_citations,
+                'h_sum': self.h_sum,
+                'h_hist': self.h_hist,
+                'institution_counts': self.institution_counts,
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path, build_id: str = ''):
+        """Saved aggregate, or None if missing or saved for another store build."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != STATS_VERSION or data.get('store_build_id') != build_id:
+            return None
+        agg = cls()
+        agg.total = data['total']
+        agg.total_citations = data['total_citations']
+        agg.h_sum = data['h_sum']
+        agg.h_hist = data['h_hist']
+        agg.institution_counts = data['institution_counts']
+        return agg
+
+    # -- queries -------------------------------------------------------------
+
+    def _h_at(self, k: int, cumulative: np.ndarray) -> int:
+        """h-index at position k of the sorted h-index list."""
+        return int(np.searchsorted(cumulative, k, side='right'))
+
+    def percentile(self, q: float) -> float:
+        """np.percentile(h_indices, q) with the default linear method."""
+        cumulative = np.cumsum(self.h_hist)
+        pos = q / 100 * (self.total - 1)
+        lo = math.floor(pos)
+        a = self._h_at(lo, cumulative)
+        b = self._h_at(min(lo + 1, self.total - 1), cumulative)
+        t = pos - lo
+        # Same lerp as numpy, which interpolates from the nearer end
+        if t >= 0.5:
+            return b - (b - a) * (1 - t)
+        return a + (b - a) * t
+
+    def summary(self, top_n: int = 15) -> dict:
+        """The /stats payload (without index metadata); cached until the next update."""
+        if self._summary is None:
+            top_inst = sorted(self.institution_counts.items(), key=lambda x: -x[1])[:top_n]
+            self._summary = {
+                "total_researchers": self.total,
+                "total_citations": self.total_citations,
+                "avg_h_index": round(self.h_sum / self.total, 2) if self.total else 0.0,
+                "max_h_index": len(self.h_hist) - 1 if self.h_hist else 0,
+                "h_index_percentiles": {
+                    f"{q}th": int(self.percentile(q)) if self.total else 0
+                    for q in (50, 75, 90, 99)
+                },
+                "top_institutions": dict(top_inst),
+            }
+        return self._summary
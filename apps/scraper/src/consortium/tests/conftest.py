@@ -0,0 +1,22 @@
+"""Shared fixtures for the consortium search and index-build tests.
+
+The modules under test import each other by bare name (they run as
+scripts from this directory), so the directory goes on sys.path here.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    """Build a ResearcherStore from a list of record dicts."""
+    from researcher_store import ResearcherStore, build_store
+
+    def make(records, name='researcher_store'):
+        build_store(iter(records), tmp_path / name)
+        return ResearcherStore(tmp_path / name)
+    return make
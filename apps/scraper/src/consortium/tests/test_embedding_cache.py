@@ -0,0 +1,84 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from embedding_cache import KEY_BYTES, EmbeddingCache, encode_cached, text_key
+
+DIM = 8
+
+
+class HashEncoder:
+    """Deterministic stand-in for a SentenceTransformer; records what it encodes."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts, show_progress_bar=False, convert_to_numpy=True):
+        self.encoded += texts
+        return np.stack([np.frombuffer(hashlib.sha256(t.encode()).digest()[:DIM * 4],
+                                       dtype=np.float32) for t in texts])
+
+
+def texts(n, prefix='text'):
+    return [f'{prefix} {i % 37}' if i % 5 == 0 else f'{prefix} {i}' for i in range(n)]
+
+
+def test_cached_encoding_matches_plain_encoding(tmp_path):
+    corpus = texts(300)
+    expected = encode_cached(HashEncoder(), corpus, 'm:torch', batch_size=64)
+
+    cache = EmbeddingCache(tmp_path / 'cache', DIM)
+    model = HashEncoder()
+    np.testing.assert_array_equal(encode_cached(model, corpus, 'm:torch', cache, batch_size=64),
+                                  expected)
+    assert sorted(model.encoded) == sorted(set(corpus))  # each distinct text once
+
+    # A reopened cache serves the whole corpus; only new texts are encoded
+    cache = EmbeddingCache(tmp_path / 'cache', DIM)
+    model = HashEncoder()
+    refreshed = corpus[:250] + texts(20, prefix='new')
+    out = encode_cached(model, refreshed, 'm:torch', cache, batch_size=64)
+    np.testing.assert_array_equal(out[:250], expected[:250])
+    assert sorted(model.encoded) == sorted(set(texts(20, prefix='new')))
+    assert cache.stats()['hits'] == 250
+
+
+def test_model_keys_do_not_mix(tmp_path):
+    cache = EmbeddingCache(tmp_path / 'cache', DIM)
+    encode_cached(HashEncoder(), ['a', 'b'], 'm:torch', cache)
+    model = HashEncoder()
+    encode_cached(model, ['a', 'b'], 'm:onnx-int8', cache)
+    assert model.encoded == ['a', 'b']
+    assert text_key('m:torch', 'a') != text_key('m:onnx-int8', 'a')
+
+
+def test_partial_tail_is_dropped_on_open(tmp_path):
+    cache = EmbeddingCache(tmp_path / 'cache', DIM)
+    encode_cached(HashEncoder(), texts(10), 'm', cache)
+    # Vectors written without their keys, as after a crash mid-append
+    with open(cache.vectors_path, 'ab') as f:
+        f.write(np.ones((3, DIM), dtype=np.float32).tobytes()[:-5])
+    reopened = EmbeddingCache(tmp_path / 'cache', DIM)
+    assert len(reopened) == 10
+    assert reopened.vectors_path.stat().st_size == 10 * DIM * 4
+    assert reopened.keys_path.stat().st_size == 10 * KEY_BYTES
+
+
+def test_dimension_change_starts_over(tmp_path):
+    encode_cached(HashEncoder(), texts(10), 'm', EmbeddingCache(tmp_path / 'cache', DIM))
+    assert len(EmbeddingCache(tmp_path / 'cache', DIM * 2)) == 0
+
+
+def test_compact_keeps_only_the_given_keys(tmp_path):
+    cache = EmbeddingCache(tmp_path / 'cache', DIM)
+    corpus = texts(40)
+    vectors = encode_cached(HashEncoder(), corpus, 'm', cache)
+    keep = [text_key('m', t) for t in corpus[10:20]]
+    cache.compact(keep + keep[:2] + [b'\0' * KEY_BYTES])
+    for c in (cache, EmbeddingCache(tmp_path / 'cache', DIM)):
+        assert len(c) == 10
+        np.testing.assert_array_equal(c.vectors(c.lookup(keep)), vectors[10:20])
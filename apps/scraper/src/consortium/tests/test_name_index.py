@@ -0,0 +1,52 @@
+import pytest
+
+from name_index import NameIndex, build_name_index, is_current, tokenize
+
+NAMES = [
+    ("Mary O'Brien", 12), ('Łukasz Łęcka', 30), ('Søren Kierkegaard', 7),
+    ('Brien Mary', 30), ('José Álvarez-Núñez', 3), ('Marie Curie', 50),
+    ('Иван Петров', 9), ('李 明', 4), ('Mary Ann Bríen', 12), ('Anna Maryland', 1),
+]
+
+
+@pytest.fixture
+def built(make_store, tmp_path):
+    store = make_store([{'name': n, 'h_index': h} for n, h in NAMES])
+    build_name_index(store, tmp_path / 'name_index')
+    return store, NameIndex(tmp_path / 'name_index', store)
+
+
+def brute_force(query, limit):
+    terms = tokenize(query)
+    hits = [i for i, (name, _) in enumerate(NAMES)
+            if all(any(t.startswith(q) for t in tokenize(name)) for q in terms)]
+    return sorted(hits, key=lambda i: -NAMES[i][1])[:limit] if terms else []
+
+
+@pytest.mark.parametrize('text, tokens', [
+    ("O'Brien-Łęcka", ['o', 'brien', 'lecka']),
+    ('Søren Æsir', ['soren', 'aesir']),
+    ('Иван Петров', ['иван', 'петров']),
+    ('snake_case  2nd', ['snake', 'case', '2nd']),
+    ('', []),
+])
+def test_tokenize(text, tokens):
+    assert tokenize(text) == tokens
+
+
+@pytest.mark.parametrize('query', [
+    'mary', 'MARY o', 'brien', 'bri mar', 'lukasz', 'soren', 'alvarez nunez',
+    'иван', '李', 'mar', 'ma an', 'curie x', "o'", '', '--',
+])
+@pytest.mark.parametrize('limit', [1, 3, 20])
+def test_search_matches_brute_force(built, query, limit):
+    _, index = built
+    assert index.search(query, limit).tolist() == brute_force(query, limit)
+
+
+def test_index_is_tied_to_its_store(built, make_store, tmp_path):
+    store, _ = built
+    assert is_current(tmp_path / 'name_index', store)
+    other = make_store([{'name': 'Someone Else', 'h_index': 1}], name='other_store')
+    assert not is_current(tmp_path / 'name_index', other)
+    assert not is_current(tmp_path / 'missing', store)
@@ -0,0 +1,10 @@
+import pytest
+
+pytest.importorskip('sentence_transformers')
+
+from parallel_encoder import check_worker_parity
+from query_encoder import DEFAULT_MODEL
+
+
+def test_worker_count_does_not_change_vectors():
+    assert check_worker_parity('torch', DEFAULT_MODEL, workers=3)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from bench_search import legacy_rerank, rerank_differences, synthetic_store
+from ranking import rerank, top_k
+
+
+@pytest.fixture(scope='module')
+def synthetic():
+    return synthetic_store(3000, seed=4)
+
+
+@pytest.mark.parametrize('values', [
+    [0.5, 0.9, 0.1, 0.9, 0.3],
+    [1.0] * 8,
+    [0.2, 0.2, 0.7, 0.2, 0.7, 0.1, 0.2],
+])
+@pytest.mark.parametrize('k', [1, 2, 3, 10])
+def test_top_k_matches_stable_sort(values, k):
+    values = np.array(values)
+    expected = sorted(range(len(values)), key=lambda i: -values[i])[:k]
+    assert top_k(values, k).tolist() == expected
+
+
+@pytest.mark.parametrize('min_h_index, institution', [
+    (0, None), (15, None), (0, 'georgia'), (5, 'emory'), (0, 'nowhere'),
+])
+def test_rerank_matches_legacy_loop(synthetic, min_h_index, institution):
+    store, records = synthetic
+    rng = np.random.default_rng(min_h_index)
+    ids = rng.choice(len(store), size=300, replace=False).astype(np.int64)
+    ids[-4:] = -1  # empty FAISS slots
+    # float32 with exact ties, as FAISS returns D
+    D = np.round(np.sort(rng.uniform(0.2, 0.8, size=300))[::-1], 3).astype(np.float32)
+    params = dict(min_h_index=min_h_index, h_weight=0.3, citation_weight=0.1)
+    codes = store.match_category('institution', institution) if institution else None
+
+    legacy_all = legacy_rerank(records, ids, D, len(ids), institution=institution, **params)
+    got_ids, got_sem, got_w = rerank(store, ids, D, 40, institution_codes=codes, **params)
+    assert rerank_differences(legacy_all, got_ids, got_w, 40) == 0
+    assert np.all(np.diff(got_w) <= 0)
+    assert got_sem.tolist() == [float(D[ids.tolist().index(i)]) for i in got_ids]
+
+
+def test_rerank_differences_rejects_a_real_reordering(synthetic):
+    store, records = synthetic
+    ids = np.arange(50, dtype=np.int64)
+    D = np.linspace(0.9, 0.1, 50).astype(np.float32)
+    legacy_all = legacy_rerank(records, ids, D, 50, 0, None, 0.3, 0.1)
+    got_ids, _, got_w = rerank(store, ids, D, 10)
+    with pytest.raises(AssertionError):
+        rerank_differences(legacy_all, got_ids[::-1].copy(), got_w[::-1], 10)
@@ -0,0 +1,60 @@
+import json
+import random
+
+import pytest
+
+import researcher_stream
+from researcher_stream import convert, iter_chunks, iter_researchers, read_meta
+
+
+def dump(n, seed=0):
+    rng = random.Random(seed)
+    researchers = [{'name': f'Résearcher {i} "{rng.random()}"', 'h_index': rng.randint(0, 99),
+                    'citations': rng.randint(0, 10 ** 6), 'score': rng.random() * 1e6,
+                    'topics': ['neuro', '量子', None, True][:rng.randint(0, 4)],
+                    'ids': {'openalex': f'A{i}'}} for i in range(n)]
+    return {'timestamp': '2026-01-14T04:19:11', 'total_researchers': n,
+            'researchers': researchers, 'by_institution': {'Emory': n}, 'by_state': {}}
+
+
+@pytest.fixture(params=[7, 64, 1 << 20], ids=['read7', 'read64', 'read1M'])
+def read_size(request, monkeypatch):
+    # Small reads split strings, escapes and numbers across buffer boundaries
+    monkeypatch.setattr(researcher_stream, 'READ_SIZE', request.param)
+
+
+@pytest.mark.parametrize('n', [0, 1, 50])
+@pytest.mark.parametrize('dump_kwargs', [{}, {'indent': 2}, {'ensure_ascii': False},
+                                         {'separators': (',', ':')}])
+def test_legacy_parser_matches_json_load(tmp_path, read_size, n, dump_kwargs):
+    data = dump(n, seed=n)
+    path = tmp_path / 'southeast_r1r2.json'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_kwargs)
+    with open(path, encoding='utf-8') as f:
+        expected = json.load(f)
+
+    meta = {}
+    assert list(iter_researchers(path, meta)) == expected.pop('researchers')
+    assert meta == expected
+    assert read_meta(path) == expected
+
+
+@pytest.mark.parametrize('text', ['{"researchers": [{"a": 1}', '{"researchers": [1 2]}',
+                                  '[{"a": 1}]', ''])
+def test_legacy_parser_rejects_malformed_dumps(tmp_path, text):
+    path = tmp_path / 'bad.json'
+    path.write_text(text, encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(iter_researchers(path))
+
+
+def test_convert_round_trips_through_ndjson(tmp_path):
+    data = dump(25)
+    legacy = tmp_path / 'southeast_r1r2.json'
+    legacy.write_text(json.dumps(data), encoding='utf-8')
+    out = convert(legacy)
+    assert out.suffix == '.ndjson'
+    assert list(iter_researchers(out)) == data['researchers']
+    assert read_meta(out) == {k: v for k, v in data.items() if k != 'researchers'}
+    assert [len(c) for c in iter_chunks(out, 10)] == [10, 10, 5]
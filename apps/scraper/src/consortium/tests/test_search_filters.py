@@ -0,0 +1,49 @@
+import random
+
+import numpy as np
+import pytest
+
+from search_filters import FilterIndex
+
+INSTITUTIONS = ['Emory University', 'Georgia Tech', 'Georgia State University', '']
+
+
+@pytest.fixture(scope='module')
+def records():
+    rng = random.Random(3)
+    return [{'name': f'R{i}', 'institution': rng.choice(INSTITUTIONS),
+             'h_index': rng.randint(0, 40)} for i in range(1003)]
+
+
+@pytest.fixture
+def filters(make_store, records):
+    store = make_store(records)
+    return store, FilterIndex(store)
+
+
+def selected(bitmap, count):
+    return set(np.flatnonzero(np.unpackbits(bitmap, count=count, bitorder='little')).tolist())
+
+
+@pytest.mark.parametrize('institution', [None, 'georgia', 'emory', 'tech', 'nowhere'])
+@pytest.mark.parametrize('min_h_index', [0, 1, 20, 40, 41])
+def test_select_matches_brute_force(filters, records, institution, min_h_index):
+    store, index = filters
+    codes = store.match_category('institution', institution) if institution else None
+    result = index.select(codes, min_h_index)
+    if institution is None and min_h_index == 0:
+        assert result is None
+        return
+    expected = {i for i, r in enumerate(records)
+                if r['h_index'] >= min_h_index
+                and (institution is None or institution in r['institution'].lower())}
+    bitmap, count = result
+    assert len(bitmap) == (len(records) + 7) // 8
+    assert selected(bitmap, len(records)) == expected
+    assert count == len(expected)
+
+
+@pytest.mark.parametrize('min_h_index', [0, 1, 10, 40, 41])
+def test_h_count(filters, records, min_h_index):
+    _, index = filters
+    assert index.h_count(min_h_index) == sum(r['h_index'] >= min_h_index for r in records)
@@ -0,0 +1,53 @@
+import random
+
+import numpy as np
+import pytest
+
+from researcher_store import STATS_FILE
+from stats_aggregate import StatsAggregate
+
+
+def records(n, seed=0):
+    rng = random.Random(seed)
+    institutions = ['Emory University', 'Georgia Tech', '', None]
+    return [{'name': f'R{i}', 'institution': rng.choice(institutions),
+             'h_index': int(rng.expovariate(1 / 12)), 'citations': rng.randint(0, 5000)}
+            for i in range(n)]
+
+
+def test_build_and_from_store_agree(make_store):
+    store = make_store(records(500))
+    built = store.load_stats()
+    rebuilt = StatsAggregate.from_store(store)
+    assert built.summary() == rebuilt.summary()
+    assert built.institution_counts == rebuilt.institution_counts
+
+
+def test_missing_and_empty_institutions_are_unknown(make_store):
+    store = make_store([{'name': 'a', 'institution': ''}, {'name': 'b', 'institution': None},
+                        {'name': 'c'}, {'name': 'd', 'institution': 'Emory University'}])
+    for stats in (store.load_stats(), StatsAggregate.from_store(store)):
+        assert stats.institution_counts == {'Unknown': 3, 'Emory University': 1}
+
+
+@pytest.mark.parametrize('n', [1, 2, 7, 500])
+def test_percentiles_match_numpy(n):
+    rs = records(n, seed=n)
+    stats = StatsAggregate()
+    for r in rs:
+        stats.add(r)
+    h = np.array([r['h_index'] for r in rs])
+    for q in (0, 25, 50, 75, 90, 99, 100):
+        assert stats.percentile(q) == pytest.approx(np.percentile(h, q))
+    summary = stats.summary()
+    assert summary['total_researchers'] == n
+    assert summary['max_h_index'] == h.max()
+    assert summary['total_citations'] == sum(r['citations'] for r in rs)
+
+
+def test_saved_stats_are_tied_to_the_store_build(make_store, tmp_path):
+    store = make_store(records(20))
+    path = store.path / STATS_FILE
+    assert StatsAggregate.load(path, store.build_id) is not None
+    assert StatsAggregate.load(path, 'another-build') is None
+    assert StatsAggregate.load(tmp_path / 'missing.json', store.build_id) is None
@@ -0,0 +1,133 @@
+"""
+IRIS VECTOR SIDECAR
+===================
+Raw corpus vectors and an id map saved next to every FAISS index
+
+FAISS only stores vectors in a form the index needs (IVF lists, PQ codes,
+an HNSW graph), so getting them back means index.reconstruct, which needs
+a direct map on IVF and is lossy for PQ. The index pipeline therefore
+writes the vectors it indexed beside the index:
+
+    <index stem>.vectors.npy    float32 (ntotal, d), L2-normalized; row i is FAISS id i
+    <index stem>.ids.json       {"version", "index_file", "count", "dim", "id_field", "ids"}
+                                ids[i] is row i's id_field value (e.g. its openalex_id)
+
+Readers memory-map the .npy and slice it without copying
+(scripts/iris_faiss_merge.py imports these helpers; only extraction needs
+faiss). For indexes built before sidecars existed, extract_vectors() pulls
+every vector out with one bulk reconstruct_n call:
+    python vector_sidecar.py extract data/vectors/iris_researchers.index
+"""
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+SIDECAR_VERSION = 1
+
+
+def sidecar_paths(index_path: Path):
+    """(vectors .npy, ids .json) paths for an index file."""
+    index_path = Path(index_path)
+    stem = index_path.with_suffix('')
+    return (stem.with_name(stem.name + '.vectors.npy'),
+            stem.with_name(stem.name + '.ids.json'))
+
+
+def write_sidecar(index_path: Path, vectors, ids: list, id_field: str = 'openalex_id'):
+    """Save vectors (an array, or an existing .npy to copy) and ids for index_path.
+
+    Both files go through a temp name and a rename, ids last.
+    """
+    vectors_path, ids_path = sidecar_paths(index_path)
+    tmp = str(vectors_path) + '.tmp'
+    if isinstance(vectors, (str, Path)):
+        shutil.copyfile(vectors, tmp)
+    else:
+        with open(tmp, 'wb') as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+    os.replace(tmp, vectors_path)
+    write_ids(index_path, ids, np.load(vectors_path, mmap_mode='r').shape, id_field)
+
+
+def write_ids(index_path: Path, ids: list, shape: tuple, id_field: str = 'openalex_id'):
+    """Save the ids.json half of a sidecar whose vectors (of shape) are already written."""
+    ids_path = sidecar_paths(index_path)[1]
+    if len(ids) != shape[0]:
+        raise ValueError(f'{len(ids):,} ids for {shape[0]:,} vectors')
+    with open(str(ids_path) + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'version': SIDECAR_VERSION, 'index_file': Path(index_path).name,
+                   'count': shape[0], 'dim': shape[1], 'id_field': id_field, 'ids': ids},
+                  f, ensure_ascii=False)
+    os.replace(str(ids_path) + '.tmp', ids_path)
+
+
+def load_sidecar(index_path: Path):
+    """(ids, read-only memmap of vectors), or None if the sidecar is missing or incomplete."""
+    vectors_path, ids_path = sidecar_paths(index_path)
+    if not vectors_path.exists() or not ids_path.exists():
+        return None
+    with open(ids_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    vectors = np.load(vectors_path, mmap_mode='r')
+    if (meta.get('version') != SIDECAR_VERSION or vectors.shape != (meta['count'], meta['dim'])
+            or len(meta['ids']) != vectors.shape[0]):
+        return None
+    return meta['ids'], vectors
+
+
+def extract_vectors(index) -> np.ndarray:
+    """All vectors of a FAISS index in id order, in one reconstruct_n call.
+
+    IVF indexes get a direct map first. PQ indexes return their decoded
+    (approximate) vectors.
+    """
+    import faiss
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        if isinstance(ivf, faiss.IndexIVFPQ):
+            print('  Warning: IVF-PQ stores codes; extracted vectors are approximate')
+        ivf.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Raw-vector sidecars for FAISS indexes')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('extract', help='Write a sidecar for an index built without one')
+    p.add_argument('index', type=Path)
+    p.add_argument('--ids-from', type=Path,
+                   help='iris_metadata.json (list) or researcher_lookup.json (dict) for the id map')
+    p.add_argument('--id-field', default='openalex_id')
+    p = sub.add_parser('info', help='Show an index sidecar')
+    p.add_argument('index', type=Path)
+    args = parser.parse_args()
+
+    if args.command == 'extract':
+        import faiss
+        index = faiss.read_index(str(args.index))
+        vectors = extract_vectors(index)
+        ids = list(range(index.ntotal))
+        if args.ids_from:
+            with open(args.ids_from, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            if isinstance(records, dict):
+                records = [records[k] for k in sorted(records, key=int)]
+            ids = [r.get(args.id_field) for r in records]
+        write_sidecar(args.index, vectors, ids, args.id_field if args.ids_from else 'row')
+        print(f'Wrote {sidecar_paths(args.index)[0]} {vectors.shape}')
+    else:
+        loaded = load_sidecar(args.index)
+        if loaded is None:
+            print(f'No sidecar for {args.index}')
+        else:
+            ids, vectors = loaded
+            print(f'{sidecar_paths(args.index)[0]}: {vectors.shape} {vectors.dtype}, '
+                  f'{len(ids):,} ids (first: {ids[:3]})')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,10 +4,15 @@ Creates unified search index for cross-matching
 """
 
 import json
+import sys
 import numpy as np
 from pathlib import Path
 from datetime import datetime, timezone
 
+# Sidecar layout and helpers shared with the IRIS index pipeline
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "scraper" / "src" / "consortium"))
+from vector_sidecar import extract_vectors, load_sidecar, sidecar_paths, write_ids
+
 try:
     import faiss
     HAS_FAISS = True
@@ -15,6 +20,8 @@ except ImportError:
     HAS_FAISS = False
     print("Warning: FAISS not installed. Will export vectors only.")
 
+NORMALIZE_CHUNK = 65536  # rows normalized at a time in the merged memmap
+
 # Paths
 IRIS_DATA = Path("C:/dev/research/project-iris/data/vectors")
 SYNAPSE_DATA = Path("C:/dev/research/project-iris/data/synapse/dedupe")
@@ -45,45 +52,56 @@ def load_synapse_embeddings() -> tuple[list[str], np.ndarray]:
     return [], np.array([])
 
 def load_iris_embeddings() -> tuple[list[str], np.ndarray]:
-    """Load existing IRIS faculty embeddings"""
+    """Load existing IRIS faculty embeddings (memory-mapped, not copied)"""
     index_file = IRIS_DATA / "iris_researchers.index"
-    metadata_file = IRIS_DATA / "iris_metadata.json"
     
-    if not index_file.exists() or not metadata_file.exists():
+    # load_sidecar checks the ids.json version, count and dim and that
+    # len(ids) == vectors.shape[0]; anything else is a stale or partial sidecar
+    sidecar = load_sidecar(index_file)
+    if sidecar is not None:
+        ids, vectors = sidecar
+        # Row i of the sidecar is FAISS id i, i.e. iris_metadata.json id i
+        return [f"faculty:{i}" for i in range(len(ids))], vectors
+    if any(path.exists() for path in sidecar_paths(index_file)):
+        raise SystemExit(f"Vector sidecar of {index_file} does not match its ids; rewrite it with "
+                         f"vector_sidecar.py extract {index_file} --ids-from iris_metadata.json")
+    
+    if not index_file.exists():
         print("Warning: IRIS faculty index not found")
         return [], np.array([])
     
-    # Load metadata for IDs
-    with open(metadata_file, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
-    
-    ids = [f"faculty:{r.get('id', i)}" for i, r in enumerate(metadata.get("researchers", []))]
-    
-    # Load FAISS index and extract vectors
+    # Older index without a sidecar: extract all vectors in one bulk call
     if HAS_FAISS:
+        print("  No vector sidecar; extracting vectors from the index")
         index = faiss.read_index(str(index_file))
-        n = index.ntotal
-        d = index.d
-        vectors = np.zeros((n, d), dtype=np.float32)
-        for i in range(n):
-            vectors[i] = index.reconstruct(i)
-        return ids, vectors
-    
-    return ids, np.array([])
+        vectors = extract_vectors(index)
+        return [f"faculty:{i}" for i in range(index.ntotal)], vectors
+    
+    return [], np.array([])
 
 def create_combined_index(faculty_ids: list, faculty_vecs: np.ndarray,
                           synapse_ids: list, synapse_vecs: np.ndarray) -> dict:
     """Create combined FAISS index"""
     
-    # Combine
+    # Combine straight into the memory-mapped vectors file (one copy per source)
     all_ids = faculty_ids + synapse_ids
-    
-    if len(faculty_vecs) > 0 and len(synapse_vecs) > 0:
-        all_vecs = np.vstack([faculty_vecs, synapse_vecs])
-    elif len(synapse_vecs) > 0:
-        all_vecs = synapse_vecs
-    else:
-        all_vecs = faculty_vecs
+    parts = [v for v in (faculty_vecs, synapse_vecs) if len(v) > 0]
+    d = parts[0].shape[1] if parts else 0
+    vectors_file, _ = sidecar_paths(OUTPUT_DIR / "combined_iris.index")  # ids.json: write_ids
+    all_vecs = np.zeros((0, d), dtype=np.float32)
+    if parts:
+        all_vecs = np.lib.format.open_memmap(vectors_file, mode="w+", dtype=np.float32,
+                                             shape=(len(all_ids), d))
+        start = 0
+        for part in parts:
+            all_vecs[start:start + len(part)] = part
+            start += len(part)
+        # Normalize for cosine similarity (faculty vectors already are), a
+        # chunk of rows at a time so no temporary the size of the merge is made
+        for start in range(0, len(all_vecs), NORMALIZE_CHUNK):
+            block = all_vecs[start:start + NORMALIZE_CHUNK]
+            block /= np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+        all_vecs.flush()
     
     print(f"\nCombined vectors:")
     print(f"  Faculty: {len(faculty_ids)}")
@@ -105,28 +123,22 @@ def create_combined_index(faculty_ids: list, faculty_vecs: np.ndarray,
         json.dump(id_mapping, f, indent=2)
     print(f"\nID mapping saved to: {mapping_file}")
     
-    # Save raw vectors for portability
-    vectors_file = OUTPUT_DIR / "combined_vectors.npy"
-    np.save(vectors_file, all_vecs)
-    print(f"Vectors saved to: {vectors_file}")
+    # Raw vectors + id map in the sidecar layout of the IRIS index pipeline
+    if parts:
+        write_ids(OUTPUT_DIR / "combined_iris.index", all_ids, all_vecs.shape, id_field="id")
+        print(f"Vectors saved to: {vectors_file}")
     
     # Create FAISS index
     if HAS_FAISS and len(all_vecs) > 0:
-        d = all_vecs.shape[1]
-        
         # Use IVF for larger datasets
         if len(all_vecs) > 10000:
             nlist = min(100, len(all_vecs) // 100)
             quantizer = faiss.IndexFlatIP(d)
             index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
-            
-            # Normalize for cosine similarity
-            faiss.normalize_L2(all_vecs)
             index.train(all_vecs)
             index.add(all_vecs)
         else:
             index = faiss.IndexFlatIP(d)
-            faiss.normalize_L2(all_vecs)
             index.add(all_vecs)
         
         index_file = OUTPUT_DIR / "combined_iris.index"